@@ -3,25 +3,39 @@ Flask Web Application for Live Object Detection with ROI Counting
 Upload video and watch live detection with IN/OUT counting
 """
 
-from flask import Flask, render_template, request, Response, jsonify, send_from_directory
+import time
+PROCESS_START = time.perf_counter()  # Startup timing, see startup_stats
+
+from flask import Flask, g, render_template, request, Response, jsonify, send_from_directory
+from datetime import datetime
 from werkzeug.utils import secure_filename
 import cv2
 import os
 import json
 import threading
-import time
+from collections import deque
 from pathlib import Path
-from inference import MobileOutDetector, CentroidTracker
+from face_store import FaceEncodingStore, FaceGallery
+from inference import (MobileOutDetector, ArrayTracker, ZoneCounter, VideoFrameReader, PipelineStage, FrameSinkStage,
+                       MotionGate, CrossingEventLog, TRACK_ID_LIMIT, daily_crossings, encode_image, extract_detections,
+                       get_model, hourly_crossings, load_zones)
 import numpy as np
-import pygame
-import face_recognition
 import pickle
 
+# face_recognition (dlib), pygame and the YOLO model are slow to initialize. They are
+# loaded on first use, or by warm_up() in the background once the server is running
+face_recognition = None
+pygame = None
+
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'outputs'
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
 app.config['ALLOWED_EXTENSIONS'] = {'mp4', 'avi', 'mov', 'mkv'}
+app.config['MODEL_PATH'] = 'bestmaruthi.pt'
+app.config['ROI_CONFIG'] = 'roi_config.json'
+app.config['EVENTS_FOLDER'] = 'events'  # Crossing event logs, <folder>/<channel>/<date>.ndjson
+app.config['CHANNEL'] = 'default'
 
 # Create folders if they don't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -29,43 +43,72 @@ os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
 os.makedirs('violations', exist_ok=True)
 os.makedirs('face_detections', exist_ok=True)
 
-# Initialize pygame mixer for audio alerts
-pygame.mixer.init()
 ALERT_SOUND_PATH = '/home/athul/maruthi/violation_alert.wav'
+audio_lock = threading.Lock()
+
+# Import time, first request and background warm-up durations (seconds)
+startup_stats = {
+    'import_s': None,
+    'first_request_at_s': None,
+    'first_request_s': None,
+    'warmup_s': None
+}
+
+
+def init_audio():
+    """Import pygame and initialize the mixer for audio alerts, once"""
+    global pygame
+    with audio_lock:
+        if pygame is None:
+            import pygame
+            pygame.mixer.init()
+    return pygame
 
 # Load known faces
-known_face_encodings = []
-known_face_names = []
+known_faces = FaceGallery()
+known_faces_loaded = False
+known_faces_lock = threading.Lock()
 KNOWN_FACES_DIR = 'known_faces'
 
 def load_known_faces():
-    """Load known faces from the known_faces directory"""
-    global known_face_encodings, known_face_names
+    """Import face_recognition and load known faces from the known_faces directory, once"""
+    global known_faces_loaded
+    with known_faces_lock:
+        if not known_faces_loaded:
+            _load_known_faces()
+            known_faces_loaded = True
+
+
+def _load_known_faces():
+    """Load the known face encodings from the face store, encoding only new or changed images"""
+    global known_faces, face_recognition
+    import face_recognition
     
     if not os.path.exists(KNOWN_FACES_DIR):
         print(f"⚠️ Known faces directory not found: {KNOWN_FACES_DIR}")
         return
     
-    for filename in os.listdir(KNOWN_FACES_DIR):
-        if filename.endswith(('.jpg', '.jpeg', '.png')):
-            filepath = os.path.join(KNOWN_FACES_DIR, filename)
-            try:
-                image = face_recognition.load_image_file(filepath)
-                encodings = face_recognition.face_encodings(image)
-                
-                if encodings:
-                    known_face_encodings.append(encodings[0])
-                    # Extract name from filename (remove extension and replace underscores)
-                    name = os.path.splitext(filename)[0].replace('_', ' ')
-                    known_face_names.append(name)
-                    print(f"✓ Loaded face: {name}")
-            except Exception as e:
-                print(f"✗ Error loading {filename}: {e}")
+    store = FaceEncodingStore(KNOWN_FACES_DIR)
+    known_faces = FaceGallery(*store.load())
     
-    print(f"✓ Total known faces loaded: {len(known_face_names)}")
+    print(f"✓ Total known faces loaded: {len(known_faces)} "
+          f"({store.stats['encoded']} encoded, {store.stats['load_s'] * 1000:.0f} ms)")
 
-# Load known faces on startup
-load_known_faces()
+
+def warm_up():
+    """Initialize the heavy subsystems in the background so the first upload does not wait"""
+    start = time.perf_counter()
+    load_known_faces()
+    try:
+        init_audio()
+    except Exception as e:
+        print(f"⚠️ Audio not available: {e}")
+    try:
+        get_model(app.config['MODEL_PATH'])
+    except Exception as e:
+        print(f"⚠️ Could not warm up {app.config['MODEL_PATH']}: {e}")
+    startup_stats['warmup_s'] = time.perf_counter() - start
+    print(f"✓ Warm-up finished in {startup_stats['warmup_s']:.2f}s")
 
 # Global variables for live streaming
 current_frame = None
@@ -76,24 +119,42 @@ processing_stats = {
     'in_count': 0,
     'out_count': 0,
     'fps': 0,
-    'status': 'idle'
+    'status': 'idle',
+    'pipeline': {},
+    'motion_skip_fraction': 0,
+    'zones': []
 }
-violations_list = []  # Store mobile violation screenshots
+violations_list = deque(maxlen=1000)  # Latest mobile violation screenshots (bounded for 24/7 streams)
 face_detections_list = []  # Store face detection screenshots
 frame_lock = threading.Lock()
 
+last_video_path = None  # Latest upload, its first frame is the background of the ROI editor
+
+# MobileOutDetector for /detect_image, the confidence threshold is passed per request
+image_detector = None
+image_detector_lock = threading.Lock()
+
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
 
-def process_video_live(video_path, model_path, roi_config_file=None, conf_threshold=0.25):
-    """Process video and generate frames for live streaming"""
+def process_video_live(video_path, model_path, roi_config_file=None, conf_threshold=0.25, motion_threshold=None,
+                       channel=None):
+    """
+    Process video and generate frames for live streaming
+    
+    motion_threshold enables the motion gate: frames where less than this fraction of
+    pixels changed skip inference and reuse the last detections (None = disabled).
+    Every IN/OUT crossing is logged under the channel (default: app.config['CHANNEL'])
+    for /report and /api/peak_analytics.
+    """
     global current_frame, processing_active, processing_stats
     
     processing_active = True
     processing_stats['status'] = 'processing'
+    load_known_faces()  # Returns immediately once warm_up() has run
     last_alert_time = 0  # Track last alert time locally
     mobile_detection_frames = 0  # Track consecutive mobile detections
     MOBILE_FRAME_THRESHOLD = 2  # Minimum frames needed to trigger alert
@@ -110,280 +171,225 @@ def process_video_live(video_path, model_path, roi_config_file=None, conf_thresh
             processing_stats['status'] = 'error'
             return
         
-        # Get video properties
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        processing_stats['total_frames'] = total_frames
-        
-        # Load ROI configuration
-        roi_line = None
-        is_custom_line = False
-        is_horizontal = False
-        line_pos = None
-        line_p1, line_p2 = None, None
-        
-        if roi_config_file and os.path.exists(roi_config_file):
-            with open(roi_config_file, 'r') as f:
-                roi_config = json.load(f)
-                config_type = roi_config.get('type', 'custom')
-                
-                if config_type == 'horizontal':
-                    roi_line = {'y': roi_config.get('y')}
-                elif config_type == 'vertical':
-                    roi_line = {'x': roi_config.get('x')}
-                elif config_type == 'custom' or 'line_points' in roi_config:
-                    line_points = roi_config.get('line_points')
-                    if line_points:
-                        roi_line = {'line_points': line_points}
-        
-        # Default ROI line if not configured
-        if roi_line is None:
-            roi_line = {'y': height // 2}
-        
-        # Determine line type
-        if 'line_points' in roi_line:
-            is_custom_line = True
-            line_p1, line_p2 = roi_line['line_points']
-        else:
-            is_horizontal = 'y' in roi_line
-            line_pos = roi_line.get('y') if is_horizontal else roi_line.get('x')
-        
-        # Initialize tracker
-        tracker = CentroidTracker(max_disappeared=30)
-        in_count = 0
-        out_count = 0
-        counted_ids = set()
-        
-        # Output video writer
-        output_path = os.path.join(app.config['OUTPUT_FOLDER'], 'processed_' + os.path.basename(video_path))
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        
-        frame_count = 0
-        start_time = time.time()
-        
-        while cap.isOpened() and processing_active:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        # Pipeline stages, the event log and the video handles are released in finally,
+        # also when decoding, inference or writing fails
+        stages = {}
+        events = None
+        out = None
+        try:
+            # Get video properties
+            fps = cap.get(cv2.CAP_PROP_FPS)  # float, e.g. 29.97, for event timestamps
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             
-            frame_count += 1
-            processing_stats['frame_count'] = frame_count
+            processing_stats['total_frames'] = total_frames
             
-            # Run detection (NO FRAME SKIPPING - process every frame)
-            results = detector.model(
-                frame,
-                conf=conf_threshold,
-                iou=0.45,
-                verbose=False
-            )[0]
+            # Load ROI line and IN/OUT boxes (from setup_roi.py / the ROI editor)
+            zones = []
+            if roi_config_file and os.path.exists(roi_config_file):
+                zones = load_zones(roi_config_file, video_width=width)
+            
+            # Default ROI line if not configured
+            if not zones:
+                zones = [{'y': height // 2}]
+            
+            # Initialize tracker and zone counter (crossing checks are vectorized over all tracked objects and zones).
+            # Counting state is dropped with each track and IDs wrap, so memory stays flat on 24/7 streams
+            tracker = ArrayTracker(max_disappeared=30, id_limit=TRACK_ID_LIMIT)
+            counter = ZoneCounter(zones)
+            events = CrossingEventLog(app.config['EVENTS_FOLDER'], channel or app.config['CHANNEL'], counter.names)
+            in_count = 0
+            out_count = 0
             
-            # Collect detections for tracking and check for mobile violations
-            detections_for_tracking = []
-            mobile_detected_this_frame = False
+            # Output video writer
+            output_path = os.path.join(app.config['OUTPUT_FOLDER'], 'processed_' + os.path.basename(video_path))
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(output_path, fourcc, int(fps), (width, height))
             
-            for box in results.boxes:
-                class_id = int(box.cls[0])
-                class_name = detector.class_names[class_id]
+            def annotate_and_write(item):
+                """Annotate a processed frame, publish it for streaming and write it to the output video"""
+                global current_frame
+                results, overlay, objects, frame_count, in_count, out_count = item
                 
-                if class_name == 'MOBILE':
-                    mobile_detected_this_frame = True
-                elif class_name == 'OUT':
-                    bbox = box.xyxy[0].cpu().numpy()
-                    detections_for_tracking.append(bbox)
+                # Annotate frame
+                annotated = results.plot()
+                
+                # Draw ROI lines and boxes with the counts of this frame
+                overlay.draw(annotated)
+                
+                # Draw tracked objects
+                for object_id, centroid in objects.items():
+                    cx, cy = centroid
+                    cv2.circle(annotated, (cx, cy), 5, (0, 255, 0), -1)
+                    cv2.putText(annotated, f"ID:{object_id}", (cx - 20, cy - 10),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+                
+                # Add stats overlay
+                cv2.rectangle(annotated, (10, 10), (700, 50), (0, 0, 0), -1)
+                text = f"Frame {frame_count}/{total_frames} | IN: {in_count} | OUT: {out_count}"
+                cv2.putText(annotated, text, (20, 35),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                
+                # Update current frame for streaming
+                with frame_lock:
+                    current_frame = annotated
+                
+                # Write to output video
+                out.write(annotated)
             
-            # Track mobile detections across frames
-            if mobile_detected_this_frame:
-                mobile_detection_frames += 1
-            else:
-                mobile_detection_frames = 0  # Reset counter if no mobile in current frame
+            # Pipeline: decode -> infer on background threads, tracking/alerts on this
+            # thread, annotate + encode + write on a sink thread
+            stages['decode'] = PipelineStage('decode', VideoFrameReader(cap))
+            motion_gate = MotionGate(threshold=motion_threshold) if motion_threshold is not None else None
+            stages['infer'] = PipelineStage('infer', detector.infer_frames(stages['decode'], motion_gate=motion_gate))
+            stages['write'] = FrameSinkStage('write', annotate_and_write)
             
-            # Play alert sound only if mobile detected in 3+ consecutive frames (with cooldown)
-            if mobile_detection_frames >= MOBILE_FRAME_THRESHOLD:
-                current_time = time.time()
-                if current_time - last_alert_time >= 5:  # 5 second cooldown
-                    try:
-                        # Play audio alert
-                        pygame.mixer.music.load(ALERT_SOUND_PATH)
-                        pygame.mixer.music.play()
-                        last_alert_time = current_time
-                        
-                        # Capture screenshot
-                        timestamp = time.strftime('%Y%m%d_%H%M%S')
-                        violation_filename = f'mobile_violation_{timestamp}.jpg'
-                        violation_path = os.path.join('violations', violation_filename)
-                        cv2.imwrite(violation_path, frame)
-                        
-                        # Add to violations list
-                        global violations_list
-                        violations_list.append({
-                            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                            'frame_number': frame_count,
-                            'filename': violation_filename,
-                            'path': violation_path
-                        })
-                        
-                        print(f"🔊 Mobile violation alert triggered (detected in {mobile_detection_frames} consecutive frames)")
-                        print(f"📸 Screenshot saved: {violation_filename}")
-                    except Exception as e:
-                        print(f"Error playing alert sound: {e}")
+            start_time = time.time()
             
-            # Face Detection (process every 5th frame for performance)
-            if frame_count % 5 == 0:
-                try:
-                    # Resize frame for faster face detection
-                    small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-                    rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-                    
-                    # Find all face locations and encodings
-                    face_locations = face_recognition.face_locations(rgb_small_frame)
-                    face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
-                    
-                    for face_encoding, face_location in zip(face_encodings, face_locations):
-                        # Compare with known faces
-                        matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=0.6)
-                        name = "Unknown"
-                        
-                        if True in matches:
-                            # Find best match
-                            face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-                            best_match_index = np.argmin(face_distances)
-                            if matches[best_match_index]:
-                                name = known_face_names[best_match_index]
+            # Run detection (NO FRAME SKIPPING - process every frame)
+            for frame_count, frame, results in stages['infer']:
+                if not processing_active:
+                    break
+                
+                processing_stats['frame_count'] = frame_count
+                
+                # Collect detections for tracking and check for mobile violations
+                dets = extract_detections(results)
+                detections_for_tracking = dets.out.xyxy
+                mobile_detected_this_frame = len(dets.mobile) > 0
+                
+                # Track mobile detections across frames
+                if mobile_detected_this_frame:
+                    mobile_detection_frames += 1
+                else:
+                    mobile_detection_frames = 0  # Reset counter if no mobile in current frame
+                
+                # Play alert sound only if mobile detected in 3+ consecutive frames (with cooldown)
+                if mobile_detection_frames >= MOBILE_FRAME_THRESHOLD:
+                    current_time = time.time()
+                    if current_time - last_alert_time >= 5:  # 5 second cooldown
+                        try:
+                            # Play audio alert
+                            audio = init_audio()
+                            audio.mixer.music.load(ALERT_SOUND_PATH)
+                            audio.mixer.music.play()
+                            last_alert_time = current_time
+                            
+                            # Capture screenshot
+                            timestamp = time.strftime('%Y%m%d_%H%M%S')
+                            violation_filename = f'mobile_violation_{timestamp}.jpg'
+                            violation_path = os.path.join('violations', violation_filename)
+                            cv2.imwrite(violation_path, frame)
+                            
+                            # Add to violations list
+                            global violations_list
+                            violations_list.append({
+                                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                                'frame_number': frame_count,
+                                'filename': violation_filename,
+                                'path': violation_path
+                            })
+                            
+                            print(f"🔊 Mobile violation alert triggered (detected in {mobile_detection_frames} consecutive frames)")
+                            print(f"📸 Screenshot saved: {violation_filename}")
+                        except Exception as e:
+                            print(f"Error playing alert sound: {e}")
+                
+                # Face Detection (process every 5th frame for performance)
+                if frame_count % 5 == 0:
+                    try:
+                        # Resize frame for faster face detection
+                        small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
+                        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
                         
-                        # Scale back face location
-                        top, right, bottom, left = face_location
-                        top *= 4
-                        right *= 4
-                        bottom *= 4
-                        left *= 4
+                        # Find all face locations and encodings
+                        face_locations = face_recognition.face_locations(rgb_small_frame)
+                        face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
                         
-                        # Draw rectangle and name on frame
-                        cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-                        cv2.rectangle(frame, (left, bottom - 35), (right, bottom), (0, 255, 0), cv2.FILLED)
-                        cv2.putText(frame, name, (left + 6, bottom - 6), cv2.FONT_HERSHEY_DUPLEX, 0.6, (255, 255, 255), 1)
+                        # Compare all faces with the known faces at once
+                        face_names, _ = known_faces.match(face_encodings, tolerance=0.6)
                         
-                        # Save face detection screenshot (one per person per session)
-                        if name != "Unknown":
-                            global face_detections_list
-                            # Check if this person already detected in this session
-                            already_detected = any(d['name'] == name for d in face_detections_list)
+                        for face_location, name in zip(face_locations, face_names):
+                            # Scale back face location
+                            top, right, bottom, left = face_location
+                            top *= 4
+                            right *= 4
+                            bottom *= 4
+                            left *= 4
                             
-                            if not already_detected:
-                                timestamp = time.strftime('%Y%m%d_%H%M%S')
-                                face_filename = f'face_{name.replace(" ", "_")}_{timestamp}.jpg'
-                                face_path = os.path.join('face_detections', face_filename)
-                                cv2.imwrite(face_path, frame)
-                                
-                                face_detections_list.append({
-                                    'name': name,
-                                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                                    'frame_number': frame_count,
-                                    'filename': face_filename,
-                                    'path': face_path
-                                })
+                            # Draw rectangle and name on frame
+                            cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+                            cv2.rectangle(frame, (left, bottom - 35), (right, bottom), (0, 255, 0), cv2.FILLED)
+                            cv2.putText(frame, name, (left + 6, bottom - 6), cv2.FONT_HERSHEY_DUPLEX, 0.6, (255, 255, 255), 1)
+                            
+                            # Save face detection screenshot (one per person per session)
+                            if name != "Unknown":
+                                global face_detections_list
+                                # Check if this person already detected in this session
+                                already_detected = any(d['name'] == name for d in face_detections_list)
                                 
-                                print(f"👤 Face detected: {name} at frame {frame_count}")
-                                print(f"📸 Face screenshot saved: {face_filename}")
+                                if not already_detected:
+                                    timestamp = time.strftime('%Y%m%d_%H%M%S')
+                                    face_filename = f'face_{name.replace(" ", "_")}_{timestamp}.jpg'
+                                    face_path = os.path.join('face_detections', face_filename)
+                                    cv2.imwrite(face_path, frame)
+                                    
+                                    face_detections_list.append({
+                                        'name': name,
+                                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+                                        'frame_number': frame_count,
+                                        'filename': face_filename,
+                                        'path': face_path
+                                    })
+                                    
+                                    print(f"👤 Face detected: {name} at frame {frame_count}")
+                                    print(f"📸 Face screenshot saved: {face_filename}")
+                    
+                    except Exception as e:
+                        print(f"Face detection error: {e}")
                 
-                except Exception as e:
-                    print(f"Face detection error: {e}")
-            
-            # Update tracker
-            objects = tracker.update(detections_for_tracking)
-            
-            # Check line crossings
-            for object_id, centroid in objects.items():
-                cx, cy = centroid
+                # Update tracker and check line crossings
+                tracker.update(detections_for_tracking)
+                events.emit(counter.update(tracker), frame_count, frame_count / fps if fps else 0.0)
+                in_count = counter.in_count
+                out_count = counter.out_count
                 
-                if object_id not in tracker.crossed:
-                    tracker.crossed[object_id] = {'crossed': False, 'direction': None, 'start_side': None}
+                processing_stats['in_count'] = in_count
+                processing_stats['out_count'] = out_count
+                processing_stats['zones'] = [
+                    {'name': zone['name'], 'in_count': zone['in_count'], 'out_count': zone['out_count']}
+                    for zone in counter.counts()
+                ]
                 
-                # Determine side
-                if is_custom_line:
-                    v1 = (line_p2[0] - line_p1[0], line_p2[1] - line_p1[1])
-                    v2 = (cx - line_p1[0], cy - line_p1[1])
-                    cross = v1[0] * v2[1] - v1[1] * v2[0]
-                    current_side = 'left' if cross > 0 else 'right'
-                elif is_horizontal:
-                    current_side = 'top' if cy < line_pos else 'bottom'
-                else:
-                    current_side = 'left' if cx < line_pos else 'right'
+                # Calculate FPS
+                elapsed = time.time() - start_time
+                current_fps = frame_count / elapsed if elapsed > 0 else 0
+                processing_stats['fps'] = current_fps
+                processing_stats['pipeline'] = {name: stage.stats.as_dict() for name, stage in stages.items()}
+                if motion_gate:
+                    processing_stats['motion_skip_fraction'] = motion_gate.as_dict()['skip_fraction']
                 
-                if tracker.crossed[object_id]['start_side'] is None:
-                    tracker.crossed[object_id]['start_side'] = current_side
+                stages['write'].put((results, counter.snapshot(), tracker.objects, frame_count, in_count, out_count))
                 
-                # Detect crossing
-                if object_id not in counted_ids:
-                    start_side = tracker.crossed[object_id]['start_side']
-                    
-                    if is_custom_line or not is_horizontal:
-                        if start_side == 'left' and current_side == 'right':
-                            out_count += 1
-                            counted_ids.add(object_id)
-                        elif start_side == 'right' and current_side == 'left':
-                            in_count += 1
-                            counted_ids.add(object_id)
-                    else:
-                        if start_side == 'top' and current_side == 'bottom':
-                            out_count += 1
-                            counted_ids.add(object_id)
-                        elif start_side == 'bottom' and current_side == 'top':
-                            in_count += 1
-                            counted_ids.add(object_id)
-            
-            processing_stats['in_count'] = in_count
-            processing_stats['out_count'] = out_count
-            
-            # Annotate frame
-            annotated = results.plot()
-            
-            # Draw ROI line
-            if is_custom_line:
-                cv2.line(annotated, tuple(line_p1), tuple(line_p2), (0, 255, 255), 3)
-                cv2.circle(annotated, tuple(line_p1), 8, (0, 255, 0), -1)
-                cv2.circle(annotated, tuple(line_p2), 8, (0, 0, 255), -1)
-            elif is_horizontal:
-                cv2.line(annotated, (0, line_pos), (width, line_pos), (0, 255, 255), 3)
-            else:
-                cv2.line(annotated, (line_pos, 0), (line_pos, height), (0, 255, 255), 3)
+                # Small delay to control streaming speed
+                time.sleep(0.01)
             
-            # Draw tracked objects
-            for object_id, centroid in objects.items():
-                cx, cy = centroid
-                cv2.circle(annotated, (cx, cy), 5, (0, 255, 0), -1)
-                cv2.putText(annotated, f"ID:{object_id}", (cx - 20, cy - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-            
-            # Add stats overlay
-            cv2.rectangle(annotated, (10, 10), (700, 50), (0, 0, 0), -1)
-            text = f"Frame {frame_count}/{total_frames} | IN: {in_count} | OUT: {out_count}"
-            cv2.putText(annotated, text, (20, 35),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # Calculate FPS
-            elapsed = time.time() - start_time
-            current_fps = frame_count / elapsed if elapsed > 0 else 0
-            processing_stats['fps'] = current_fps
-            
-            # Update current frame for streaming
-            with frame_lock:
-                current_frame = annotated.copy()
-            
-            # Write to output video
-            out.write(annotated)
-            
-            # Small delay to control streaming speed
-            time.sleep(0.01)
-        
-        # Cleanup
-        cap.release()
-        out.release()
+            processing_stats['status'] = 'completed'
         
-        processing_stats['status'] = 'completed'
+        finally:
+            for name in ('infer', 'decode'):
+                if name in stages:
+                    stages[name].close()
+            try:
+                if 'write' in stages:
+                    stages['write'].close()
+            finally:
+                if events:
+                    events.close()
+                cap.release()
+                if out:
+                    out.release()
         
     except Exception as e:
         print(f"Error processing video: {e}")
@@ -420,6 +426,23 @@ def generate_frames():
         time.sleep(0.03)  # ~30 FPS streaming
 
 
+@app.before_request
+def start_request_timer():
+    """Remember when the request arrived (used for the first-request timing)"""
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_first_request(response):
+    """Record how long after process start the first request was served"""
+    if startup_stats['first_request_s'] is None:
+        startup_stats['first_request_at_s'] = g.request_start - PROCESS_START
+        startup_stats['first_request_s'] = time.perf_counter() - g.request_start
+        print(f"⏱️  First request ({request.path}) served {time.perf_counter() - PROCESS_START:.2f}s "
+              f"after start (imports {startup_stats['import_s']:.2f}s)")
+    return response
+
+
 @app.route('/')
 def index():
     """Main page"""
@@ -429,7 +452,7 @@ def index():
 @app.route('/upload', methods=['POST'])
 def upload_video():
     """Handle video upload and start processing"""
-    global processing_active, current_frame, processing_stats
+    global processing_active, current_frame, processing_stats, last_video_path
     
     if processing_active:
         return jsonify({'error': 'Processing already in progress'}), 400
@@ -449,10 +472,14 @@ def upload_video():
     filename = secure_filename(file.filename)
     video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     file.save(video_path)
+    last_video_path = video_path
     
     # Get parameters
     conf_threshold = float(request.form.get('confidence', 0.25))
-    roi_config = request.form.get('roi_config', 'roi_config.json')
+    roi_config = request.form.get('roi_config', app.config['ROI_CONFIG'])
+    motion_threshold = request.form.get('motion_threshold')
+    motion_threshold = float(motion_threshold) if motion_threshold else None
+    channel = request.form.get('channel') or app.config['CHANNEL']
     
     # Reset stats
     current_frame = None
@@ -462,13 +489,16 @@ def upload_video():
         'in_count': 0,
         'out_count': 0,
         'fps': 0,
-        'status': 'processing'
+        'status': 'processing',
+        'pipeline': {},
+        'motion_skip_fraction': 0,
+        'zones': []
     }
     
     # Start processing in background thread
     thread = threading.Thread(
         target=process_video_live,
-        args=(video_path, 'bestmaruthi.pt', roi_config, conf_threshold)
+        args=(video_path, app.config['MODEL_PATH'], roi_config, conf_threshold, motion_threshold, channel)
     )
     thread.daemon = True
     thread.start()
@@ -480,6 +510,110 @@ def upload_video():
     })
 
 
+@app.route('/report/<channel>/<date>')
+def get_report(channel, date):
+    """Hourly IN/OUT counts of one day, rolled up from the crossing event log"""
+    try:
+        day = datetime.strptime(date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': f'Invalid date: {date} (expected YYYY-MM-DD)'}), 400
+    
+    hourly_data = hourly_crossings(app.config['EVENTS_FOLDER'], secure_filename(channel), day)
+    return jsonify({
+        'channel': channel,
+        'date': day.isoformat(),
+        'hourly_data': hourly_data,
+        'in_count': sum(hour['in'] for hour in hourly_data),
+        'out_count': sum(hour['out'] for hour in hourly_data)
+    })
+
+
+@app.route('/api/peak_analytics/<channel>')
+def get_peak_analytics(channel):
+    """Busiest day of the last 7 days and busiest hour of today (by IN count)"""
+    channel = secure_filename(channel)
+    week = daily_crossings(app.config['EVENTS_FOLDER'], channel, days=7)
+    today = hourly_crossings(app.config['EVENTS_FOLDER'], channel)
+    
+    hour_labels = [f"{hour % 12 or 12} {'AM' if hour < 12 else 'PM'}" for hour in range(24)]
+    peak_day = max(week, key=lambda day: day['in'])
+    peak_hour = max(today, key=lambda hour: hour['in'])
+    
+    return jsonify({
+        'peak_day': {
+            'name': datetime.strptime(peak_day['date'], '%Y-%m-%d').strftime('%A'),
+            'date': peak_day['date'],
+            'count': peak_day['in'],
+            'week_data': [{'day': day['day'], 'date': day['date'], 'count': day['in']} for day in week]
+        },
+        'peak_hour': {
+            'label': hour_labels[peak_hour['hour']],
+            'count': peak_hour['in'],
+            'hourly_data': [{'hour': hour_labels[hour['hour']], 'count': hour['in']} for hour in today]
+        }
+    })
+
+
+@app.route('/roi_editor')
+def roi_editor():
+    """Editor for the IN/OUT counting boxes"""
+    return render_template('roi_editor.html')
+
+
+@app.route('/api/out-count/roi-frame')
+def get_roi_frame():
+    """First frame of the latest uploaded video, the ROI editor draws the boxes on it"""
+    video_path = last_video_path
+    if video_path is None:
+        uploads = [p for p in Path(app.config['UPLOAD_FOLDER']).iterdir() if allowed_file(p.name)]
+        video_path = str(max(uploads, key=lambda p: p.stat().st_mtime)) if uploads else None
+    if video_path is None:
+        return jsonify({'error': 'No video uploaded'}), 404
+    
+    cap = cv2.VideoCapture(video_path)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        return jsonify({'error': f'Could not read a frame from {os.path.basename(video_path)}'}), 404
+    
+    return Response(encode_image(frame), mimetype='image/jpeg')
+
+
+@app.route('/api/out-count/get-roi')
+def get_roi():
+    """Saved ROI configuration (line and/or IN/OUT boxes)"""
+    if not os.path.exists(app.config['ROI_CONFIG']):
+        return jsonify({})
+    with open(app.config['ROI_CONFIG'], 'r') as f:
+        return jsonify(json.load(f))
+
+
+@app.route('/api/out-count/save-roi', methods=['POST'])
+def save_roi():
+    """Save the IN/OUT boxes drawn in the ROI editor, keeping the rest of the ROI configuration"""
+    data = request.get_json(silent=True) or {}
+    try:
+        boxes = {key: [[int(x), int(y)] for x, y in data[key]] for key in ('in_box', 'out_box')}
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'in_box and out_box must be lists of [x, y] points'}), 400
+    if any(len(points) < 3 for points in boxes.values()):
+        return jsonify({'error': 'in_box and out_box need at least 3 points'}), 400
+    
+    roi_config = {}
+    if os.path.exists(app.config['ROI_CONFIG']):
+        with open(app.config['ROI_CONFIG'], 'r') as f:
+            roi_config = json.load(f)
+    roi_config.update(boxes)
+    for key in ('frame_width', 'frame_height'):
+        if data.get(key):
+            roi_config[key] = int(data[key])
+    
+    with open(app.config['ROI_CONFIG'], 'w') as f:
+        json.dump(roi_config, f, indent=2)
+    
+    return jsonify({'success': True, 'roi': roi_config})
+
+
 @app.route('/video_feed')
 def video_feed():
     """Video streaming route"""
@@ -493,6 +627,49 @@ def get_stats():
     return jsonify(processing_stats)
 
 
+@app.route('/startup_stats')
+def get_startup_stats():
+    """Get import, first-request and warm-up timings"""
+    return jsonify(startup_stats)
+
+
+def get_image_detector():
+    """Return the image detector, created once (the model itself is shared)"""
+    global image_detector
+    with image_detector_lock:
+        if image_detector is None:
+            image_detector = MobileOutDetector(app.config['MODEL_PATH'])
+        return image_detector
+
+
+@app.route('/detect_image', methods=['POST'])
+def detect_image():
+    """Detect MOBILE/OUT in an uploaded image without saving it, return JSON or the annotated JPEG"""
+    file = request.files.get('image')
+    data = file.read() if file else request.get_data()
+    if not data:
+        return jsonify({'error': 'No image provided'}), 400
+    
+    annotate = request.values.get('annotate', '').lower() in ('1', 'true', 'yes')
+    
+    try:
+        conf_threshold = float(request.values.get('confidence', 0.25))
+        if not 0.0 <= conf_threshold <= 1.0:
+            raise ValueError(f"confidence must be between 0 and 1, got {conf_threshold}")
+        result = get_image_detector().detect_bytes(
+            data, annotate=annotate, name=file.filename if file else None, conf=conf_threshold
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if annotate:
+        response = Response(encode_image(result.pop('annotated')), mimetype='image/jpeg')
+        response.headers['X-Detection-Counts'] = json.dumps(result['counts'])
+        return response
+    
+    return jsonify(result)
+
+
 @app.route('/stop')
 def stop_processing():
     """Stop current processing"""
@@ -511,7 +688,7 @@ def download_file(filename):
 def get_violations():
     """Get list of mobile violations"""
     return jsonify({
-        'violations': violations_list,
+        'violations': list(violations_list),
         'total': len(violations_list)
     })
 
@@ -537,6 +714,9 @@ def get_face_detection_image(filename):
     return send_from_directory('face_detections', filename)
 
 
+startup_stats['import_s'] = time.perf_counter() - PROCESS_START
+
+
 if __name__ == '__main__':
     print("\n" + "="*70)
     print("🚀 LIVE DETECTION WEB APP")
@@ -546,4 +726,9 @@ if __name__ == '__main__':
     print("🎯 All frames processed - No frame skipping")
     print("="*70 + "\n")
     
+    # Warm up faces, audio and the detection model once in the serving process (not in
+    # the reloader parent) while the server already answers requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        threading.Thread(target=warm_up, daemon=True).start()
+    
     app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,401 @@
+"""
+Benchmarks for the MOBILE/OUT detection pipeline
+Measure inference latency per backend on frames from a video, tracker cost, startup time and
+memory of long-running tracking
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from inference import BACKENDS, TRACKERS, MobileOutDetector, ZoneCounter, latency_stats, make_tracker
+
+
+def load_frames(source, count, resize_width=640):
+    """
+    Load frames for benchmarking
+    
+    Args:
+        source: Path to a video, or None for random frames
+        count: Number of frames to load
+        resize_width: Resize frame width like detect_video does (default: 640)
+    
+    Returns:
+        List of BGR frames
+    """
+    frames = []
+    
+    if source:
+        cap = cv2.VideoCapture(str(source))
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {source}")
+        
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        
+        if not frames:
+            raise ValueError(f"No frames could be read from: {source}")
+    else:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8) for _ in range(count)]
+    
+    if resize_width:
+        resized = []
+        for frame in frames:
+            height, width = frame.shape[:2]
+            if resize_width < width:
+                frame = cv2.resize(frame, (resize_width, int(height * (resize_width / width))))
+            resized.append(frame)
+        frames = resized
+    
+    return frames
+
+
+def benchmark_backends(args):
+    """Compare per-frame latency of the PyTorch path against the exported runtimes"""
+    frames = load_frames(args.source, args.frames + args.warmup, args.resize_width)
+    rows = []
+    
+    for backend in args.backends:
+        detector = MobileOutDetector(args.model, backend=backend, imgsz=args.imgsz)
+        
+        # Warm-up (lazy initialization, allocator, JIT caches)
+        for frame in frames[:args.warmup]:
+            list(detector.infer_frames([(0, frame)]))
+        
+        latencies = []
+        boxes = 0
+        for i, frame in enumerate(frames[args.warmup:], 1):
+            start = time.perf_counter()
+            for _, _, results in detector.infer_frames([(i, frame)]):
+                boxes += len(results.boxes)
+            latencies.append(time.perf_counter() - start)
+        
+        row = latency_stats(latencies)
+        row['backend'] = backend
+        row['boxes'] = boxes
+        row['names'] = dict(detector.model.names)
+        rows.append(row)
+    
+    baseline = next((row for row in rows if row['backend'] == 'pytorch'), rows[0])
+    
+    print("\n" + "=" * 70)
+    print(f"BACKEND LATENCY ({len(frames) - args.warmup} frames, imgsz={args.imgsz})")
+    print("=" * 70)
+    print(f"{'Backend':<10} {'Mean ms':>9} {'P50 ms':>9} {'P95 ms':>9} {'FPS':>8} {'Speedup':>8} {'Boxes':>7}")
+    for row in rows:
+        speedup = baseline['mean_ms'] / row['mean_ms']
+        print(f"{row['backend']:<10} {row['mean_ms']:>9.1f} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+              f"{row['fps']:>8.1f} {speedup:>7.2f}x {row['boxes']:>7}")
+    for row in rows:
+        if row['names'] != baseline['names']:
+            print(f"⚠️  Class map of {row['backend']} differs: {row['names']}")
+    print("=" * 70)
+    
+    return rows
+
+
+def simulate_tracks(objects, frames, frame_size=(1920, 1080), box_size=60, speed=(2.0, 12.0), seed=0):
+    """
+    Boxes of objects moving at constant velocity and bouncing off the frame edges
+    
+    Returns:
+        List with one (objects, 4) array of x1, y1, x2, y2 per frame, row i is always object i
+    """
+    rng = np.random.default_rng(seed)
+    size = np.asarray(frame_size, dtype=np.float64) - box_size
+    position = rng.uniform(0, 1, (objects, 2)) * size
+    angle = rng.uniform(0, 2 * np.pi, objects)
+    velocity = rng.uniform(*speed, objects)[:, None] * np.stack([np.cos(angle), np.sin(angle)], axis=1)
+    
+    tracks = []
+    for _ in range(frames):
+        tracks.append(np.hstack([position, position + box_size]))
+        position = position + velocity
+        bounced = (position < 0) | (position > size)
+        velocity[bounced] *= -1
+        position = np.clip(position, 0, size)
+    
+    return tracks
+
+
+def benchmark_tracker(args):
+    """Measure tracker update + line-crossing cost and ID switches per tracker, assignment mode and object count"""
+    modes = [('greedy', None), ('optimal', None), ('optimal', args.max_distance)]
+    rows = []
+    
+    for objects in args.objects:
+        tracks = simulate_tracks(objects, args.updates + 1)
+        truth = [((boxes[:, :2] + boxes[:, 2:]) / 2.0).astype(int) for boxes in tracks]
+        
+        for tracker_type in args.trackers:
+            for assignment, max_distance in modes:
+                rows.append(time_tracker(TRACKERS[tracker_type], tracks, truth, assignment, max_distance))
+                rows[-1].update({'objects': objects, 'tracker': tracker_type})
+    
+    print("\n" + "=" * 70)
+    print(f"TRACKER UPDATE + LINE CROSSING COST ({args.updates} updates per run)")
+    print("=" * 70)
+    print(f"{'Objects':>8} {'Tracker':<9} {'Assignment':<11} {'Gate px':>8} {'Mean ms':>9} {'P95 ms':>9} {'ID switches':>12}")
+    for row in rows:
+        gate = f"{row['max_distance']:.0f}" if row['max_distance'] is not None else '-'
+        print(f"{row['objects']:>8} {row['tracker']:<9} {row['assignment']:<11} {gate:>8} {row['mean_ms']:>9.3f} "
+              f"{row['p95_ms']:>9.3f} {row['id_switches']:>12}")
+    print("=" * 70)
+    
+    return rows
+
+
+def time_tracker(tracker_class, tracks, truth, assignment, max_distance):
+    """Time tracker.update plus the line-crossing check over simulated tracks and count ID switches"""
+    # Untimed warm-up run (lazy scipy imports)
+    warmup = tracker_class(max_distance=max_distance, assignment=assignment)
+    for boxes in tracks[:3]:
+        warmup.update(boxes)
+    
+    tracker = tracker_class(max_disappeared=30, max_distance=max_distance, assignment=assignment)
+    counter = ZoneCounter({'y': 540})
+    tracker.update(tracks[0])  # registers every object, not timed
+    previous_ids = None
+    switches = 0
+    latencies = []
+    
+    for boxes, centroids in zip(tracks[1:], truth[1:]):
+        start = time.perf_counter()
+        tracker.update(boxes)
+        counter.update(tracker)
+        latencies.append(time.perf_counter() - start)
+        
+        # An ID switch is a simulated object showing up under a different (nearest) tracker ID
+        tracked = tracker.objects
+        tracked_ids = np.array(list(tracked))
+        nearest = np.linalg.norm(np.array(list(tracked.values()))[None] - centroids[:, None], axis=2).argmin(axis=1)
+        ids = tracked_ids[nearest]
+        if previous_ids is not None:
+            switches += int(np.count_nonzero(ids != previous_ids))
+        previous_ids = ids
+    
+    row = latency_stats(latencies)
+    row.update({'assignment': assignment, 'max_distance': max_distance, 'id_switches': switches,
+                'in_count': counter.in_count, 'out_count': counter.out_count})
+    return row
+
+
+def stream_tracks(objects, frame_size=(1920, 1080), box_size=60, speed=(4.0, 16.0), seed=0):
+    """
+    Endless stream of boxes of people walking down the frame
+    
+    Every object that leaves at the bottom is replaced by a new one entering at the top in
+    a random lane, so the tracker keeps creating and dropping objects like on a live camera.
+    
+    Yields:
+        One (objects, 4) array of x1, y1, x2, y2 per frame
+    """
+    rng = np.random.default_rng(seed)
+    width, height = frame_size
+    x = rng.uniform(0, width - box_size, objects)
+    y = rng.uniform(-box_size, height, objects)
+    velocity = rng.uniform(*speed, objects)
+    
+    while True:
+        yield np.stack([x, y, x + box_size, y + box_size], axis=1)
+        y = y + velocity
+        left = y > height
+        if left.any():
+            count = int(np.count_nonzero(left))
+            x[left] = rng.uniform(0, width - box_size, count)
+            y[left] = -box_size
+            velocity[left] = rng.uniform(*speed, count)
+
+
+def resident_memory_mb():
+    """Resident set size of this process in MB (Linux /proc, else the peak from getrusage)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark_soak(args):
+    """Feed millions of synthetic detections through tracker + zone counting and check that memory stays flat"""
+    updates = args.detections // args.objects
+    sample_every = max(1, updates // 100)
+    zones = [
+        {'name': 'line', 'y': 540},
+        {'name': 'door', 'polygon': [(600, 300), (1300, 300), (1300, 800), (600, 800)]}
+    ]
+    rows = []
+    
+    for tracker_type in args.trackers:
+        tracker = make_tracker(tracker_type, max_disappeared=10, max_distance=args.max_distance, id_limit=args.id_limit)
+        counter = ZoneCounter(zones)
+        samples = []
+        live = 0
+        start = time.perf_counter()
+        
+        for update, boxes in enumerate(stream_tracks(args.objects)):
+            if update == updates:
+                break
+            tracker.update(boxes)
+            counter.update(tracker)
+            if update % sample_every == 0:
+                live = max(live, len(tracker.objects))
+                samples.append(resident_memory_mb())
+        
+        elapsed = time.perf_counter() - start
+        
+        # Memory after the first 10% of the run (allocator pools, lazy imports) is the baseline
+        baseline = samples[len(samples) // 10]
+        rows.append({
+            'tracker': tracker_type,
+            'updates': updates,
+            'detections': updates * args.objects,
+            'us_per_update': elapsed / updates * 1e6,
+            'max_live_tracks': live,
+            'counter_tracks': counter.tracked,
+            'next_id': int(tracker.next_object_id),
+            'in_count': counter.in_count,
+            'out_count': counter.out_count,
+            'rss_baseline_mb': baseline,
+            'rss_end_mb': samples[-1],
+            'rss_growth_mb': max(samples[len(samples) // 10:]) - baseline
+        })
+    
+    print("\n" + "=" * 70)
+    print(f"SOAK: {args.detections:,} detections, {args.objects} objects per frame, IDs wrap at {args.id_limit}")
+    print("=" * 70)
+    print(f"{'Tracker':<9} {'Updates':>8} {'us/upd':>8} {'Live':>6} {'Next ID':>8} {'IN':>7} {'OUT':>7} "
+          f"{'RSS MB':>8} {'Growth':>8}")
+    for row in rows:
+        print(f"{row['tracker']:<9} {row['updates']:>8} {row['us_per_update']:>8.0f} {row['max_live_tracks']:>6} "
+              f"{row['next_id']:>8} {row['in_count']:>7} {row['out_count']:>7} {row['rss_end_mb']:>8.1f} "
+              f"{row['rss_growth_mb']:>+8.1f}")
+    print("=" * 70)
+    
+    grown = [row['tracker'] for row in rows if row['rss_growth_mb'] > args.budget]
+    if grown:
+        print(f"✗ Resident memory grew by more than {args.budget:.1f} MB: {', '.join(grown)}")
+        sys.exit(1)
+    print(f"✓ Resident memory stayed within {args.budget:.1f} MB of the baseline")
+    
+    return rows
+
+
+# Runs in a fresh interpreter: import the web app and serve the first requests in-process
+APP_STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/')
+index = time.perf_counter()
+client.get('/stats')
+stats = time.perf_counter()
+print(json.dumps({'import_s': imported - start, 'index_s': index - start, 'stats_s': stats - start}))
+"""
+
+
+def run_python(args, cwd):
+    """Run the current interpreter with args, return (wall time in seconds, stdout)"""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable] + args, cwd=cwd, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, completed.stdout
+
+
+def benchmark_startup(args):
+    """Measure cold start of the inference CLI and the web app in fresh interpreters"""
+    cwd = Path(__file__).resolve().parent
+    timings = {'inference_import': [], 'inference_help': [], 'app_import': [], 'app_first_index': [], 'app_first_stats': []}
+    
+    for _ in range(args.repeat):
+        _, output = run_python(['-c', 'import time; t = time.perf_counter(); import inference; '
+                                      'print(time.perf_counter() - t)'], cwd)
+        timings['inference_import'].append(float(output.strip().splitlines()[-1]))
+        
+        wall, _ = run_python(['inference.py', '--help'], cwd)
+        timings['inference_help'].append(wall)
+        
+        _, output = run_python(['-c', APP_STARTUP_SCRIPT], cwd)
+        app_timings = json.loads(output.strip().splitlines()[-1])
+        timings['app_import'].append(app_timings['import_s'])
+        timings['app_first_index'].append(app_timings['index_s'])
+        timings['app_first_stats'].append(app_timings['stats_s'])
+    
+    medians = {name: float(np.median(values)) for name, values in timings.items()}
+    
+    print("\n" + "=" * 70)
+    print(f"STARTUP TIME (median of {args.repeat} cold starts)")
+    print("=" * 70)
+    rows = [
+        ('import inference', 'inference_import', ''),
+        ('inference.py --help', 'inference_help', ' (wall, incl. interpreter)'),
+        ('import app', 'app_import', ''),
+        ('app: first / served at', 'app_first_index', ''),
+        ('app: first /stats served at', 'app_first_stats', '')
+    ]
+    for label, name, note in rows:
+        print(f"{label:<28} {medians[name] * 1000:>7.0f} ms{note}")
+    print("=" * 70)
+    
+    if medians['app_first_stats'] > args.budget:
+        print(f"✗ First requests took longer than the {args.budget:.1f}s budget")
+        sys.exit(1)
+    
+    return medians
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MOBILE/OUT detection benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    backends = subparsers.add_parser('backends', help='Compare inference latency of PyTorch, ONNX Runtime and OpenVINO')
+    backends.add_argument('--model', type=str, required=True, help='Path to model weights (.pt)')
+    backends.add_argument('--source', type=str, help='Video to take frames from (default: random frames)')
+    backends.add_argument('--backends', nargs='+', default=['pytorch', 'onnx'], choices=list(BACKENDS), help='Backends to compare')
+    backends.add_argument('--imgsz', type=int, default=640, help='Inference image size')
+    backends.add_argument('--resize-width', type=int, default=640, help='Resize frames like detect_video (0 to disable)')
+    backends.add_argument('--frames', type=int, default=100, help='Number of timed frames')
+    backends.add_argument('--warmup', type=int, default=10, help='Number of untimed warm-up frames')
+    backends.set_defaults(func=benchmark_backends)
+    
+    tracker = subparsers.add_parser('tracker', help='Measure per-update tracker and line-crossing cost and ID switches on simulated objects')
+    tracker.add_argument('--objects', type=int, nargs='+', default=[5, 50, 500], help='Numbers of tracked objects')
+    tracker.add_argument('--updates', type=int, default=200, help='Timed tracker updates per run')
+    tracker.add_argument('--trackers', nargs='+', default=list(TRACKERS), choices=list(TRACKERS), help='Tracker implementations to compare')
+    tracker.add_argument('--max-distance', type=float, default=40, help='Distance gate of the gated optimal run (pixels)')
+    tracker.set_defaults(func=benchmark_tracker)
+    
+    startup = subparsers.add_parser('startup', help='Measure import and first-request time of inference.py and app.py')
+    startup.add_argument('--repeat', type=int, default=3, help='Number of cold starts to take the median of')
+    startup.add_argument('--budget', type=float, default=1.0, help='Fail if / and /stats are not served within this many seconds')
+    startup.set_defaults(func=benchmark_startup)
+    
+    soak = subparsers.add_parser('soak', help='Run tracking and zone counting on millions of synthetic detections and check memory stays flat')
+    soak.add_argument('--detections', type=int, default=2_000_000, help='Total number of detections fed to each tracker')
+    soak.add_argument('--objects', type=int, default=50, help='Detections per frame')
+    soak.add_argument('--trackers', nargs='+', default=list(TRACKERS), choices=list(TRACKERS), help='Tracker implementations to soak')
+    soak.add_argument('--max-distance', type=float, default=60, help='Tracker distance gate (pixels)')
+    soak.add_argument('--id-limit', type=int, default=4096, help='Track IDs wrap at this value (small, so the run wraps several times)')
+    soak.add_argument('--budget', type=float, default=8.0, help='Fail if resident memory grows by more than this many MB after warm-up')
+    soak.set_defaults(func=benchmark_soak)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from tkinter import ttk, messagebox
 import os
 import numpy as np
 from pathlib import Path
+from face_store import FaceGallery
 
 
 class FaceDetectionApp:
@@ -18,8 +19,7 @@ class FaceDetectionApp:
         self.known_faces_folder = "known_faces"
         
         # Storage for known faces
-        self.known_face_encodings = []
-        self.known_face_names = []
+        self.known_faces = FaceGallery()
         
         # Create folders if they don't exist
         os.makedirs(self.videos_folder, exist_ok=True)
@@ -142,40 +142,14 @@ class FaceDetectionApp:
             self.webcam_frame.pack(fill="x", pady=5)
         
     def load_known_faces(self):
-        """Load known faces from the known_faces folder"""
+        """Load known faces from the face store (only new or changed images are encoded)"""
         if not os.path.exists(self.known_faces_folder):
             return
             
-        self.known_face_encodings = []
-        self.known_face_names = []
+        self.known_faces = FaceGallery.load(self.known_faces_folder)
         
-        supported_formats = ['.jpg', '.jpeg', '.png', '.bmp']
-        
-        for filename in os.listdir(self.known_faces_folder):
-            file_path = os.path.join(self.known_faces_folder, filename)
-            
-            if os.path.isfile(file_path):
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in supported_formats:
-                    try:
-                        # Load image
-                        image = face_recognition.load_image_file(file_path)
-                        # Get face encoding
-                        encodings = face_recognition.face_encodings(image)
-                        
-                        if encodings:
-                            self.known_face_encodings.append(encodings[0])
-                            # Use filename without extension as name
-                            name = os.path.splitext(filename)[0].replace('_', ' ')
-                            self.known_face_names.append(name)
-                            print(f"Loaded face: {name}")
-                        else:
-                            print(f"No face found in {filename}")
-                    except Exception as e:
-                        print(f"Error loading {filename}: {str(e)}")
-        
-        if self.known_face_encodings:
-            print(f"Loaded {len(self.known_face_encodings)} known faces")
+        if self.known_faces:
+            print(f"Loaded {len(self.known_faces)} known faces")
         else:
             print("No known faces loaded. Add images to 'known_faces' folder.")
     
@@ -213,7 +187,7 @@ class FaceDetectionApp:
                                      "Please select a video from the dropdown.")
                 return
             
-            if not self.known_face_encodings:
+            if not self.known_faces:
                 messagebox.showinfo("No Known Faces", 
                                   "No known faces loaded. Faces will be detected but not recognized.\n\n" +
                                   "Add images to 'known_faces' folder and restart the app.")
@@ -276,23 +250,8 @@ class FaceDetectionApp:
                     face_encodings = face_recognition.face_encodings(rgb_small_frame, 
                                                                      face_locations)
                     
-                    face_names = []
-                    for face_encoding in face_encodings:
-                        name = "Unknown"
-                        
-                        if self.known_face_encodings:
-                            # Compare with known faces
-                            matches = face_recognition.compare_faces(
-                                self.known_face_encodings, face_encoding, tolerance=0.6)
-                            face_distances = face_recognition.face_distance(
-                                self.known_face_encodings, face_encoding)
-                            
-                            if len(face_distances) > 0:
-                                best_match_index = np.argmin(face_distances)
-                                if matches[best_match_index]:
-                                    name = self.known_face_names[best_match_index]
-                        
-                        face_names.append(name)
+                    # Compare all faces with the known faces at once
+                    face_names, _ = self.known_faces.match(face_encodings, tolerance=0.6)
                 
                 # Draw rectangles and names
                 for (top, right, bottom, left), name in zip(face_locations, face_names):
@@ -0,0 +1,15 @@
+"""
+File helpers shared by the detection pipeline and the face store
+Kept free of cv2/ultralytics so lightweight modules can import them
+"""
+
+import hashlib
+
+
+def file_digest(path, length=12):
+    """Return a short SHA-256 hex digest of a file's content"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()[:length]
@@ -2,47 +2,296 @@
 YOLOv11 Inference Script for MOBILE Detection and OUT Counting
 """
 
-from ultralytics import YOLO
 import cv2
 import numpy as np
 from pathlib import Path
 import json
 from collections import defaultdict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+import copy
+import functools
+import hashlib
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
 import time
-from scipy.spatial import distance as dist
+
+from file_utils import file_digest
+
+# ultralytics (torch) and scipy are imported where they are first needed, so the CLI
+# --help and modules that only use the helpers here start quickly
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Pairwise IoU of two sets of boxes
+    
+    Args:
+        boxes_a: Array of shape (N, 4) in (x1, y1, x2, y2) format
+        boxes_b: Array of shape (M, 4) in (x1, y1, x2, y2) format
+        
+    Returns:
+        Array of shape (N, M)
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(axis=1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(axis=1)
+    union = area_a[:, None] + area_b[None, :] - inter
+    
+    return inter / np.maximum(union, 1e-9)
+
+
+def nms(boxes, scores, classes, iou_threshold):
+    """
+    Class-aware greedy non-maximum suppression
+    
+    Args:
+        boxes: Array of shape (N, 4) in (x1, y1, x2, y2) format
+        scores: Array of shape (N,)
+        classes: Array of shape (N,), boxes of different classes never suppress each other
+        iou_threshold: Boxes overlapping a kept box by more than this are dropped
+        
+    Returns:
+        Indices of the kept boxes, highest score first
+    """
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    if len(order) == 0:
+        return order
+    
+    ious = box_iou(boxes, boxes)
+    same_class = np.asarray(classes)[:, None] == np.asarray(classes)[None, :]
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= same_class[i] & (ious[i] > iou_threshold)
+    
+    return np.asarray(keep, dtype=np.int64)
+
+
+# Class IDs of the MOBILE/OUT model
+MOBILE_CLASS_ID = 0
+OUT_CLASS_ID = 1
+
+# BGR box colors used by MobileOutDetector.draw_detections
+CLASS_COLORS = {MOBILE_CLASS_ID: (0, 0, 255), OUT_CLASS_ID: (0, 255, 0)}
+
+
+class Detections:
+    """Detections of one frame as contiguous NumPy arrays"""
+    
+    __slots__ = ('xyxy', 'conf', 'cls')
+    
+    def __init__(self, xyxy, conf, cls):
+        """
+        Args:
+            xyxy: float32 array of shape (N, 4) with (x1, y1, x2, y2) boxes
+            conf: float32 array of shape (N,) with confidences
+            cls: int64 array of shape (N,) with class IDs
+        """
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+    
+    @classmethod
+    def empty(cls):
+        """Create an empty set of detections"""
+        return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64))
+    
+    def __len__(self):
+        return len(self.cls)
+    
+    def filter(self, mask):
+        """Return the detections where mask is True"""
+        return Detections(self.xyxy[mask], self.conf[mask], self.cls[mask])
+    
+    def select(self, class_id):
+        """Return the detections of a single class"""
+        return self.filter(self.cls == class_id)
+    
+    @property
+    def mobile(self):
+        """MOBILE detections"""
+        return self.select(MOBILE_CLASS_ID)
+    
+    @property
+    def out(self):
+        """OUT detections"""
+        return self.select(OUT_CLASS_ID)
+    
+    def counts(self, class_names):
+        """Return a dictionary of class name -> number of detections"""
+        per_class = np.bincount(self.cls, minlength=max(class_names) + 1)
+        return {name: int(per_class[class_id]) for class_id, name in class_names.items()}
+
+
+def extract_detections(results):
+    """
+    Convert one ultralytics result into Detections with a single device transfer
+    
+    Args:
+        results: ultralytics Results object (one frame), Detections are returned unchanged
+        
+    Returns:
+        Detections
+    """
+    if isinstance(results, Detections):
+        # Already extracted, e.g. replayed from a DetectionCache
+        return results
+    
+    data = results.boxes.data
+    if hasattr(data, 'cpu'):
+        data = data.cpu().numpy()
+    data = np.asarray(data, dtype=np.float32)
+    
+    if len(data) == 0:
+        return Detections.empty()
+    
+    # Columns are x1, y1, x2, y2, [track_id,] conf, cls
+    return Detections(
+        np.ascontiguousarray(data[:, :4]),
+        np.ascontiguousarray(data[:, -2]),
+        data[:, -1].astype(np.int64)
+    )
+
+
+TRACKER_ASSIGNMENTS = ('greedy', 'optimal')
+
+# Track IDs wrap back to 0 at this value in long-running mode (keeps them in int32 range)
+TRACK_ID_LIMIT = 2 ** 31
+
+
+def allocate_ids(next_id, count, id_limit=None, live=None):
+    """
+    Allocate `count` new track IDs starting at next_id
+    
+    Args:
+        next_id: First candidate ID
+        count: Number of IDs needed
+        id_limit: IDs wrap back to 0 at this value (default: None, no wrapping)
+        live: IDs still in use, skipped after a wrap so two live objects never share an ID
+        
+    Returns:
+        (ids, next_id) with the new IDs as an int64 array and the next candidate
+    """
+    if id_limit is None:
+        return np.arange(next_id, next_id + count, dtype=np.int64), next_id + count
+    
+    live = np.asarray(live if live is not None else [], dtype=np.int64)
+    if count + len(live) > id_limit:
+        raise ValueError(f"Cannot track more than {id_limit} objects with id_limit={id_limit}")
+    
+    ids = np.zeros(0, dtype=np.int64)
+    while len(ids) < count:
+        needed = count - len(ids)
+        candidates = (next_id + np.arange(needed, dtype=np.int64)) % id_limit
+        ids = np.concatenate([ids, candidates[~np.isin(candidates, live)]])
+        next_id = int(next_id + needed) % id_limit
+    
+    return ids, next_id
+
+
+def match_centroids(D, assignment='greedy', max_distance=None):
+    """
+    Match tracked objects (rows) to detections (columns) of a distance matrix
+    
+    Args:
+        D: (objects, detections) centroid distance matrix
+        assignment: 'greedy' (nearest first) or 'optimal' (minimum total distance)
+        max_distance: Pairs farther apart than this are never matched (default: no gate)
+        
+    Returns:
+        (rows, cols) index arrays of the matched pairs
+    """
+    if assignment == 'optimal':
+        from scipy.optimize import linear_sum_assignment
+        cost = D
+        if max_distance is not None:
+            # Any gated pair costs more than all allowed pairs together, so the solver
+            # first maximizes the number of allowed matches; the gate then drops the rest
+            cost = np.where(D > max_distance, max_distance * min(D.shape) + 1.0, D)
+        rows, cols = linear_sum_assignment(cost)
+    else:
+        # Nearest first: each detection goes to the closest object that wants it first
+        rows = D.min(axis=1).argsort()
+        cols = D.argmin(axis=1)[rows]
+        first = np.sort(np.unique(cols, return_index=True)[1])
+        rows, cols = rows[first], cols[first]
+    
+    if max_distance is not None:
+        allowed = D[rows, cols] <= max_distance
+        rows, cols = rows[allowed], cols[allowed]
+    
+    return rows, cols
+
+
+def box_centroids(detections):
+    """Integer centroids of [(x1, y1, x2, y2), ...] boxes as an (N, 2) array"""
+    boxes = np.asarray(detections, dtype=np.float64).reshape(-1, 4)
+    return ((boxes[:, :2] + boxes[:, 2:]) / 2.0).astype("int")
 
 
 class CentroidTracker:
     """Simple centroid-based object tracker for counting line crossings"""
     
-    def __init__(self, max_disappeared=50):
+    ASSIGNMENTS = TRACKER_ASSIGNMENTS
+    
+    def __init__(self, max_disappeared=50, max_distance=None, assignment='greedy', id_limit=None):
         """
         Initialize the centroid tracker
         
         Args:
             max_disappeared: Maximum frames an object can be missing before being deregistered
+            max_distance: Maximum centroid distance in pixels for a match (default: no gate).
+                          Farther detections start a new object instead of taking over an ID.
+            assignment: 'greedy' (nearest first) or 'optimal' (minimum total distance,
+                        scipy.optimize.linear_sum_assignment), which avoids ID swaps when paths cross
+            id_limit: Wrap object IDs back to 0 at this value, skipping IDs still in use
+                      (default: None, IDs grow forever; see TRACK_ID_LIMIT for 24/7 runs)
         """
+        if assignment not in self.ASSIGNMENTS:
+            raise ValueError(f"Unknown assignment: {assignment}. Choose from: {', '.join(self.ASSIGNMENTS)}")
+        
         self.next_object_id = 0
         self.objects = {}  # ID -> centroid
         self.disappeared = {}  # ID -> frame count
         self.max_disappeared = max_disappeared
-        
-        # Track crossing state for each object
-        self.crossed = {}  # ID -> {'crossed': bool, 'direction': 'in'/'out', 'start_side': 'top'/'bottom'}
+        self.max_distance = max_distance
+        self.assignment = assignment
+        self.id_limit = id_limit
     
     def register(self, centroid):
         """Register a new object with a unique ID"""
-        self.objects[self.next_object_id] = centroid
-        self.disappeared[self.next_object_id] = 0
-        self.crossed[self.next_object_id] = {'crossed': False, 'direction': None, 'start_side': None}
-        self.next_object_id += 1
+        if self.id_limit is not None:
+            ids, self.next_object_id = allocate_ids(self.next_object_id, 1, self.id_limit, list(self.objects))
+            object_id = int(ids[0])
+        else:
+            object_id = self.next_object_id
+            self.next_object_id += 1
+        
+        self.objects[object_id] = centroid
+        self.disappeared[object_id] = 0
     
     def deregister(self, object_id):
         """Remove an object from tracking"""
         del self.objects[object_id]
         del self.disappeared[object_id]
-        if object_id in self.crossed:
-            del self.crossed[object_id]
+    
+    def match(self, D):
+        """Match tracked objects (rows) to detections (columns), see match_centroids"""
+        return match_centroids(D, self.assignment, self.max_distance)
     
     def update(self, detections):
         """
@@ -63,11 +312,7 @@ class CentroidTracker:
             return self.objects
         
         # Calculate centroids from bounding boxes
-        input_centroids = np.zeros((len(detections), 2), dtype="int")
-        for (i, (x1, y1, x2, y2)) in enumerate(detections):
-            cx = int((x1 + x2) / 2.0)
-            cy = int((y1 + y2) / 2.0)
-            input_centroids[i] = (cx, cy)
+        input_centroids = box_centroids(detections)
         
         # If no objects tracked yet, register all
         if len(self.objects) == 0:
@@ -76,138 +321,2446 @@ class CentroidTracker:
         else:
             # Match existing objects to new detections
             object_ids = list(self.objects.keys())
-            object_centroids = list(self.objects.values())
+            object_centroids = np.array(list(self.objects.values()))
             
             # Calculate distance between existing and new centroids
-            D = dist.cdist(np.array(object_centroids), input_centroids)
-            
-            # Find minimum distance matches
-            rows = D.min(axis=1).argsort()
-            cols = D.argmin(axis=1)[rows]
+            from scipy.spatial import distance as dist
+            D = dist.cdist(object_centroids, input_centroids)
+            rows, cols = self.match(D)
             
-            used_rows = set()
-            used_cols = set()
-            
-            for (row, col) in zip(rows, cols):
-                if row in used_rows or col in used_cols:
-                    continue
-                
-                # Update object position
+            # Update matched object positions
+            for row, col in zip(rows.tolist(), cols.tolist()):
                 object_id = object_ids[row]
                 self.objects[object_id] = input_centroids[col]
                 self.disappeared[object_id] = 0
-                
-                used_rows.add(row)
-                used_cols.add(col)
             
             # Handle disappeared objects
-            unused_rows = set(range(0, D.shape[0])).difference(used_rows)
-            for row in unused_rows:
+            unused_rows = np.ones(D.shape[0], dtype=bool)
+            unused_rows[rows] = False
+            for row in np.flatnonzero(unused_rows).tolist():
                 object_id = object_ids[row]
                 self.disappeared[object_id] += 1
                 if self.disappeared[object_id] > self.max_disappeared:
                     self.deregister(object_id)
             
             # Register new objects
-            unused_cols = set(range(0, D.shape[1])).difference(used_cols)
-            for col in unused_cols:
-                self.register(input_centroids[col])
+            unused_cols = np.ones(D.shape[1], dtype=bool)
+            unused_cols[cols] = False
+            for centroid in input_centroids[unused_cols]:
+                self.register(centroid)
         
         return self.objects
 
 
-class MobileOutDetector:
-    """Detector for MOBILE and OUT objects with counting capabilities"""
+class ArrayTracker:
+    """
+    Centroid tracker keeping its state in preallocated NumPy arrays instead of per-object dicts
+    
+    Matching is the same as CentroidTracker (same IDs for the same detections), but ageing,
+    registering and deregistering objects and the crossing checks of ZoneCounter
+    are vectorized, so crowded scenes with hundreds of tracked people stay real-time.
+    Slots 0..size-1 hold the live objects in registration order; the arrays grow
+    geometrically when more objects are tracked.
+    """
+    
+    ASSIGNMENTS = TRACKER_ASSIGNMENTS
+    _ARRAYS = ('ids', 'centroids', 'missed')
+    
+    def __init__(self, max_disappeared=50, max_distance=None, assignment='greedy', capacity=64, id_limit=None):
+        """
+        Initialize the tracker
+        
+        Args:
+            max_disappeared: Maximum frames an object can be missing before being deregistered
+            max_distance: Maximum centroid distance in pixels for a match (default: no gate)
+            assignment: 'greedy' or 'optimal', see CentroidTracker
+            capacity: Initial number of object slots (default: 64)
+            id_limit: Wrap object IDs at this value, see CentroidTracker (default: None)
+        """
+        if assignment not in self.ASSIGNMENTS:
+            raise ValueError(f"Unknown assignment: {assignment}. Choose from: {', '.join(self.ASSIGNMENTS)}")
+        
+        self.max_disappeared = max_disappeared
+        self.max_distance = max_distance
+        self.assignment = assignment
+        self.id_limit = id_limit
+        self.next_object_id = 0
+        self.size = 0
+        
+        capacity = max(1, int(capacity))
+        self.ids = np.zeros(capacity, dtype=np.int64)  # Slot -> object ID
+        self.centroids = np.zeros((capacity, 2), dtype=np.int64)
+        self.missed = np.zeros(capacity, dtype=np.int32)  # Consecutive frames without a match
+    
+    @property
+    def capacity(self):
+        """Number of allocated object slots"""
+        return len(self.ids)
+    
+    @property
+    def objects(self):
+        """Dictionary of object_id -> (cx, cy) of the live objects (built on demand, e.g. for drawing)"""
+        return dict(zip(self.ids[:self.size].tolist(), self.centroids[:self.size].tolist()))
+    
+    def __len__(self):
+        return self.size
+    
+    def _reserve(self, size):
+        """Grow the arrays (doubling) so they hold at least size objects"""
+        if size <= self.capacity:
+            return
+        
+        capacity = self.capacity
+        while capacity < size:
+            capacity *= 2
+        
+        for name in self._ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+    
+    def _compact(self, keep):
+        """Drop the live slots where keep is False, preserving the order of the others"""
+        count = int(np.count_nonzero(keep))
+        if count == self.size:
+            return
+        
+        for name in self._ARRAYS:
+            array = getattr(self, name)
+            array[:count] = array[:self.size][keep]
+        self.size = count
+    
+    def register(self, centroids):
+        """Register new objects with unique IDs"""
+        centroids = np.asarray(centroids).reshape(-1, 2)
+        start, end = self.size, self.size + len(centroids)
+        self._reserve(end)
+        
+        self.ids[start:end], self.next_object_id = allocate_ids(self.next_object_id, len(centroids), self.id_limit,
+                                                                self.ids[:start])
+        self.centroids[start:end] = centroids
+        self.missed[start:end] = 0
+        self.size = end
+    
+    def update(self, detections):
+        """
+        Update tracker with new detections
+        
+        Args:
+            detections: Bounding boxes [(x1, y1, x2, y2), ...] or an (N, 4) array
+            
+        Returns:
+            (ids, centroids) arrays of the live objects (views, valid until the next update)
+        """
+        n = self.size
+        
+        if len(detections) == 0:
+            self.missed[:n] += 1
+            self._compact(self.missed[:n] <= self.max_disappeared)
+            return self.ids[:self.size], self.centroids[:self.size]
+        
+        input_centroids = box_centroids(detections)
+        
+        if n == 0:
+            self.register(input_centroids)
+        else:
+            from scipy.spatial import distance as dist
+            D = dist.cdist(self.centroids[:n], input_centroids)
+            rows, cols = match_centroids(D, self.assignment, self.max_distance)
+            
+            # Matched objects move, the others age and expire
+            matched = np.zeros(n, dtype=bool)
+            matched[rows] = True
+            self.centroids[rows] = input_centroids[cols]
+            self.missed[:n] = np.where(matched, 0, self.missed[:n] + 1)
+            self._compact(self.missed[:n] <= self.max_disappeared)
+            
+            # Unmatched detections become new objects
+            unused_cols = np.ones(len(input_centroids), dtype=bool)
+            unused_cols[cols] = False
+            self.register(input_centroids[unused_cols])
+        
+        return self.ids[:self.size], self.centroids[:self.size]
+
+
+class MotionTracker(ArrayTracker):
+    """
+    ByteTrack-style tracker with a constant-velocity Kalman filter per object
+    
+    Every update first predicts where each object moved. Confident detections are then
+    matched to all objects by IoU plus centroid distance, and low-confidence detections
+    (e.g. partly occluded people) to the objects still unmatched, by IoU only. Unmatched
+    confident detections start new objects.
+    
+    An object that misses its detection coasts on its predicted position for up to
+    max_coast updates. The line-crossing check uses these positions, so a person who
+    crosses while undetected, or between two processed frames of a large frame stride,
+    is still counted. State lives in the same arrays as ArrayTracker (plus the filter
+    mean and covariance), so ZoneCounter checks crossings vectorized.
+    """
+    
+    _ARRAYS = ArrayTracker._ARRAYS + ('mean', 'covariance')
+    
+    # Noise of the filter relative to the box size (as in DeepSORT/ByteTrack)
+    POSITION_STD = 1 / 20
+    VELOCITY_STD = 1 / 160
+    
+    def __init__(self, max_disappeared=30, max_distance=None, assignment='optimal', capacity=64,
+                 high_conf=None, min_iou=0.1, low_iou=0.3, distance_weight=0.5, max_coast=5, id_limit=None):
+        """
+        Initialize the tracker
+        
+        Args:
+            max_disappeared: Maximum updates an object can be missing before being deregistered
+            max_distance: Also match boxes that do not overlap when their centroids are at most
+                          this many pixels apart (default: None, overlapping boxes only, which
+                          avoids ID swaps in crowds)
+            assignment: 'optimal' (default) or 'greedy', see CentroidTracker
+            capacity: Initial number of object slots (default: 64)
+            high_conf: Detections below this confidence only extend existing objects in the
+                       second stage (default: None, every detection is confident)
+            min_iou: Boxes overlapping at least this much can always be matched (default: 0.1)
+            low_iou: Minimum IoU of a second-stage (low-confidence) match (default: 0.3)
+            distance_weight: Weight of the centroid distance (in box diagonals) next to 1 - IoU
+            max_coast: Updates a missed object keeps moving on its predicted position (default: 5,
+                       0 keeps missed objects at their last position like CentroidTracker)
+            id_limit: Wrap object IDs at this value, see CentroidTracker (default: None)
+        """
+        super().__init__(max_disappeared=max_disappeared, max_distance=max_distance, assignment=assignment,
+                         capacity=capacity, id_limit=id_limit)
+        self.high_conf = high_conf
+        self.min_iou = min_iou
+        self.low_iou = low_iou
+        self.distance_weight = distance_weight
+        self.max_coast = max_coast
+        
+        # Filter state per slot: (cx, cy, w, h) and their velocities per update
+        self.mean = np.zeros((self.capacity, 8), dtype=np.float64)
+        self.covariance = np.zeros((self.capacity, 8, 8), dtype=np.float64)
+        
+        self._transition = np.eye(8)
+        self._transition[:4, 4:] = np.eye(4)
+    
+    @property
+    def boxes(self):
+        """(x1, y1, x2, y2) boxes of the live objects from the filter state"""
+        mean = self.mean[:self.size]
+        return np.hstack([mean[:, :2] - mean[:, 2:4] / 2, mean[:, :2] + mean[:, 2:4] / 2])
+    
+    def _noise(self, sizes, position_scale, velocity_scale):
+        """Diagonal covariance matrices with standard deviations relative to the box (w, h)"""
+        wh = np.maximum(sizes, 1.0)
+        std = np.hstack([wh * position_scale, wh * position_scale, wh * velocity_scale, wh * velocity_scale])
+        return std[:, :, None] ** 2 * np.eye(8)[None]
+    
+    def register(self, boxes):
+        """Register new objects for (x1, y1, x2, y2) boxes and start their filters"""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        start = self.size
+        super().register(box_centroids(boxes))
+        
+        wh = boxes[:, 2:] - boxes[:, :2]
+        self.mean[start:self.size] = np.hstack([(boxes[:, :2] + boxes[:, 2:]) / 2, wh, np.zeros((len(boxes), 4))])
+        self.covariance[start:self.size] = self._noise(wh, 2 * self.POSITION_STD, 10 * self.VELOCITY_STD)
+    
+    def _predict(self):
+        """Advance every filter by one update"""
+        n = self.size
+        mean = self.mean[:n]
+        mean[:] = mean @ self._transition.T
+        mean[:, 2:4] = np.maximum(mean[:, 2:4], 1.0)
+        self.covariance[:n] = (self._transition @ self.covariance[:n] @ self._transition.T
+                               + self._noise(mean[:, 2:4], self.POSITION_STD, self.VELOCITY_STD))
+    
+    def _correct(self, slots, boxes):
+        """Kalman update of the given slots with measured (x1, y1, x2, y2) boxes"""
+        mean = self.mean[slots]
+        covariance = self.covariance[slots]
+        measurement = np.hstack([(boxes[:, :2] + boxes[:, 2:]) / 2, boxes[:, 2:] - boxes[:, :2]])
+        
+        # The measurement is the first half of the state: H P H^T and P H^T are blocks of P
+        measurement_noise = self._noise(mean[:, 2:4], self.POSITION_STD, self.POSITION_STD)[:, :4, :4]
+        innovation_cov = covariance[:, :4, :4] + measurement_noise
+        cross_cov = covariance[:, :, :4]
+        gain = np.linalg.solve(innovation_cov, cross_cov.transpose(0, 2, 1)).transpose(0, 2, 1)
+        
+        self.mean[slots] = mean + (gain @ (measurement - mean[:, :4])[:, :, None])[:, :, 0]
+        self.covariance[slots] = covariance - gain @ cross_cov.transpose(0, 2, 1)
+    
+    def _associate(self, track_boxes, det_boxes, low_confidence=False, lost=None):
+        """
+        Match predicted boxes to detected boxes, returns (rows, cols) index arrays
+        
+        With max_distance set, lost objects (missed for longer than max_coast) still only match
+        overlapping boxes, so a person entering where another one left is not taken for the
+        old, already counted one.
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        if len(track_boxes) == 0 or len(det_boxes) == 0:
+            return empty, empty
+        
+        iou = box_iou(track_boxes, det_boxes).astype(np.float64)
+        if low_confidence:
+            cost = 1.0 - iou
+            allowed = iou >= self.low_iou
+        else:
+            from scipy.spatial import distance as dist
+            distance = dist.cdist((track_boxes[:, :2] + track_boxes[:, 2:]) / 2, (det_boxes[:, :2] + det_boxes[:, 2:]) / 2)
+            diagonal = np.linalg.norm(track_boxes[:, 2:] - track_boxes[:, :2], axis=1)[:, None]
+            cost = 1.0 - iou + self.distance_weight * distance / np.maximum(diagonal, 1.0)
+            allowed = iou >= self.min_iou
+            if self.max_distance is not None:
+                near = distance <= self.max_distance
+                if lost is not None:
+                    near &= ~lost[:, None]
+                allowed |= near
+        
+        if not allowed.any():
+            return empty, empty
+        
+        # Disallowed pairs cost more than the gate, match_centroids drops them
+        limit = float(cost[allowed].max())
+        return match_centroids(np.where(allowed, cost, limit + 1.0), self.assignment, max_distance=limit)
+    
+    def update(self, detections, scores=None):
+        """
+        Predict, associate and update with new detections
+        
+        Args:
+            detections: Bounding boxes [(x1, y1, x2, y2), ...] or an (N, 4) array
+            scores: Optional confidences of the detections, used for the two association stages
+            
+        Returns:
+            (ids, centroids) arrays of the live objects (views, valid until the next update)
+        """
+        boxes = np.asarray(detections, dtype=np.float64).reshape(-1, 4)
+        confident = np.ones(len(boxes), dtype=bool)
+        if scores is not None and self.high_conf is not None:
+            confident = np.asarray(scores) >= self.high_conf
+        
+        n = self.size
+        if n:
+            self._predict()
+        
+        # Stage 1: confident detections against every object
+        high = np.flatnonzero(confident)
+        track_boxes = self.boxes
+        rows, cols = self._associate(track_boxes, boxes[high], lost=self.missed[:n] > self.max_coast)
+        matched_slots = [rows]
+        matched_dets = [high[cols]]
+        
+        # Stage 2: low-confidence detections against the objects left over
+        low = np.flatnonzero(~confident)
+        if len(low) and n:
+            unmatched = np.ones(n, dtype=bool)
+            unmatched[rows] = False
+            remaining = np.flatnonzero(unmatched)
+            rows_low, cols_low = self._associate(track_boxes[remaining], boxes[low], low_confidence=True)
+            matched_slots.append(remaining[rows_low])
+            matched_dets.append(low[cols_low])
+        
+        slots = np.concatenate(matched_slots)
+        det_indices = np.concatenate(matched_dets)
+        if len(slots):
+            self._correct(slots, boxes[det_indices])
+        
+        if n:
+            matched = np.zeros(n, dtype=bool)
+            matched[slots] = True
+            missed = np.where(matched, 0, self.missed[:n] + 1)
+            self.missed[:n] = missed
+            
+            # Matched and coasting objects take the filter position. Objects missed for longer
+            # keep their last counted position; their filters still move on for matching
+            moving = missed <= self.max_coast
+            self.centroids[:n][moving] = self.mean[:n][moving, :2].astype(np.int64)
+            self._compact(missed <= self.max_disappeared)
+        
+        new = np.ones(len(boxes), dtype=bool)
+        new[det_indices] = False
+        self.register(boxes[new & confident])
+        
+        return self.ids[:self.size], self.centroids[:self.size]
+
+
+TRACKERS = {
+    'centroid': CentroidTracker,
+    'array': ArrayTracker,
+    'motion': MotionTracker
+}
+
+
+def make_tracker(tracker_type='centroid', max_disappeared=30, max_distance=None, assignment=None, **options):
+    """
+    Create a tracker by name (see TRACKERS)
+    
+    Args:
+        tracker_type: 'centroid', 'array' or 'motion'
+        max_disappeared: Maximum updates an object can be missing before being deregistered
+        max_distance: Distance gate in pixels (default: None)
+        assignment: 'greedy' or 'optimal' (default: None, the tracker's own default)
+        **options: Further tracker specific arguments (e.g. high_conf for MotionTracker)
+    """
+    if tracker_type not in TRACKERS:
+        raise ValueError(f"Unknown tracker: {tracker_type}. Choose from: {', '.join(TRACKERS)}")
+    if assignment is not None:
+        options['assignment'] = assignment
+    return TRACKERS[tracker_type](max_disappeared=max_disappeared, max_distance=max_distance, **options)
+
+
+class LineCrossingCounter:
+    """
+    Count IN/OUT crossings of tracked objects over one ROI line
+    
+    Thin wrapper over a single-line ZoneCounter, which does the counting; this class adds
+    the geometry helpers of a single line (description, crop band, side of a point).
+    """
+    
+    def __init__(self, roi_line):
+        """
+        Initialize the counter
+        
+        Args:
+            roi_line: ROI line as dict {'y': y_position} for a horizontal line, {'x': x_position}
+                     for a vertical line or {'line_points': [(x1, y1), (x2, y2)]} for a custom line
+        """
+        self.roi_line = roi_line
+        if 'line_points' in roi_line:
+            # Custom line with two points
+            self.is_custom_line = True
+            self.is_horizontal = False
+            self.line_pos = None
+            self.line_p1, self.line_p2 = roi_line['line_points']
+        else:
+            # Simple horizontal or vertical line
+            self.is_custom_line = False
+            self.is_horizontal = 'y' in roi_line
+            self.line_pos = roi_line.get('y') if self.is_horizontal else roi_line.get('x')
+            self.line_p1, self.line_p2 = None, None
+        
+        self.zone_counter = ZoneCounter([roi_line])
+    
+    @property
+    def in_count(self):
+        """IN crossings counted so far"""
+        return self.zone_counter.in_count
+    
+    @property
+    def out_count(self):
+        """OUT crossings counted so far"""
+        return self.zone_counter.out_count
+    
+    def describe(self):
+        """Return a human readable description of the line"""
+        if self.is_custom_line:
+            return f"Custom line from {self.line_p1} to {self.line_p2}"
+        return f"{'Horizontal' if self.is_horizontal else 'Vertical'} at {self.line_pos}"
+    
+    def band(self, frame_size, padding):
+        """
+        Rectangle covering the line plus `padding` pixels on every side
+        
+        Args:
+            frame_size: (width, height) of the frames the line is defined on
+            padding: Margin around the line in pixels
+            
+        Returns:
+            (x1, y1, x2, y2) clipped to the frame
+        """
+        width, height = frame_size
+        if self.is_custom_line:
+            xs = (self.line_p1[0], self.line_p2[0])
+            ys = (self.line_p1[1], self.line_p2[1])
+            x1, y1, x2, y2 = min(xs) - padding, min(ys) - padding, max(xs) + padding, max(ys) + padding
+        elif self.is_horizontal:
+            x1, y1, x2, y2 = 0, self.line_pos - padding, width, self.line_pos + padding
+        else:
+            x1, y1, x2, y2 = self.line_pos - padding, 0, self.line_pos + padding, height
+        
+        return (int(max(0, x1)), int(max(0, y1)), int(min(width, x2)), int(min(height, y2)))
+    
+    def side(self, cx, cy):
+        """Determine which side of the line a point is on"""
+        if self.is_custom_line:
+            # For custom line, use cross product to determine side
+            # Vector from p1 to p2
+            v1 = (self.line_p2[0] - self.line_p1[0], self.line_p2[1] - self.line_p1[1])
+            # Vector from p1 to centroid
+            v2 = (cx - self.line_p1[0], cy - self.line_p1[1])
+            # Cross product
+            cross = v1[0] * v2[1] - v1[1] * v2[0]
+            return 'left' if cross > 0 else 'right'
+        elif self.is_horizontal:
+            return 'top' if cy < self.line_pos else 'bottom'
+        else:
+            return 'left' if cx < self.line_pos else 'right'
+    
+    def update(self, tracker, objects=None):
+        """
+        Check line crossings for each tracked object
+        
+        Args:
+            tracker: Any tracker from TRACKERS
+            objects: Dictionary of object_id -> centroid returned by CentroidTracker.update
+                     (default: tracker.objects, ignored for an ArrayTracker)
+                     
+        Returns:
+            (ids, zones, directions) arrays of the crossings counted in this update (see ZoneCounter.update)
+        """
+        return self.zone_counter.update(tracker, objects)
+
+
+class ZoneCounter:
+    """
+    Count IN/OUT crossings of tracked objects for any number of lines and polygon zones at once
+    
+    Zones are given as dicts, each optionally with a 'name':
+        {'y': y} / {'x': x} / {'line_points': [(x1, y1), (x2, y2)]}:
+            Line, top -> bottom and left -> right are OUT (see LineCrossingCounter.side)
+        {'polygon': [(x, y), ...]}:
+            Area, entering it is IN and leaving it is OUT
+        {'in_box': [(x, y), ...], 'out_box': [(x, y), ...]}:
+            Pair of areas (from templates/roi_editor.html), seen in in_box then in out_box is
+            OUT, the other way round is IN
+    
+    Every update evaluates the side/inside tests of all tracked centroids against all zones
+    in one NumPy pass, so extra doors cost no extra per-object Python work. Each track is
+    counted at most once per zone. Per-track state is keyed by track ID and dropped with the
+    track, so it works with every tracker in TRACKERS.
+    """
+    
+    # Region values: 1 = top/left side, inside the polygon or in_box; -1 = the other side,
+    # outside the polygon or in out_box; 0 = not in any box of a box pair
+    DIRECTIONS = {1: 'out', -1: 'in'}
+    
+    def __init__(self, zones):
+        """
+        Initialize the counter
+        
+        Args:
+            zones: List of zone dicts (see class docstring), a single dict is accepted too
+        """
+        if isinstance(zones, dict):
+            zones = [zones]
+        if not zones:
+            raise ValueError("ZoneCounter needs at least one zone")
+        
+        self.zones = []
+        self.names = []
+        lines, polygons = [], []
+        line_zones, polygon_zones, pair_zones = [], [], []
+        
+        for index, zone in enumerate(zones):
+            zone = dict(zone)
+            if 'polygon' in zone:
+                kind = 'polygon'
+                polygon_zones.append((index, len(polygons)))
+                polygons.append(np.asarray(zone['polygon'], dtype=np.float64).reshape(-1, 2))
+            elif 'in_box' in zone and 'out_box' in zone:
+                kind = 'boxes'
+                pair_zones.append((index, len(polygons), len(polygons) + 1))
+                polygons.append(np.asarray(zone['in_box'], dtype=np.float64).reshape(-1, 2))
+                polygons.append(np.asarray(zone['out_box'], dtype=np.float64).reshape(-1, 2))
+            elif 'line_points' in zone or 'y' in zone or 'x' in zone:
+                kind = 'line'
+                line_zones.append(index)
+                lines.append(self._line_points(zone))
+            else:
+                raise ValueError(f"Unknown zone: {zone}")
+            
+            self.names.append(str(zone.get('name') or f"{kind} {index + 1}"))
+            zone['name'] = self.names[-1]
+            self.zones.append(zone)
+        
+        # Lines as (p1, p2) pairs where the top/left side has a positive cross product
+        self._lines = np.array(lines, dtype=np.float64).reshape(-1, 2, 2)
+        self._line_zones = np.array(line_zones, dtype=np.int64)
+        
+        # Polygons padded to the same number of vertices by repeating the last vertex
+        # (the repeated edges are degenerate and never cross a ray)
+        vertices = max((len(polygon) for polygon in polygons), default=1)
+        self._polygons = np.array([np.vstack([polygon, np.repeat(polygon[-1:], vertices - len(polygon), axis=0)])
+                                   for polygon in polygons], dtype=np.float64).reshape(-1, vertices, 2)
+        self._polygon_zones = np.array(polygon_zones, dtype=np.int64).reshape(-1, 2)
+        self._pair_zones = np.array(pair_zones, dtype=np.int64).reshape(-1, 3)
+        
+        self.in_counts = np.zeros(len(self.zones), dtype=np.int64)
+        self.out_counts = np.zeros(len(self.zones), dtype=np.int64)
+        
+        # Per-track state, rows sorted by track ID
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._start = np.zeros((0, len(self.zones)), dtype=np.int8)
+        self._counted = np.zeros((0, len(self.zones)), dtype=bool)
+    
+    @staticmethod
+    def is_area(zone):
+        """True for polygon and box pair zones, False for lines"""
+        return 'polygon' in zone or 'in_box' in zone
+    
+    @staticmethod
+    def _line_points(zone):
+        """(p1, p2) of a line zone, oriented so the top/left side has a positive cross product"""
+        if 'line_points' in zone:
+            return np.asarray(zone['line_points'], dtype=np.float64).reshape(2, 2)
+        if 'y' in zone:
+            return np.array([[1, zone['y']], [0, zone['y']]], dtype=np.float64)
+        return np.array([[zone['x'], 0], [zone['x'], 1]], dtype=np.float64)
+    
+    @property
+    def in_count(self):
+        """IN crossings over all zones"""
+        return int(self.in_counts.sum())
+    
+    @property
+    def out_count(self):
+        """OUT crossings over all zones"""
+        return int(self.out_counts.sum())
+    
+    @property
+    def tracked(self):
+        """Number of tracks with counting state"""
+        return len(self._ids)
+    
+    def counts(self):
+        """List of {'name', 'zone', 'in_count', 'out_count'} per zone"""
+        return [
+            {'name': name, 'zone': zone, 'in_count': int(in_count), 'out_count': int(out_count)}
+            for name, zone, in_count, out_count in zip(self.names, self.zones, self.in_counts, self.out_counts)
+        ]
+    
+    def describe(self):
+        """Return a human readable description of the zones"""
+        descriptions = []
+        for zone in self.zones:
+            if 'polygon' in zone:
+                text = f"polygon with {len(zone['polygon'])} points"
+            elif 'in_box' in zone:
+                text = "IN box -> OUT box"
+            else:
+                text = LineCrossingCounter(zone).describe()
+            descriptions.append(f"{zone['name']}: {text}")
+        return "; ".join(descriptions)
+    
+    def band(self, frame_size, padding):
+        """
+        Rectangle covering all zones plus `padding` pixels on every side
+        
+        Args:
+            frame_size: (width, height) of the frames the zones are defined on
+            padding: Margin around the zones in pixels
+            
+        Returns:
+            (x1, y1, x2, y2) clipped to the frame
+        """
+        width, height = frame_size
+        rects = []
+        for zone in self.zones:
+            if self.is_area(zone):
+                points = np.vstack([np.asarray(zone[key], dtype=np.float64).reshape(-1, 2)
+                                    for key in ('polygon', 'in_box', 'out_box') if key in zone])
+                x1, y1 = points.min(axis=0) - padding
+                x2, y2 = points.max(axis=0) + padding
+                rects.append((int(max(0, x1)), int(max(0, y1)), int(min(width, x2)), int(min(height, y2))))
+            else:
+                rects.append(LineCrossingCounter(zone).band(frame_size, padding))
+        
+        rects = np.array(rects)
+        return (int(rects[:, 0].min()), int(rects[:, 1].min()), int(rects[:, 2].max()), int(rects[:, 3].max()))
+    
+    def regions(self, centroids):
+        """
+        Side/inside test of every centroid against every zone
+        
+        Args:
+            centroids: (N, 2) array of (cx, cy)
+            
+        Returns:
+            (N, zones) int8 array of region values (1, -1 or 0, see DIRECTIONS)
+        """
+        points = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+        regions = np.zeros((len(points), len(self.zones)), dtype=np.int8)
+        
+        if len(self._lines):
+            p1, p2 = self._lines[:, 0], self._lines[:, 1]
+            cross = ((p2[:, 0] - p1[:, 0]) * (points[:, 1:2] - p1[:, 1])
+                     - (p2[:, 1] - p1[:, 1]) * (points[:, 0:1] - p1[:, 0]))
+            regions[:, self._line_zones] = np.where(cross > 0, 1, -1)
+        
+        if len(self._polygons):
+            # Even-odd rule: count the polygon edges a ray to the right of the point crosses
+            xi, yi = self._polygons[None, :, :, 0], self._polygons[None, :, :, 1]
+            xj, yj = np.roll(xi, 1, axis=2), np.roll(yi, 1, axis=2)
+            x, y = points[:, 0, None, None], points[:, 1, None, None]
+            spans = (yi > y) != (yj > y)
+            dy = np.where(yj == yi, 1.0, yj - yi)
+            crossings = spans & (x < (xj - xi) * (y - yi) / dy + xi)
+            inside = np.count_nonzero(crossings, axis=2) % 2 == 1
+            
+            if len(self._polygon_zones):
+                zone_index, polygon_index = self._polygon_zones.T
+                regions[:, zone_index] = np.where(inside[:, polygon_index], 1, -1)
+            if len(self._pair_zones):
+                zone_index, in_index, out_index = self._pair_zones.T
+                regions[:, zone_index] = np.where(inside[:, in_index], 1, np.where(inside[:, out_index], -1, 0))
+        
+        return regions
+    
+    def update(self, tracker, objects=None):
+        """
+        Check crossings of every tracked object against every zone
+        
+        Args:
+            tracker: Any tracker from TRACKERS
+            objects: Dictionary of object_id -> centroid returned by CentroidTracker.update
+                     (default: tracker.objects, ignored for an ArrayTracker)
+                     
+        Returns:
+            (ids, zones, directions) arrays of the crossings counted in this update,
+            direction 1 = OUT, -1 = IN
+        """
+        if isinstance(tracker, ArrayTracker):
+            return self.update_arrays(tracker.ids[:tracker.size], tracker.centroids[:tracker.size])
+        
+        if objects is None:
+            objects = tracker.objects
+        centroids = np.array(list(objects.values()), dtype=np.int64).reshape(-1, 2)
+        return self.update_arrays(np.fromiter(objects.keys(), dtype=np.int64, count=len(objects)), centroids)
+    
+    def update_arrays(self, ids, centroids):
+        """
+        Vectorized update for the live tracks given as arrays
+        
+        Args:
+            ids: (N,) track IDs
+            centroids: (N, 2) track centroids
+            
+        Returns:
+            (ids, zones, directions) arrays of the crossings counted in this update
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        self._sync_tracks(ids)
+        
+        if len(ids) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty.astype(np.int8)
+        
+        rows = np.searchsorted(self._ids, ids)
+        current = self.regions(centroids)
+        start = self._start[rows]
+        unset = start == 0
+        start[unset] = current[unset]
+        self._start[rows] = start
+        
+        crossed = (start != current) & (current != 0) & (start != 0) & ~self._counted[rows]
+        if not crossed.any():
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty.astype(np.int8)
+        
+        self._counted[rows] |= crossed
+        out = crossed & (start == 1)
+        self.out_counts += np.count_nonzero(out, axis=0)
+        self.in_counts += np.count_nonzero(crossed & ~out, axis=0)
+        
+        track_index, zone_index = np.nonzero(crossed)
+        return ids[track_index], zone_index, start[track_index, zone_index]
+    
+    def _sync_tracks(self, ids):
+        """Drop the state of tracks that are gone and add empty state for new tracks"""
+        if len(self._ids):
+            alive = np.isin(self._ids, ids)
+            if not alive.all():
+                self._ids, self._start, self._counted = self._ids[alive], self._start[alive], self._counted[alive]
+        
+        new = ids[~np.isin(ids, self._ids)] if len(self._ids) else ids
+        if len(new):
+            self._ids = np.concatenate([self._ids, new])
+            self._start = np.vstack([self._start, np.zeros((len(new), len(self.zones)), dtype=np.int8)])
+            self._counted = np.vstack([self._counted, np.zeros((len(new), len(self.zones)), dtype=bool)])
+            if len(self._ids) > 1 and np.any(self._ids[1:] < self._ids[:-1]):
+                order = np.argsort(self._ids, kind='stable')
+                self._ids, self._start, self._counted = self._ids[order], self._start[order], self._counted[order]
+    
+    def snapshot(self):
+        """Zones and their current counts as a ZoneSnapshot (for drawing on another thread)"""
+        return ZoneSnapshot(tuple(self.zones), self.in_counts.copy(), self.out_counts.copy())
+    
+    def draw(self, image):
+        """Draw every zone with its current counts on image in place (see ZoneSnapshot.draw)"""
+        return self.snapshot().draw(image)
+
+
+class ZoneSnapshot:
+    """
+    Copy of a ZoneCounter's zones and counts at one frame
+    
+    Taken on the thread that updates the counter and handed to an annotate/write thread,
+    so a frame is drawn with its own counts while the counter moves on.
+    """
+    
+    def __init__(self, zones, in_counts, out_counts):
+        self.zones = zones
+        self.in_counts = in_counts
+        self.out_counts = out_counts
+    
+    def draw(self, image):
+        """Draw every zone (lines yellow, IN areas green, OUT areas red) with its name on image in place"""
+        height, width = image.shape[:2]
+        for zone, in_count, out_count in zip(self.zones, self.in_counts, self.out_counts):
+            label = f"{zone['name']} IN {in_count} OUT {out_count}" if len(self.zones) > 1 else None
+            
+            if ZoneCounter.is_area(zone):
+                for key, color in (('polygon', (0, 255, 255)), ('in_box', (0, 255, 0)), ('out_box', (0, 0, 255))):
+                    if key in zone:
+                        points = np.asarray(zone[key], dtype=np.int32).reshape(-1, 1, 2)
+                        cv2.polylines(image, [points], True, color, 2)
+                points = np.asarray(zone.get('polygon', zone.get('in_box')), dtype=np.int32).reshape(-1, 2)
+                anchor = (int(points[:, 0].min()) + 10, int(points[:, 1].min()) + 25)
+            elif 'line_points' in zone:
+                line_p1, line_p2 = (tuple(int(v) for v in point) for point in zone['line_points'])
+                cv2.line(image, line_p1, line_p2, (0, 255, 255), 3)
+                cv2.circle(image, line_p1, 8, (0, 255, 0), -1)  # Start point (IN side)
+                cv2.circle(image, line_p2, 8, (0, 0, 255), -1)  # End point (OUT side)
+                cv2.putText(image, "IN", (line_p1[0] - 30, line_p1[1] - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+                cv2.putText(image, "OUT", (line_p2[0] + 10, line_p2[1] - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                anchor = (line_p1[0] + 10, line_p1[1] + 25)
+            elif 'y' in zone:
+                line_pos = int(zone['y'])
+                cv2.line(image, (0, line_pos), (width, line_pos), (0, 255, 255), 3)
+                cv2.putText(image, "ROI LINE", (width - 150, line_pos - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+                anchor = (10, line_pos - 10)
+            else:
+                line_pos = int(zone['x'])
+                cv2.line(image, (line_pos, 0), (line_pos, height), (0, 255, 255), 3)
+                cv2.putText(image, "ROI", (line_pos + 10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+                anchor = (line_pos + 10, 80)
+            
+            if label:
+                cv2.putText(image, label, anchor,
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        
+        return image
+
+
+def scale_zone(zone, factor):
+    """Return a copy of a zone dict with all coordinates multiplied by factor"""
+    scaled = dict(zone)
+    for key in ('y', 'x'):
+        if key in zone:
+            scaled[key] = int(zone[key] * factor)
+    for key in ('line_points', 'polygon', 'in_box', 'out_box'):
+        if key in zone:
+            scaled[key] = [(int(x * factor), int(y * factor)) for x, y in zone[key]]
+    return scaled
+
+
+def load_zones(roi_config_file, scale_factor=1.0, video_width=None):
+    """
+    Load the counting zones of an ROI config file
+    
+    The file may hold a single line (setup_roi.py: 'type' horizontal/vertical/custom), an
+    'in_box'/'out_box' pair (templates/roi_editor.html, drawn on a frame of 'frame_width'
+    pixels) and/or a list of zone dicts under 'zones' (see ZoneCounter).
+    
+    Args:
+        roi_config_file: Path to the JSON file
+        scale_factor: Factor from original video coordinates to processed frame coordinates
+        video_width: Width of the original video, used to rescale boxes drawn on another size
+        
+    Returns:
+        List of zone dicts in processed frame coordinates (empty if the file has none)
+    """
+    with open(roi_config_file, 'r') as f:
+        roi_config = json.load(f)
+    
+    zones = []
+    config_type = roi_config.get('type', 'custom')
+    if config_type == 'horizontal' and roi_config.get('y') is not None:
+        zones.append({'name': 'line', 'y': roi_config['y']})
+    elif config_type == 'vertical' and roi_config.get('x') is not None:
+        zones.append({'name': 'line', 'x': roi_config['x']})
+    elif roi_config.get('line_points'):
+        zones.append({'name': 'line', 'line_points': roi_config['line_points']})
+    zones = [scale_zone(zone, scale_factor) for zone in zones]
+    
+    if roi_config.get('in_box') and roi_config.get('out_box'):
+        box_factor = scale_factor
+        if video_width and roi_config.get('frame_width'):
+            box_factor *= video_width / roi_config['frame_width']
+        zones.append(scale_zone({'name': 'boxes', 'in_box': roi_config['in_box'], 'out_box': roi_config['out_box']},
+                                box_factor))
+    
+    zones.extend(scale_zone(zone, scale_factor) for zone in roi_config.get('zones', []))
+    return zones
+
+
+class VideoFrameReader:
+    """Iterate over the frames of an opened capture that are selected for processing"""
+    
+    def __init__(self, cap, process_every_n_frames=1, resize_to=None, start_frame=0, end_frame=None,
+                 seek_margin=250):
+        """
+        Initialize the reader
+        
+        Args:
+            cap: Opened cv2.VideoCapture
+            process_every_n_frames: Yield every N-th frame only
+            resize_to: Optional (width, height) every yielded frame is resized to
+            start_frame: Number of frames to skip before reading (default: 0)
+            end_frame: Stop after this frame number (default: read until the end)
+            seek_margin: Frames before start_frame to seek to (default: 250, about one
+                        keyframe interval), see seek()
+        """
+        self.cap = cap
+        self.process_every_n_frames = max(1, int(process_every_n_frames))
+        self.resize_to = resize_to
+        self.end_frame = end_frame
+        self.frames_read = 0
+        
+        if start_frame:
+            self.seek(start_frame, seek_margin)
+    
+    def seek(self, start_frame, margin=250):
+        """
+        Position the capture exactly after the first start_frame frames
+        
+        A CAP_PROP_POS_FRAMES seek lands on a keyframe for many codecs, so the capture is
+        sent `margin` frames early and then read forward, dropping frames by their true
+        position (CAP_PROP_POS_FRAMES after each grab) until start_frame is reached. A seek
+        that still lands too late is retried with twice the margin. Decoding stays bounded
+        by the margin instead of growing with start_frame, except for backends that report
+        no position, which are read from the first frame.
+        """
+        while True:
+            target = max(0, start_frame - margin)
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            position = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+            if target == 0 or 0 < position <= start_frame:
+                break
+            if position <= 0:
+                # No frame position from this backend, rewind and count the grabs instead
+                target = 0
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                break
+            margin *= 2
+        
+        position = position if target else 0
+        while position < start_frame and self.cap.grab():
+            # Backends without a frame position report nothing new, count the grab instead
+            reported = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+            position = reported if reported > position else position + 1
+        self.frames_read = position
+    
+    def __iter__(self):
+        """Yield (frame_number, frame) tuples, frame numbers are 1-based and count from the start of the video"""
+        while self.cap.isOpened():
+            if self.end_frame is not None and self.frames_read >= self.end_frame:
+                break
+            
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            
+            self.frames_read += 1
+            
+            # Skip frames for faster processing
+            if self.frames_read % self.process_every_n_frames != 0:
+                continue
+            
+            # Resize frame for faster inference
+            if self.resize_to is not None:
+                frame = cv2.resize(frame, self.resize_to)
+            
+            yield self.frames_read, frame
+
+
+class FrameResultsWriter:
+    """
+    Stream per-frame results to an NDJSON file, one compact JSON object per line
+    
+    Used instead of collecting frame_results in memory, so memory stays flat for
+    arbitrarily long videos. Read the file back with read_frame_results().
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'w')
+        self.count = 0
+    
+    def write(self, record):
+        """Append one frame result"""
+        self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.count += 1
+    
+    def close(self):
+        """Flush and close the file"""
+        if not self.file.closed:
+            self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_frame_results(path):
+    """Iterate over the frame results written by FrameResultsWriter"""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# One crossing event: track ID, direction (1 = OUT, -1 = IN), zone index, processed
+# frame number, wall-clock time (Unix seconds) and position in the video (seconds)
+CROSSING_EVENT_DTYPE = np.dtype([
+    ('track_id', np.int64),
+    ('direction', np.int8),
+    ('zone', np.int16),
+    ('frame', np.int64),
+    ('wall_time', np.float64),
+    ('media_time', np.float64)
+])
+
+
+class CrossingEventRing:
+    """
+    Fixed-size single-producer/single-consumer ring buffer of crossing events
+    
+    The counting loop pushes and one writer thread pops, neither takes a lock: each side
+    fills or copies its slots first and only then advances its own position (`head` is
+    only written by the producer, `tail` only by the consumer). A full ring drops the new
+    events and counts them in `dropped` rather than blocking the counting loop.
+    """
+    
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.events = np.zeros(capacity, dtype=CROSSING_EVENT_DTYPE)
+        self.head = 0  # Events pushed so far
+        self.tail = 0  # Events popped so far
+        self.dropped = 0
+    
+    def __len__(self):
+        return self.head - self.tail
+    
+    def push(self, track_ids, zones, directions, frame, wall_time, media_time):
+        """
+        Append the crossings of one update
+        
+        Args:
+            track_ids, zones, directions: Equal length arrays, as returned by ZoneCounter.update
+            frame: Processed frame number
+            wall_time: Wall-clock time in Unix seconds
+            media_time: Position in the video in seconds
+            
+        Returns:
+            Number of events stored
+        """
+        n = len(track_ids)
+        free = self.capacity - (self.head - self.tail)
+        if n > free:
+            self.dropped += n - free
+            n = free
+        if n == 0:
+            return 0
+        
+        index = (self.head + np.arange(n)) % self.capacity
+        self.events['track_id'][index] = track_ids[:n]
+        self.events['zone'][index] = zones[:n]
+        self.events['direction'][index] = directions[:n]
+        self.events['frame'][index] = frame
+        self.events['wall_time'][index] = wall_time
+        self.events['media_time'][index] = media_time
+        self.head += n  # Publish the filled slots
+        return n
+    
+    def pop(self):
+        """Remove and return all available events as a structured array (oldest first)"""
+        head = self.head
+        if head == self.tail:
+            return self.events[:0].copy()
+        
+        events = self.events[np.arange(self.tail, head) % self.capacity]
+        self.tail = head  # Release the copied slots
+        return events
+
+
+class CrossingEventLog:
+    """
+    Append-only log of crossing events written by a background thread
+    
+    emit() only copies the crossings into a CrossingEventRing, a writer thread drains the
+    ring every flush_interval seconds and appends one JSON object per event to
+    <directory>/<channel>/<YYYY-MM-DD>.ndjson (local date of the wall-clock time). Hourly
+    and daily totals are rolled up from these files by hourly_crossings() and
+    daily_crossings() without touching the video again.
+    """
+    
+    def __init__(self, directory, channel='default', zone_names=None, capacity=4096, flush_interval=0.5):
+        """
+        Initialize the log and start the writer thread
+        
+        Args:
+            directory: Root directory of the event logs
+            channel: Camera/stream name, events of every channel go to their own subdirectory
+            zone_names: Zone names written instead of zone indices (e.g. ZoneCounter.names)
+            capacity: Ring buffer size in events
+            flush_interval: Seconds between two drains of the ring
+        """
+        self.directory = Path(directory) / channel
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.channel = channel
+        self.zone_names = list(zone_names or [])
+        self.ring = CrossingEventRing(capacity)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.error = None
+        self._file = None
+        self._file_date = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"{channel}-events", daemon=True)
+        self._thread.start()
+    
+    def emit(self, crossings, frame, media_time, wall_time=None):
+        """
+        Queue the crossings of one update
+        
+        Args:
+            crossings: (track_ids, zones, directions) as returned by ZoneCounter.update
+            frame: Processed frame number
+            media_time: Position in the video in seconds
+            wall_time: Wall-clock time in Unix seconds (default: now)
+        """
+        track_ids, zones, directions = crossings
+        if len(track_ids):
+            self.ring.push(track_ids, zones, directions, frame,
+                           time.time() if wall_time is None else wall_time, media_time)
+    
+    def _run(self):
+        """Writer thread body"""
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+    
+    def _drain(self):
+        """Append all events waiting in the ring to the log files"""
+        events = self.ring.pop()
+        if len(events) == 0 or self.error is not None:
+            return
+        
+        try:
+            for event in events.tolist():
+                track_id, direction, zone, frame, wall_time, media_time = event
+                timestamp = datetime.fromtimestamp(wall_time)
+                date = timestamp.date().isoformat()
+                if date != self._file_date:
+                    if self._file:
+                        self._file.close()
+                    self._file = open(self.directory / f"{date}.ndjson", 'a')
+                    self._file_date = date
+                
+                self._file.write(json.dumps({
+                    'track_id': track_id,
+                    'direction': ZoneCounter.DIRECTIONS[direction],
+                    'zone': self.zone_names[zone] if zone < len(self.zone_names) else zone,
+                    'frame': frame,
+                    'time': timestamp.isoformat(timespec='milliseconds'),
+                    'wall_time': wall_time,
+                    'media_time': round(media_time, 3)
+                }, separators=(',', ':')) + '\n')
+            
+            self._file.flush()
+            self.written += len(events)
+        except Exception as e:
+            self.error = e
+    
+    def as_dict(self):
+        """Return the log statistics as a JSON-serializable dictionary"""
+        return {'path': str(self.directory), 'events': self.written, 'dropped': self.ring.dropped}
+    
+    def close(self):
+        """Write the remaining events and stop the writer thread"""
+        self._stop.set()
+        self._thread.join()
+        if self._file:
+            self._file.close()
+        if self.error is not None:
+            raise self.error
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_crossing_events(directory, channel='default', date=None):
+    """
+    Iterate over the crossing events CrossingEventLog wrote for one day
+    
+    Args:
+        directory: Root directory of the event logs
+        channel: Camera/stream name
+        date: Day as 'YYYY-MM-DD' or datetime.date (default: today)
+    """
+    date = str(date or datetime.now().date())
+    path = Path(directory) / channel / f"{date}.ndjson"
+    if not path.exists():
+        return
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def hourly_crossings(directory, channel='default', date=None):
+    """
+    Roll up one day of crossing events per hour
+    
+    Returns:
+        List of 24 dicts {'hour', 'in', 'out', 'total'}, index = hour of the day
+    """
+    hours, outs = [], []
+    for event in read_crossing_events(directory, channel, date):
+        hours.append(int(event['time'][11:13]))
+        outs.append(event['direction'] == 'out')
+    
+    hours = np.asarray(hours, dtype=np.int64)
+    outs = np.asarray(outs, dtype=bool)
+    out_counts = np.bincount(hours[outs], minlength=24)
+    in_counts = np.bincount(hours[~outs], minlength=24)
+    
+    return [
+        {'hour': hour, 'in': int(in_counts[hour]), 'out': int(out_counts[hour]),
+         'total': int(in_counts[hour] + out_counts[hour])}
+        for hour in range(24)
+    ]
+
+
+def daily_crossings(directory, channel='default', days=7, end=None):
+    """
+    Roll up crossing events per day
+    
+    Args:
+        directory: Root directory of the event logs
+        channel: Camera/stream name
+        days: Number of days up to and including `end`
+        end: Last day as datetime.date (default: today)
+        
+    Returns:
+        List of dicts {'date', 'day', 'in', 'out', 'total'}, oldest day first
+    """
+    end = end or datetime.now().date()
+    rows = []
+    for offset in range(days - 1, -1, -1):
+        day = end - timedelta(days=offset)
+        in_count = out_count = 0
+        for event in read_crossing_events(directory, channel, day):
+            if event['direction'] == 'out':
+                out_count += 1
+            else:
+                in_count += 1
+        rows.append({'date': day.isoformat(), 'day': day.strftime('%a'), 'in': in_count, 'out': out_count,
+                     'total': in_count + out_count})
+    return rows
+
+
+class QueueDepthStats:
+    """Running statistics of a stage queue's depth"""
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.samples = 0
+        self.total_depth = 0
+        self.max_depth = 0
+        self.current_depth = 0
+    
+    def sample(self, depth):
+        """Record the queue depth observed at one hand-over"""
+        self.samples += 1
+        self.total_depth += depth
+        self.max_depth = max(self.max_depth, depth)
+        self.current_depth = depth
+    
+    def as_dict(self):
+        """Return the statistics as a JSON-serializable dictionary"""
+        return {
+            'maxsize': self.maxsize,
+            'current_depth': self.current_depth,
+            'max_depth': self.max_depth,
+            'avg_depth': self.total_depth / self.samples if self.samples else 0.0
+        }
+
+
+class PipelineStage:
+    """
+    Run an iterable on a background thread and hand its items on through a bounded queue
+    
+    Items come out in exactly the order the source produced them, so chaining stages
+    keeps frame ordering deterministic. A full queue blocks the producer (backpressure)
+    instead of buffering the whole video in memory.
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, name, source, maxsize=8):
+        """
+        Initialize and start the stage
+        
+        Args:
+            name: Stage name used in statistics and thread names
+            source: Iterable producing the stage's items (iterated on the stage thread)
+            maxsize: Maximum number of items waiting in the queue
+        """
+        self.name = name
+        self.source = source
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stats = QueueDepthStats(maxsize)
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"{name}-stage", daemon=True)
+        self._thread.start()
+    
+    def _put(self, item):
+        """Put an item on the queue, giving up if the stage is being closed"""
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _run(self):
+        """Stage thread body"""
+        try:
+            for item in self.source:
+                if not self._put(item):
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            self._put(self._DONE)
+    
+    def __iter__(self):
+        """Yield the source's items in order, re-raising any error from the stage thread"""
+        while True:
+            try:
+                depth = self.queue.qsize()
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            
+            if item is self._DONE:
+                if self.error is not None:
+                    raise self.error
+                return
+            
+            self.stats.sample(depth)
+            yield item
+    
+    def close(self):
+        """Stop the stage thread (used when the consumer stops early)"""
+        self._stop.set()
+        self._thread.join()
+
+
+class FrameSinkStage:
+    """Consume items on a background thread through a bounded queue (e.g. annotate + encode + write)"""
+    
+    _DONE = object()
+    
+    def __init__(self, name, handler, maxsize=8):
+        """
+        Initialize and start the stage
+        
+        Args:
+            name: Stage name used in statistics and thread names
+            handler: Callable invoked with every item, in the order the items were put
+            maxsize: Maximum number of items waiting in the queue
+        """
+        self.name = name
+        self.handler = handler
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stats = QueueDepthStats(maxsize)
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name=f"{name}-stage", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        """Stage thread body"""
+        while True:
+            item = self.queue.get()
+            if item is self._DONE:
+                break
+            # Keep draining after an error so producers never block forever
+            if self.error is None:
+                try:
+                    self.handler(item)
+                except Exception as e:
+                    self.error = e
+    
+    def put(self, item):
+        """Hand an item to the stage, blocking while the queue is full"""
+        if self.error is not None:
+            raise self.error
+        self.stats.sample(self.queue.qsize())
+        self.queue.put(item)
+    
+    def close(self):
+        """Process all queued items and stop the stage thread"""
+        self.queue.put(self._DONE)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+# Inference backends supported by MobileOutDetector, mapped to the ultralytics export format
+# ('onnx-int8' is the ONNX export post-training quantized with ONNX Runtime)
+BACKENDS = {
+    'pytorch': None,
+    'onnx': 'onnx',
+    'openvino': 'openvino',
+    'onnx-int8': 'onnx'
+}
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+
+def latency_stats(latencies):
+    """Summarize a list of per-frame latencies in seconds"""
+    ms = np.asarray(latencies) * 1000
+    return {
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'fps': float(1000 / ms.mean())
+    }
+
+
+def encode_image(image, ext='.jpg', quality=90):
+    """Encode a BGR image to JPEG/PNG bytes in memory (e.g. for an HTTP response)"""
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext.lower() in ('.jpg', '.jpeg') else []
+    ok, buffer = cv2.imencode(ext, image, params)
+    if not ok:
+        raise ValueError(f"Could not encode image as {ext}")
+    return buffer.tobytes()
+
+
+def video_fingerprint(path, chunk_size=1024 * 1024, chunks=8):
+    """
+    Return a short content fingerprint of a (large) video without reading all of it
+    
+    Hashes the file size and `chunks` evenly spaced blocks of `chunk_size` bytes.
+    """
+    size = os.path.getsize(path)
+    sha = hashlib.sha256(str(size).encode())
+    with open(path, 'rb') as f:
+        for i in range(chunks):
+            f.seek(max(0, size - chunk_size) * i // max(1, chunks - 1))
+            sha.update(f.read(chunk_size))
+    return sha.hexdigest()[:16]
+
+
+def sample_video_frames(source, frames_per_video=32, resize_width=640, offset=0.0):
+    """
+    Sample evenly spaced frames from a video or every video in a folder
+    
+    Args:
+        source: Path to a video file or a folder of videos (e.g. videos/)
+        frames_per_video: Number of frames taken from each video
+        resize_width: Resize frame width like detect_video does (default: 640)
+        offset: Fraction of the sampling step to shift by, so different offsets give disjoint samples
+        
+    Returns:
+        List of BGR frames
+    """
+    source = Path(source)
+    if source.is_dir():
+        videos = sorted(p for p in source.iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS)
+    else:
+        videos = [source]
+    
+    frames = []
+    for video in videos:
+        cap = cv2.VideoCapture(str(video))
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if not cap.isOpened() or total <= 0:
+            print(f"⚠️  Skipping unreadable video: {video}")
+            continue
+        
+        step = total / frames_per_video
+        for i in range(frames_per_video):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, min(total - 1, int((i + offset) * step)))
+            ret, frame = cap.read()
+            if not ret:
+                continue
+            height, width = frame.shape[:2]
+            if resize_width and resize_width < width:
+                frame = cv2.resize(frame, (resize_width, int(height * (resize_width / width))))
+            frames.append(frame)
+        cap.release()
+    
+    return frames
+
+
+def _letterbox_blob(frame, imgsz):
+    """Preprocess a BGR frame the way the ultralytics predictor feeds a fixed-size ONNX model"""
+    height, width = frame.shape[:2]
+    ratio = min(imgsz / height, imgsz / width)
+    new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[top:top + new_h, left:left + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    
+    # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+    return np.ascontiguousarray(canvas[..., ::-1].transpose(2, 0, 1))[None].astype(np.float32) / 255.0
+
+
+def quantize_onnx_int8(onnx_path, output_path, calibration_frames, imgsz=640):
+    """
+    Post-training static INT8 quantization of an exported ONNX model with ONNX Runtime
+    
+    Only convolutions are quantized (QDQ format, per-channel weights), the detection head's
+    box decoding stays in float so box coordinates keep their precision.
+    
+    Args:
+        onnx_path: FP32 ONNX model exported by export_model
+        output_path: Where to write the INT8 model
+        calibration_frames: BGR frames used to calibrate activation ranges
+        imgsz: Inference image size the model was exported for
+    """
+    try:
+        import onnx
+        from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                              quantize_static)
+    except ImportError:
+        raise ImportError("INT8 quantization requires onnx and onnxruntime: pip install onnx onnxruntime")
+    
+    if not calibration_frames:
+        raise ValueError("No calibration frames, add videos to the calibration folder")
+    
+    input_name = onnx.load(str(onnx_path), load_external_data=False).graph.input[0].name
+    
+    class FrameCalibrationReader(CalibrationDataReader):
+        """Feed letterboxed frames to the calibrator one at a time"""
+        
+        def __init__(self):
+            self.frames = iter(calibration_frames)
+        
+        def get_next(self):
+            frame = next(self.frames, None)
+            return None if frame is None else {input_name: _letterbox_blob(frame, imgsz)}
+    
+    print(f"  Calibrating INT8 model on {len(calibration_frames)} frames...")
+    quantize_static(
+        str(onnx_path),
+        str(output_path),
+        FrameCalibrationReader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+        op_types_to_quantize=['Conv']
+    )
+    
+    # Keep the ultralytics metadata (class names, stride, imgsz) of the FP32 export
+    fp32_model = onnx.load(str(onnx_path))
+    int8_model = onnx.load(str(output_path))
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, str(output_path))
+
+
+def export_model(model_path, backend, imgsz=640, calibration_source='videos', calibration_frames=32):
+    """
+    Export PyTorch weights to a CPU inference runtime, once
+    
+    The exported artifact is cached next to the weights and keyed by the weights hash
+    and image size (e.g. bestmaruthi.3f2a9c1d0b7e.640.onnx), so retraining the model or
+    changing imgsz triggers a new export while repeated runs reuse the cached file.
+    
+    Args:
+        model_path: Path to the trained model weights (.pt)
+        backend: One of BACKENDS ('pytorch' returns model_path unchanged)
+        imgsz: Inference image size the model is exported for
+        calibration_source: Video or folder of videos sampled to calibrate 'onnx-int8'
+        calibration_frames: Number of frames sampled per calibration video
+        
+    Returns:
+        Path to the exported model (file for ONNX, directory for OpenVINO IR)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend} (choose from {', '.join(BACKENDS)})")
+    
+    weights = Path(model_path)
+    export_format = BACKENDS[backend]
+    if export_format is None:
+        return weights
+    
+    if backend == 'onnx-int8':
+        target = weights.with_name(f"{weights.stem}.{file_digest(weights)}.{imgsz}.int8.onnx")
+        if target.exists():
+            print(f"  Using cached {backend} model: {target}")
+            return target
+        
+        fp32_path = export_model(weights, 'onnx', imgsz=imgsz)
+        frames = sample_video_frames(calibration_source, frames_per_video=calibration_frames)
+        quantize_onnx_int8(fp32_path, target, frames, imgsz=imgsz)
+        print(f"✓ INT8 model cached at: {target}")
+        return target
+    
+    suffix = '.onnx' if export_format == 'onnx' else '_openvino_model'
+    target = weights.with_name(f"{weights.stem}.{file_digest(weights)}.{imgsz}{suffix}")
+    if target.exists():
+        print(f"  Using cached {backend} export: {target}")
+        return target
+    
+    from ultralytics import YOLO
+    
+    print(f"  Exporting {weights} to {backend} (imgsz={imgsz}), this happens only once...")
+    # Dynamic axes keep batched inference (infer_frames) working on the exported model
+    exported = Path(YOLO(str(weights)).export(format=export_format, imgsz=imgsz, dynamic=True, verbose=False))
+    shutil.move(str(exported), str(target))
+    print(f"✓ Exported model cached at: {target}")
+    
+    return target
+
+
+class SharedModel:
+    """
+    Thread-safe handle to a model loaded once per process
+    
+    Calls are serialized with a lock because the ultralytics predictor keeps per-call
+    state, every other attribute (names, predictor, ...) is forwarded to the YOLO model.
+    """
+    
+    def __init__(self, model_path, backend='pytorch', imgsz=640):
+        self.model_path = str(model_path)
+        self.backend = backend
+        self.imgsz = imgsz
+        self.runtime_path = None
+        self.model = None
+        self.lock = threading.RLock()
+    
+    def load(self, warmup=True):
+        """Load (export if needed) and warm up the model, no-op once loaded"""
+        with self.lock:
+            if self.model is not None:
+                return self
+            
+            from ultralytics import YOLO
+            
+            start = time.perf_counter()
+            self.runtime_path = str(export_model(self.model_path, self.backend, imgsz=self.imgsz))
+            self.model = YOLO(self.runtime_path, task='detect')
+            if warmup:
+                # The first call builds the predictor and initializes the runtime, pay for
+                # it here instead of on the first real frame
+                self.model(np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8), imgsz=self.imgsz, verbose=False)
+            print(f"  Loaded {self.runtime_path} ({self.backend}, imgsz={self.imgsz}) "
+                  f"in {time.perf_counter() - start:.2f}s")
+            return self
+    
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            return self.load().model(*args, **kwargs)
+    
+    # The handle's own fields, never forwarded to the model
+    _FIELDS = ('model_path', 'backend', 'imgsz', 'runtime_path', 'model', 'lock')
+    
+    def __getattr__(self, name):
+        # Only reached for missing attributes. A missing private name or own field means the
+        # instance is not initialized (unpickling, copy.copy), and loading then would recurse
+        if name.startswith('_') or name in self._FIELDS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        return getattr(self.load().model, name)
+
+
+_model_registry = {}
+_model_registry_lock = threading.Lock()
+
+
+def get_model(model_path, backend='pytorch', imgsz=640, warmup=True):
+    """
+    Return the process-wide shared model for (weights, backend, imgsz)
+    
+    The first call loads and warms up the model, later calls (from any thread) get the
+    same handle back immediately. Different models load concurrently.
+    
+    Args:
+        model_path: Path to the model weights
+        backend: Inference runtime, see BACKENDS
+        imgsz: Inference image size
+        warmup: Run one dummy inference after loading (default: True)
+        
+    Returns:
+        SharedModel
+    """
+    key = (str(Path(model_path).resolve()), backend, imgsz)
+    with _model_registry_lock:
+        handle = _model_registry.get(key)
+        if handle is None:
+            handle = _model_registry[key] = SharedModel(model_path, backend, imgsz)
+    return handle.load(warmup=warmup)
+
+
+def _uncrop_results(results, frame, crop):
+    """Map the results of a model run on a crop back onto the full frame"""
+    from ultralytics.engine.results import Results
+    
+    data = results.boxes.data.clone()
+    data[:, [0, 2]] += crop[0]
+    data[:, [1, 3]] += crop[1]
+    return Results(frame, path=results.path, names=results.names, boxes=data, speed=results.speed)
+
+
+class FrameTiler:
+    """
+    Slice high resolution frames into overlapping tiles for small-object detection
+    
+    The selected classes are detected on full resolution tiles while all other classes
+    come from one pass over the frame downscaled to `resize_to`. Tile boxes are mapped to
+    the downscaled frame so tracking and ROI lines keep working in the usual coordinates.
+    """
+    
+    def __init__(self, tile_size=640, overlap=0.2, classes=(MOBILE_CLASS_ID,), resize_to=None):
+        """
+        Initialize the tiler
+        
+        Args:
+            tile_size: Tile width/height in full resolution pixels (default: 640)
+            overlap: Fraction of a tile shared with its neighbour (default: 0.2)
+            classes: Class IDs detected on the tiles (default: MOBILE only)
+            resize_to: (width, height) of the downscaled frame for the other classes,
+                      None keeps the original size
+        """
+        if not 0 <= overlap < 1:
+            raise ValueError(f"Tile overlap must be in [0, 1), got {overlap}")
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.classes = tuple(classes)
+        self.resize_to = resize_to
+    
+    def resize(self, frame):
+        """Downscale a full resolution frame for the full-frame pass"""
+        if self.resize_to is None:
+            return frame
+        return cv2.resize(frame, self.resize_to)
+    
+    def windows(self, frame_size):
+        """
+        Tile rectangles covering a frame, the last row/column is aligned with the frame edge
+        
+        Args:
+            frame_size: (width, height) of the full resolution frame
+            
+        Returns:
+            List of (x1, y1, x2, y2)
+        """
+        step = max(1, int(self.tile_size * (1 - self.overlap)))
+        
+        def starts(length):
+            if length <= self.tile_size:
+                return [0]
+            positions = list(range(0, length - self.tile_size, step))
+            return positions + [length - self.tile_size]
+        
+        width, height = frame_size
+        return [
+            (x, y, min(width, x + self.tile_size), min(height, y + self.tile_size))
+            for y in starts(height) for x in starts(width)
+        ]
+
+
+class MotionGate:
+    """
+    Cheap motion detector deciding whether a frame needs inference
+    
+    Frames are downscaled to blurred grayscale and compared with the last frame that was
+    sent to the model. When less than `threshold` of the pixels changed the scene is
+    considered static and the previous detections can be reused. Comparing against the
+    last inferred frame (not the previous one) means slow drift still triggers inference.
+    """
+    
+    def __init__(self, threshold=0.002, pixel_delta=25, width=160):
+        """
+        Initialize the motion gate
+        
+        Args:
+            threshold: Sensitivity, fraction of pixels that must change to count as motion
+                      (default: 0.002, lower = more sensitive = fewer skipped frames)
+            pixel_delta: Minimum gray level difference for a pixel to count as changed
+            width: Width of the downscaled comparison frame
+        """
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self.reference = None
+        self.frames = 0
+        self.skipped = 0
+    
+    def update(self, frame):
+        """
+        Check a frame for motion
+        
+        Returns:
+            True if the frame should go through the model, False if it can be skipped
+        """
+        self.frames += 1
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, int(height * self.width / width))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        
+        if self.reference is not None:
+            changed = np.count_nonzero(cv2.absdiff(gray, self.reference) > self.pixel_delta)
+            if changed < self.threshold * gray.size:
+                self.skipped += 1
+                return False
+        
+        self.reference = gray
+        return True
+    
+    def as_dict(self):
+        """Return the gate statistics as a JSON-serializable dictionary"""
+        return {
+            'threshold': self.threshold,
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'skip_fraction': self.skipped / self.frames if self.frames else 0.0
+        }
+
+
+class DetectionCache:
+    """
+    On-disk cache of the raw per-frame detections of a video
+    
+    Detections are stored once at a low confidence floor, keyed by the video content, the
+    model, the inference size and the frame sampling. ROI line, confidence threshold (at or
+    above the floor) and tracker settings only matter when replaying, so re-counting with a
+    new ROI line skips inference. Every file is one compressed .npz.
+    """
+    
+    def __init__(self, cache_dir, video_path, detector, frame_size, process_every_n_frames, conf_floor=0.05):
+        """
+        Initialize the cache entry of one video
+        
+        Args:
+            cache_dir: Directory holding the cache files
+            video_path: Path to the video
+            detector: MobileOutDetector producing the detections
+            frame_size: (width, height) the frames are resized to before inference
+            process_every_n_frames: Frame stride
+            conf_floor: Confidence threshold the detections are stored at
+        """
+        self.video_path = str(video_path)
+        self.conf_floor = conf_floor
+        self.names = detector.class_names
+        key = {
+            'video': video_fingerprint(video_path),
+            'model': file_digest(detector.model_path) if os.path.exists(detector.model_path) else detector.model_path,
+            'backend': detector.backend,
+            'imgsz': detector.imgsz,
+            'iou': detector.iou_threshold,
+            'max_det': detector.max_det,
+            'frame_size': list(frame_size),
+            'stride': process_every_n_frames,
+            'conf_floor': conf_floor
+        }
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+        self.path = Path(cache_dir) / f"{Path(video_path).stem}.{digest}.npz"
+        
+        self.frame_numbers = []
+        self.boxes = []
+        self.frames_read = 0
+    
+    def load(self):
+        """Load the cached detections, returns False on a cache miss"""
+        if not self.path.exists():
+            return False
+        with np.load(self.path) as data:
+            offsets = data['offsets']
+            self.frame_numbers = data['frame_numbers'].tolist()
+            self.boxes = np.split(data['boxes'], offsets[1:-1])
+            self.frames_read = int(data['frames_read'])
+        return True
+    
+    def record(self, frame_stream, conf_threshold):
+        """
+        Store the raw detections of an inference stream run at the confidence floor
+        
+        Yields:
+            The (frame_number, frame, results) tuples of the stream, results filtered to conf_threshold
+        """
+        for frame_number, frame, results in frame_stream:
+            data = results.boxes.data
+            data = data.cpu().numpy() if hasattr(data, 'cpu') else np.asarray(data)
+            self.frame_numbers.append(frame_number)
+            self.boxes.append(np.asarray(data[:, [0, 1, 2, 3, -2, -1]], dtype=np.float32))
+            yield frame_number, frame, results[results.boxes.conf >= conf_threshold]
+    
+    def save(self, frames_read):
+        """Write the recorded detections to disk"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        offsets = np.cumsum([0] + [len(boxes) for boxes in self.boxes])
+        tmp_path = self.path.with_suffix('.tmp.npz')
+        np.savez_compressed(
+            tmp_path,
+            frame_numbers=np.asarray(self.frame_numbers, dtype=np.int64),
+            boxes=np.concatenate(self.boxes) if self.boxes else np.zeros((0, 6), dtype=np.float32),
+            offsets=offsets,
+            frames_read=frames_read
+        )
+        os.replace(tmp_path, self.path)
+    
+    def replay(self, conf_threshold, frames=None):
+        """
+        Replay the cached detections
+        
+        Args:
+            conf_threshold: Confidence threshold, must be at least the floor
+            frames: Optional iterable of (frame_number, frame) tuples (e.g. a VideoFrameReader)
+                    to build drawable Results. Without frames, Detections are yielded.
+            
+        Yields:
+            (frame_number, frame or None, results) tuples
+        """
+        if frames is None:
+            for frame_number, boxes in zip(self.frame_numbers, self.boxes):
+                boxes = boxes[boxes[:, 4] >= conf_threshold]
+                yield frame_number, None, Detections(
+                    np.ascontiguousarray(boxes[:, :4]), np.ascontiguousarray(boxes[:, 4]), boxes[:, 5].astype(np.int64)
+                )
+            return
+        
+        import torch
+        from ultralytics.engine.results import Results
+        
+        for (frame_number, frame), boxes in zip(frames, self.boxes):
+            boxes = boxes[boxes[:, 4] >= conf_threshold]
+            yield frame_number, frame, Results(frame, path=self.video_path, names=self.names,
+                                               boxes=torch.from_numpy(boxes))
+
+
+class LatencyController:
+    """
+    Adapt skip factor and input size of a live detection loop to a latency budget
+    
+    The loop reports when each frame starts and finishes. Every `window` processed frames
+    the median end-to-end latency of processed frames and the frame rate are compared with
+    the targets: too slow lowers the input size (latency) or processes fewer frames (FPS),
+    comfortable headroom undoes those steps one at a time. Every change is logged.
+    """
+    
+    def __init__(self, target_latency_ms=150, target_fps=15, skip_range=(1, 4),
+                 imgsz_choices=(320, 416, 512, 640), initial_skip=2, window=30, tolerance=0.2,
+                 name='live'):
+        """
+        Initialize the controller
+        
+        Args:
+            target_latency_ms: End-to-end latency budget of a processed frame (read to display)
+            target_fps: Frame rate the loop should hold
+            skip_range: (min, max) value of the skip factor (process every Nth frame)
+            imgsz_choices: Allowed model input sizes, the largest is used initially
+            initial_skip: Skip factor to start with (clipped to skip_range)
+            window: Processed frames measured between two decisions
+            tolerance: Relative dead band around the targets to avoid oscillating
+            name: Label used in the log lines
+        """
+        self.target_latency = target_latency_ms / 1000
+        self.target_fps = target_fps
+        self.min_skip, self.max_skip = skip_range
+        self.imgsz_choices = sorted(imgsz_choices)
+        self.imgsz_index = len(self.imgsz_choices) - 1
+        self.skip = min(max(initial_skip, self.min_skip), self.max_skip)
+        self.window = window
+        self.tolerance = tolerance
+        self.name = name
+        self.adjustments = []
+        
+        self._latencies = []
+        self._periods = []
+        self._frame_start = None
+        self._last_start = None
+    
+    # Video files are not real-time, they keep processing every 2nd frame at full size
+    FILE_PROFILE = {'skip_range': (2, 2), 'imgsz_choices': (640,)}
+    
+    @classmethod
+    def for_source(cls, is_webcam, name='live'):
+        """Controller of a live loop: adaptive for webcams, FILE_PROFILE (fixed) for video files"""
+        if is_webcam:
+            return cls(name=name)
+        return cls(name=name, **cls.FILE_PROFILE)
+    
+    @property
+    def imgsz(self):
+        """Current model input size"""
+        return self.imgsz_choices[self.imgsz_index]
+    
+    def should_process(self, frame_count):
+        """Whether the frame with this (1-based) number should go through the model"""
+        return frame_count % self.skip == 0
+    
+    def frame_started(self):
+        """Call right before reading a frame"""
+        now = time.perf_counter()
+        if self._last_start is not None:
+            self._periods.append(now - self._last_start)
+        self._last_start = self._frame_start = now
+    
+    def frame_finished(self, processed):
+        """Call once the frame is displayed, processed tells whether the model ran on it"""
+        if processed:
+            self._latencies.append(time.perf_counter() - self._frame_start)
+            if len(self._latencies) >= self.window:
+                self._adjust()
+    
+    def reset(self):
+        """Forget the current measurements, e.g. after the loop was paused"""
+        self._latencies.clear()
+        self._periods.clear()
+        self._last_start = None
+    
+    def _adjust(self):
+        """Compare the last window with the targets and take at most one step"""
+        latency = float(np.median(self._latencies))
+        fps = len(self._periods) / sum(self._periods) if self._periods else float('inf')
+        self.reset()
+        
+        slow = latency > self.target_latency * (1 + self.tolerance)
+        low_fps = fps < self.target_fps * (1 - self.tolerance)
+        headroom = latency < self.target_latency * (1 - self.tolerance) and \
+            fps > self.target_fps * (1 + self.tolerance)
+        
+        skip, imgsz_index = self.skip, self.imgsz_index
+        if slow and imgsz_index > 0:
+            imgsz_index -= 1
+        elif low_fps and skip < self.max_skip:
+            skip += 1
+        elif low_fps and imgsz_index > 0:
+            imgsz_index -= 1
+        elif headroom and skip > self.min_skip:
+            skip -= 1
+        elif headroom and imgsz_index < len(self.imgsz_choices) - 1:
+            # Only grow the input if the latency (roughly proportional to the pixel count)
+            # still fits the budget afterwards
+            growth = (self.imgsz_choices[imgsz_index + 1] / self.imgsz) ** 2
+            if latency * growth < self.target_latency:
+                imgsz_index += 1
+        
+        if (skip, imgsz_index) == (self.skip, self.imgsz_index):
+            return
+        
+        adjustment = {
+            'time': time.time(),
+            'latency_ms': latency * 1000,
+            'fps': fps,
+            'skip': (self.skip, skip),
+            'imgsz': (self.imgsz, self.imgsz_choices[imgsz_index])
+        }
+        self.adjustments.append(adjustment)
+        print(f"[{self.name}] latency {latency * 1000:.0f} ms (target {self.target_latency * 1000:.0f}), "
+              f"{fps:.1f} FPS (target {self.target_fps}) -> skip {self.skip}->{skip}, "
+              f"imgsz {self.imgsz}->{self.imgsz_choices[imgsz_index]}")
+        self.skip, self.imgsz_index = skip, imgsz_index
+
+
+class MobileOutDetector:
+    """Detector for MOBILE and OUT objects with counting capabilities"""
+    
+    def __init__(self, model_path, conf_threshold=0.25, iou_threshold=0.45, backend='pytorch', imgsz=640,
+                 max_det=300):
+        """
+        Initialize the detector
+        
+        Args:
+            model_path: Path to the trained model weights (best.pt)
+            conf_threshold: Confidence threshold for detections
+            iou_threshold: IOU threshold for NMS
+            backend: Inference runtime, 'pytorch' (default), 'onnx' (ONNX Runtime), 'openvino' or
+                     'onnx-int8' (INT8 quantized, calibrated on videos/). Non-PyTorch backends
+                     export the weights once and cache the result next to them.
+            imgsz: Inference image size (default: 640)
+            max_det: Maximum number of detections per image (default: 300)
+        """
+        print(f"Loading model from: {model_path}")
+        self.model_path = str(model_path)
+        self.backend = backend
+        self.imgsz = imgsz
+        self.model = get_model(model_path, backend, imgsz)
+        self.runtime_path = self.model.runtime_path
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+        self.class_names = {0: 'MOBILE', 1: 'OUT'}
+        
+        print(f"✓ Model loaded successfully")
+        print(f"  Backend: {backend}")
+        print(f"  Confidence threshold: {conf_threshold}")
+        print(f"  IOU threshold: {iou_threshold}")
+    
+    def infer_frames(self, frames, batch_size=1, motion_gate=None, crop=None, tiler=None, conf=None):
+        """
+        Run the model over a stream of frames in micro-batches
+        
+        Frames are accumulated until batch_size is reached and passed to the model
+        in a single call, results are yielded one by one in the original order so
+        downstream tracking sees exactly the same sequence as unbatched inference.
+        
+        Args:
+            frames: Iterable of (frame_number, frame) tuples
+            batch_size: Number of frames per model call (default: 1)
+            motion_gate: Optional MotionGate. Frames without motion skip the model and reuse
+                        the results of the last inferred frame, so the tracker still gets an
+                        update for every frame.
+            crop: Optional (x1, y1, x2, y2) region. Only this region is sent to the model (and
+                  checked by the motion gate), boxes are mapped back to full-frame coordinates.
+            tiler: Optional FrameTiler. Frames are expected at full resolution, the tiler's
+                   classes are detected on tiles and the yielded frames are downscaled.
+            conf: Confidence threshold for this run (default: the detector's conf_threshold)
+            
+        Yields:
+            (frame_number, frame, results) tuples
+        """
+        batch_size = max(1, int(batch_size))
+        batch = []
+        last_results = None
+        
+        for frame_number, frame in frames:
+            if motion_gate is None:
+                run_model = True
+            elif crop is None:
+                run_model = motion_gate.update(frame)
+            else:
+                run_model = motion_gate.update(frame[crop[1]:crop[3], crop[0]:crop[2]])
+            batch.append((frame_number, frame, run_model))
+            if len(batch) >= batch_size:
+                output, last_results = self._infer_batch(batch, last_results, crop, tiler, conf)
+                yield from output
+                batch = []
+        
+        # Flush the last partial batch
+        if batch:
+            output, last_results = self._infer_batch(batch, last_results, crop, tiler, conf)
+            yield from output
+    
+    def _infer_batch(self, batch, last_results, crop=None, tiler=None, conf=None):
+        """
+        Run one model call on the frames of a batch that need inference
+        
+        Args:
+            batch: List of (frame_number, frame, run_model) tuples
+            last_results: Results of the last inferred frame before this batch
+            crop: Optional (x1, y1, x2, y2) region to run the model on
+            tiler: Optional FrameTiler for tiled inference on full resolution frames
+            conf: Confidence threshold (default: the detector's conf_threshold)
+            
+        Returns:
+            (list of (frame_number, frame, results) tuples, results of the last inferred frame)
+        """
+        conf = self.conf_threshold if conf is None else conf
+        to_infer = [frame for _, frame, run_model in batch if run_model]
+        
+        if tiler is not None:
+            # The full resolution frames are only needed for the tiles
+            full_res = to_infer
+            batch = [(frame_number, tiler.resize(frame), run_model) for frame_number, frame, run_model in batch]
+            to_infer = [frame for _, frame, run_model in batch if run_model]
+            inferred = iter(self._predict_tiled(full_res, to_infer, tiler, conf) if to_infer else [])
+        else:
+            imgsz = self.imgsz
+            if crop is not None and to_infer:
+                # Keep the scale of full-frame inference: shrink the input size with the crop
+                # instead of letting the letterbox upscale it
+                x1, y1, x2, y2 = crop
+                scale = self.imgsz / max(to_infer[0].shape[:2])
+                imgsz = min(self.imgsz, -(-int(max(x2 - x1, y2 - y1) * scale) // 32) * 32)
+                to_infer = [frame[y1:y2, x1:x2] for frame in to_infer]
+            
+            inferred = iter(self.model(
+                to_infer,
+                conf=conf,
+                iou=self.iou_threshold,
+                imgsz=imgsz,
+                max_det=self.max_det,
+                verbose=False
+            ) if to_infer else [])
+        
+        output = []
+        for frame_number, frame, run_model in batch:
+            if run_model:
+                last_results = next(inferred)
+                if crop is not None:
+                    last_results = _uncrop_results(last_results, frame, crop)
+                results = last_results
+            else:
+                # Static scene: reuse the last detections, drawn on the current frame
+                results = copy.copy(last_results)
+                results.orig_img = frame
+            output.append((frame_number, frame, results))
+        
+        return output, last_results
+    
+    def _predict_tiled(self, full_res, frames, tiler, conf):
+        """
+        Tiled inference on a batch of frames
+        
+        One model call covers the downscaled frames (restricted to the other classes), a
+        second one all tiles of all frames (restricted to the tiler's classes). Tile boxes
+        are merged with cross-tile NMS and join the full-frame detections.
+        
+        Args:
+            full_res: Full resolution frames
+            frames: The same frames downscaled by the tiler
+            tiler: FrameTiler
+            conf: Confidence threshold
+            
+        Returns:
+            List of Results on the downscaled frames
+        """
+        from ultralytics.engine.results import Results
+        
+        # The full-frame pass only looks for the other classes, so tile classes take no NMS
+        # work or max_det slots there (None would run every class, so with no other class
+        # its boxes are dropped below)
+        other_classes = [class_id for class_id in self.class_names if class_id not in tiler.classes]
+        results = self.model(frames, conf=conf, iou=self.iou_threshold, imgsz=self.imgsz,
+                             classes=other_classes or None, max_det=self.max_det, verbose=False)
+        
+        crops = []
+        owners = []
+        for i, frame in enumerate(full_res):
+            height, width = frame.shape[:2]
+            for x1, y1, x2, y2 in tiler.windows((width, height)):
+                crops.append(frame[y1:y2, x1:x2])
+                owners.append((i, x1, y1))
+        
+        tile_results = self.model(crops, conf=conf, iou=self.iou_threshold, imgsz=tiler.tile_size,
+                                  classes=list(tiler.classes), max_det=self.max_det, verbose=False)
+        
+        tile_boxes = [[] for _ in full_res]
+        for (i, x, y), tile in zip(owners, tile_results):
+            data = tile.boxes.data.cpu().numpy().copy()
+            data[:, [0, 2]] += x
+            data[:, [1, 3]] += y
+            tile_boxes[i].append(data)
+        
+        merged = []
+        for frame, original, boxes, result in zip(frames, full_res, tile_boxes, results):
+            tiled = np.concatenate(boxes)
+            tiled = tiled[nms(tiled[:, :4], tiled[:, -2], tiled[:, -1], self.iou_threshold)]
+            tiled[:, [0, 2]] *= frame.shape[1] / original.shape[1]
+            tiled[:, [1, 3]] *= frame.shape[0] / original.shape[0]
+            
+            full = result.boxes.data.cpu().numpy()
+            if not other_classes:
+                full = full[:0]
+            
+            data = np.concatenate([full, tiled]).astype(np.float32)
+            merged.append(Results(frame, path=result.path, names=result.names,
+                                  boxes=result.boxes.data.new_tensor(data), speed=result.speed))
+        
+        return merged
+    
+    def detect_image(self, image_path, save_path=None, show=False):
+        """
+        Detect objects in a single image
+        
+        Args:
+            image_path: Path to input image
+            save_path: Path to save annotated image (optional)
+            show: Whether to display the result
+            
+        Returns:
+            Dictionary with detection results and counts
+        """
+        # Run inference
+        results = self.model(
+            image_path,
+            conf=self.conf_threshold,
+            iou=self.iou_threshold,
+            imgsz=self.imgsz,
+            max_det=self.max_det,
+            verbose=False
+        )[0]
+        
+        result = self._image_result(image_path, results)
+        
+        # Save annotated image
+        if save_path or show:
+            annotated = self._annotate_image(results, result['counts'])
+            
+            if save_path:
+                cv2.imwrite(str(save_path), annotated)
+                print(f"✓ Saved annotated image to: {save_path}")
+            
+            if show:
+                cv2.imshow('Detection', annotated)
+                cv2.waitKey(0)
+                cv2.destroyAllWindows()
+        
+        return result
+    
+    def detect_frames(self, frames, annotate=False, out=None, names=None, conf=None):
+        """
+        Detect objects in in-memory BGR frames with a single model call
+        
+        Args:
+            frames: List of BGR arrays of shape (H, W, 3)
+            annotate: Also draw the detections, each result gets an 'annotated' array
+            out: Optional list of preallocated BGR arrays (same shapes as frames) to draw into.
+                 Passing the frames themselves annotates in place without any copy.
+            names: Optional list of names stored under 'image' in the results
+            conf: Confidence threshold for this call (default: the detector's conf_threshold)
+            
+        Returns:
+            List of detection result dictionaries (same layout as detect_image)
+        """
+        if len(frames) == 0:
+            return []
+        
+        predictions = self.model(
+            list(frames),
+            conf=self.conf_threshold if conf is None else conf,
+            iou=self.iou_threshold,
+            imgsz=self.imgsz,
+            max_det=self.max_det,
+            verbose=False
+        )
+        
+        output = []
+        for i, (frame, results) in enumerate(zip(frames, predictions)):
+            dets = extract_detections(results)
+            result = self._image_result(names[i] if names else None, dets)
+            if annotate:
+                result['annotated'] = self.draw_detections(
+                    frame, dets, result['counts'], out=out[i] if out is not None else None
+                )
+            output.append(result)
+        
+        return output
+    
+    def detect_frame(self, frame, annotate=False, out=None, name=None, conf=None):
+        """
+        Detect objects in one in-memory BGR frame
+        
+        Args:
+            frame: BGR array of shape (H, W, 3)
+            annotate: Also draw the detections into result['annotated']
+            out: Optional preallocated BGR array to draw into (may be the frame itself)
+            name: Optional name stored under 'image' in the result
+            conf: Confidence threshold for this call (default: the detector's conf_threshold)
+            
+        Returns:
+            Detection result dictionary (same layout as detect_image)
+        """
+        return self.detect_frames([frame], annotate=annotate, out=None if out is None else [out],
+                                  names=None if name is None else [name], conf=conf)[0]
     
-    def __init__(self, model_path, conf_threshold=0.25, iou_threshold=0.45):
+    def detect_bytes(self, data, annotate=False, out=None, name=None, conf=None):
         """
-        Initialize the detector
+        Detect objects in an encoded (JPEG/PNG/...) image without touching the filesystem
         
         Args:
-            model_path: Path to the trained model weights (best.pt)
-            conf_threshold: Confidence threshold for detections
-            iou_threshold: IOU threshold for NMS
+            data: Encoded image bytes
+            annotate, out, name, conf: See detect_frame
+            
+        Returns:
+            Detection result dictionary (same layout as detect_image)
         """
-        print(f"Loading model from: {model_path}")
-        self.model = YOLO(model_path)
-        self.conf_threshold = conf_threshold
-        self.iou_threshold = iou_threshold
-        self.class_names = {0: 'MOBILE', 1: 'OUT'}
-        
-        print(f"✓ Model loaded successfully")
-        print(f"  Confidence threshold: {conf_threshold}")
-        print(f"  IOU threshold: {iou_threshold}")
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Could not decode image data")
+        return self.detect_frame(frame, annotate=annotate, out=out, name=name, conf=conf)
     
-    def detect_image(self, image_path, save_path=None, show=False):
+    def draw_detections(self, frame, dets, counts, out=None):
         """
-        Detect objects in a single image
+        Draw boxes, labels and the count text of one frame
         
         Args:
-            image_path: Path to input image
-            save_path: Path to save annotated image (optional)
-            show: Whether to display the result
+            frame: BGR array the detections belong to
+            dets: Detections of the frame
+            counts: Dictionary of class name -> number of detections
+            out: Optional preallocated array of the same shape to draw into, or the frame
+                 itself to draw in place (default: draw on a copy)
             
         Returns:
-            Dictionary with detection results and counts
+            The annotated array (out when given)
         """
-        # Run inference
-        results = self.model(
-            image_path,
-            conf=self.conf_threshold,
-            iou=self.iou_threshold,
-            verbose=False
-        )[0]
+        if out is None:
+            out = frame.copy()
+        elif out is not frame:
+            np.copyto(out, frame)
         
-        # Count detections by class
-        counts = {'MOBILE': 0, 'OUT': 0}
-        detections = []
+        for (x1, y1, x2, y2), conf, class_id in zip(dets.xyxy.astype(int).tolist(), dets.conf.tolist(),
+                                                    dets.cls.tolist()):
+            color = CLASS_COLORS.get(class_id, (255, 255, 255))
+            cv2.rectangle(out, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(out, f"{self.class_names.get(class_id, class_id)} {conf:.2f}", (x1, max(y1 - 6, 12)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
         
-        for box in results.boxes:
-            class_id = int(box.cls[0])
-            confidence = float(box.conf[0])
-            bbox = box.xyxy[0].cpu().numpy()
-            
-            class_name = self.class_names[class_id]
-            counts[class_name] += 1
-            
-            detections.append({
-                'class': class_name,
+        text = f"MOBILE: {counts['MOBILE']} | OUT: {counts['OUT']}"
+        cv2.rectangle(out, (10, 10), (400, 50), (0, 0, 0), -1)
+        cv2.putText(out, text, (20, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+        return out
+    
+    def _image_result(self, image_path, results):
+        """Build the result dictionary of one image (results may already be Detections)"""
+        # Count detections by class
+        dets = extract_detections(results)
+        counts = dets.counts(self.class_names)
+        detections = [
+            {
+                'class': self.class_names[class_id],
                 'confidence': confidence,
-                'bbox': bbox.tolist()
-            })
+                'bbox': bbox
+            }
+            for bbox, confidence, class_id in zip(dets.xyxy.tolist(), dets.conf.tolist(), dets.cls.tolist())
+        ]
         
-        # Prepare result
-        result = {
-            'image': str(image_path),
+        return {
+            'image': str(image_path) if image_path is not None else None,
             'counts': counts,
             'total_detections': len(detections),
             'detections': detections
         }
+    
+    def _annotate_image(self, results, counts):
+        """Draw the detections and the count text of one image"""
+        annotated = results.plot()
         
-        # Save annotated image
-        if save_path or show:
-            annotated = results.plot()
-            
-            # Add count text
-            h, w = annotated.shape[:2]
-            text = f"MOBILE: {counts['MOBILE']} | OUT: {counts['OUT']}"
-            cv2.rectangle(annotated, (10, 10), (400, 50), (0, 0, 0), -1)
-            cv2.putText(annotated, text, (20, 35), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-            
-            if save_path:
-                cv2.imwrite(str(save_path), annotated)
-                print(f"✓ Saved annotated image to: {save_path}")
-            
-            if show:
-                cv2.imshow('Detection', annotated)
-                cv2.waitKey(0)
-                cv2.destroyAllWindows()
-        
-        return result
+        # Add count text
+        text = f"MOBILE: {counts['MOBILE']} | OUT: {counts['OUT']}"
+        cv2.rectangle(annotated, (10, 10), (400, 50), (0, 0, 0), -1)
+        cv2.putText(annotated, text, (20, 35), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+        return annotated
+    
+    def _write_annotated_image(self, results, counts, save_path):
+        """Annotate one image and write it (runs on the writer pool)"""
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(save_path), self._annotate_image(results, counts))
     
     def detect_video(self, video_path, output_path=None, show=False, process_every_n_frames=2, resize_width=640, 
-                     roi_line=None, roi_config_file=None, enable_tracking=True):
+                     roi_line=None, roi_config_file=None, enable_tracking=True, batch_size=1,
+                     pipeline=False, queue_size=8, motion_threshold=None, roi_padding=None,
+                     tile_size=None, tile_overlap=0.2, tile_classes=(MOBILE_CLASS_ID,),
+                     cache_dir=None, cache_conf=0.05, frame_results_path=None, tracker_assignment=None,
+                     max_match_distance=None, tracker_type='centroid', track_low_conf=None, zones=None,
+                     events_dir=None, events_channel='default', long_running=False, keep_frame_results=False):
         """
         Detect objects in a video with optional ROI line-crossing counting
         
@@ -221,17 +2774,70 @@ class MobileOutDetector:
                      {'x': x_position} for vertical line, or {'line_points': [(x1,y1), (x2,y2)]} for custom line.
             roi_config_file: Path to JSON file with ROI configuration (from setup_roi.py)
             enable_tracking: Enable object tracking for IN/OUT counting (default: True)
+            batch_size: Number of frames sent to the model per call (default: 1). Larger
+                       batches raise throughput on CPU, counts are identical to unbatched runs.
+            pipeline: Run decoding, inference and annotate/encode/write on separate threads
+                     connected by bounded queues (default: False). Frame order is preserved.
+            queue_size: Maximum number of frames waiting between two pipeline stages (default: 8)
+            motion_threshold: Enable the motion gate with this sensitivity (fraction of changed
+                             pixels, e.g. 0.002). Static frames skip inference and reuse the last
+                             detections. None disables the gate (default).
+            roi_padding: Run the model only on a band of this many pixels (in resized frame
+                        coordinates) around the ROI line. Boxes are mapped back to the full
+                        frame, class totals then only cover the band. None uses the full frame.
+            tile_size: Detect tile_classes on overlapping full resolution tiles of this size
+                      instead of the downscaled frame (default: None, no tiling)
+            tile_overlap: Fraction of overlap between neighbouring tiles (default: 0.2)
+            tile_classes: Class IDs detected on tiles, the other classes still use the
+                         downscaled frame (default: MOBILE only)
+            cache_dir: Directory of the detection cache (default: None, no caching). The first
+                      run stores the raw detections, later runs with the same video, model,
+                      imgsz, resize_width and frame stride replay them instead of inferring.
+            cache_conf: Confidence floor the cache stores detections at (default: 0.05), runs
+                       with a lower conf_threshold bypass the cache
+            frame_results_path: Stream the per-frame results to this NDJSON file (default: None,
+                               per-frame results are not kept)
+            tracker_assignment: Tracker matching, 'greedy' or 'optimal' (see CentroidTracker).
+                               Default: greedy for the centroid/array trackers, optimal for motion
+            max_match_distance: Maximum centroid distance in pixels (resized frame coordinates)
+                               for a tracker match (default: None, no gate)
+            tracker_type: 'centroid' (per-object dicts, default), 'array' (ArrayTracker,
+                         vectorized for crowded scenes, same counts) or 'motion' (MotionTracker,
+                         Kalman prediction and IoU association, for frame strides of 3-5)
+            track_low_conf: With the motion tracker, also feed OUT boxes down to this confidence
+                           to its second association stage (default: None). They are not
+                           counted or drawn as detections.
+            zones: Extra counting lines/polygons (see ZoneCounter) in resized frame coordinates,
+                  counted alongside roi_line (the default center line is only used when
+                  neither is given). The totals add up all zones, per-zone counts are
+                  under 'line_crossing' -> 'zones'.
+            events_dir: Log every crossing (track ID, direction, zone, frame, wall-clock and
+                       video time) to a CrossingEventLog in this directory (default: None)
+            events_channel: Channel name of the event log (default: 'default')
+            long_running: 24/7 mode for streams that never end (default: False). Memory stays
+                         bounded: the detection cache is off and track IDs wrap at
+                         TRACK_ID_LIMIT. Per-track counting state is always dropped together
+                         with the track.
+            keep_frame_results: Also return the per-frame results in memory under
+                               'frame_results' when no frame_results_path is given (default:
+                               False). Memory then grows with the length of the video, only
+                               use it for short clips.
             
         Returns:
-            Dictionary with detection statistics including IN/OUT counts
+            Dictionary with detection statistics including IN/OUT counts. Per-frame results are
+            in the file named by 'frame_results_path', or under 'frame_results' with
+            keep_frame_results.
         """
+        if tile_size and roi_padding is not None:
+            raise ValueError("Tiled inference cannot be combined with ROI cropping")
+        
         cap = cv2.VideoCapture(str(video_path))
         
         if not cap.isOpened():
             raise ValueError(f"Could not open video: {video_path}")
         
         # Get video properties
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        fps = cap.get(cv2.CAP_PROP_FPS)  # float, e.g. 29.97, for event timestamps
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -244,57 +2850,38 @@ class MobileOutDetector:
             scale_factor = resize_width / width
             print(f"  Resizing frames from {width}x{height} to {resize_width}x{resize_height} for faster processing")
         
-        # Load ROI configuration from file if provided
-        if roi_config_file:
-            with open(roi_config_file, 'r') as f:
-                roi_config = json.load(f)
-                config_type = roi_config.get('type', 'custom')
-                
-                if config_type == 'horizontal':
-                    y_pos = roi_config.get('y')
-                    roi_line = {'y': int(y_pos * scale_factor)}
-                    print(f"  Loaded horizontal ROI line at Y={y_pos} from: {roi_config_file}")
-                elif config_type == 'vertical':
-                    x_pos = roi_config.get('x')
-                    roi_line = {'x': int(x_pos * scale_factor)}
-                    print(f"  Loaded vertical ROI line at X={x_pos} from: {roi_config_file}")
-                elif config_type == 'custom' or 'line_points' in roi_config:
-                    line_points = roi_config.get('line_points')
-                    if line_points:
-                        # Scale points if video is resized
-                        p1 = (int(line_points[0][0] * scale_factor), int(line_points[0][1] * scale_factor))
-                        p2 = (int(line_points[1][0] * scale_factor), int(line_points[1][1] * scale_factor))
-                        roi_line = {'line_points': [p1, p2]}
-                        print(f"  Loaded custom ROI line from: {roi_config_file}")
-        
-        # Set up ROI line (default: horizontal line at center)
-        if roi_line is None:
-            roi_line = {'y': resize_height // 2 if resize_width and resize_width < width else height // 2}
-        
-        # Determine line type
-        if 'line_points' in roi_line:
-            # Custom line with two points
-            is_custom_line = True
-            is_horizontal = False
-            line_pos = None
-            line_p1, line_p2 = roi_line['line_points']
-        else:
-            # Simple horizontal or vertical line
-            is_custom_line = False
-            is_horizontal = 'y' in roi_line
-            line_pos = roi_line.get('y') if is_horizontal else roi_line.get('x')
-            line_p1, line_p2 = None, None
+        zones = self._resolve_zones(
+            roi_line, zones, roi_config_file, scale_factor,
+            (resize_width, resize_height) if resize_width and resize_width < width else (width, height), width
+        )
+        counter = ZoneCounter(zones)
+        roi_line = next((zone for zone in counter.zones if not ZoneCounter.is_area(zone)), None)
         
         print(f"\nProcessing video: {video_path}")
         print(f"  Resolution: {width}x{height}")
-        print(f"  FPS: {fps}")
+        print(f"  FPS: {fps:.2f}")
         print(f"  Total frames: {total_frames}")
+        if batch_size > 1:
+            print(f"  Batch size: {batch_size}")
+        
+        motion_gate = MotionGate(threshold=motion_threshold) if motion_threshold is not None else None
+        if motion_gate:
+            print(f"  Motion gate enabled (threshold: {motion_threshold})")
+        
+        frame_size = (resize_width, resize_height) if resize_width and resize_width < width else (width, height)
+        crop = counter.band(frame_size, roi_padding) if roi_padding is not None else None
+        if crop:
+            print(f"  ROI crop: {crop} ({(crop[2] - crop[0]) * (crop[3] - crop[1]) / (frame_size[0] * frame_size[1]) * 100:.0f}% of the frame)")
+        
+        tiler = None
+        if tile_size:
+            tiler = FrameTiler(tile_size, tile_overlap, tile_classes,
+                               resize_to=frame_size if frame_size != (width, height) else None)
+            print(f"  Tiled inference: {len(tiler.windows((width, height)))} tiles of {tile_size}px for "
+                  f"{', '.join(self.class_names[c] for c in tiler.classes)}")
         
         if enable_tracking:
-            if is_custom_line:
-                print(f"  ROI Line: Custom line from {line_p1} to {line_p2}")
-            else:
-                print(f"  ROI Line: {'Horizontal' if is_horizontal else 'Vertical'} at {line_pos}")
+            print(f"  Counting zones: {counter.describe()}")
             print(f"  Tracking enabled for IN/OUT counting")
         
         if show:
@@ -322,219 +2909,205 @@ class MobileOutDetector:
         output_size = (resize_width, resize_height) if resize_width and resize_width < width else (width, height)
         if output_path:
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            writer = cv2.VideoWriter(str(output_path), fourcc, fps, output_size)
+            writer = cv2.VideoWriter(str(output_path), fourcc, int(fps), output_size)
         
         # Initialize tracker for IN/OUT counting
-        tracker = CentroidTracker(max_disappeared=30) if enable_tracking else None
+        track_conf = self.conf_threshold
+        tracker_options = {}
+        if enable_tracking and tracker_type == 'motion' and track_low_conf is not None:
+            track_conf = min(track_low_conf, self.conf_threshold)
+            tracker_options['high_conf'] = self.conf_threshold
+        if long_running:
+            tracker_options['id_limit'] = TRACK_ID_LIMIT
+        tracker = make_tracker(tracker_type, max_disappeared=30, max_distance=max_match_distance,
+                               assignment=tracker_assignment, **tracker_options) if enable_tracking else None
         in_count = 0
         out_count = 0
-        counted_ids = set()  # Track which objects have been counted already
         
         # Process video
         frame_count = 0
         processed_count = 0
         total_counts = defaultdict(int)
-        frame_results = []
+        frame_sink = FrameResultsWriter(frame_results_path) if frame_results_path else None
+        frame_results = [] if frame_sink is None and keep_frame_results else None
+        record_frame = frame_sink.write if frame_sink else frame_results.append if frame_results is not None \
+            else (lambda record: None)
+        events = CrossingEventLog(events_dir, events_channel, counter.names) if events_dir and enable_tracking else None
         paused = False  # Pause state for live preview
         
         start_time = time.time()
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            
-            # Skip frames for faster processing
-            if frame_count % process_every_n_frames != 0:
-                continue
-            
-            processed_count += 1
-            
-            # Resize frame for faster inference
-            if resize_width and resize_width < width:
-                frame_resized = cv2.resize(frame, (resize_width, resize_height))
+        cache = None
+        replaying = False
+        if cache_dir:
+            if long_running:
+                print(f"  ⚠️  Detection cache is not used in long-running mode (it holds every frame in memory)")
+            elif crop or tiler or motion_gate:
+                print(f"  ⚠️  Detection cache is not used with ROI crop, tiling or the motion gate")
+            elif track_conf < cache_conf:
+                print(f"  ⚠️  Detection cache is not used below its confidence floor ({cache_conf})")
             else:
-                frame_resized = frame
-            
-            # Run inference on frame
-            results = self.model(
-                frame_resized,
-                conf=self.conf_threshold,
-                iou=self.iou_threshold,
-                verbose=False
-            )[0]
-            
-            # Count detections and collect bounding boxes for tracking
-            frame_counts = {'MOBILE': 0, 'OUT': 0}
-            detections_for_tracking = []
+                cache = DetectionCache(cache_dir, video_path, self, frame_size, process_every_n_frames,
+                                       conf_floor=cache_conf)
+                replaying = cache.load()
+                print(f"  Detection cache: {'replaying' if replaying else 'recording'} {cache.path}")
+        infer_conf = cache.conf_floor if cache else track_conf if track_conf < self.conf_threshold else None
+        stopped_early = False
+        
+        # Decode (and resize) selected frames, then run inference in micro-batches
+        reader = VideoFrameReader(
+            cap,
+            process_every_n_frames=process_every_n_frames,
+            resize_to=(resize_width, resize_height) if resize_width and resize_width < width and not tiler else None
+        )
+        
+        stages = {}
+        write_stage = None
+        try:
+            if replaying:
+                # Frames are only decoded when they have to be drawn
+                frame_stream = cache.replay(track_conf, reader if show or writer else None)
+            elif pipeline:
+                # decode -> infer run on their own threads, tracking/counting stays on this
+                # thread and annotate + encode + write runs on a sink thread
+                stages['decode'] = PipelineStage('decode', reader, maxsize=queue_size)
+                inferred = self.infer_frames(stages['decode'], batch_size=batch_size, motion_gate=motion_gate,
+                                             crop=crop, tiler=tiler, conf=infer_conf)
+                stages['infer'] = PipelineStage(
+                    'infer', cache.record(inferred, track_conf) if cache else inferred, maxsize=queue_size
+                )
+                frame_stream = stages['infer']
+                if writer:
+                    write_stage = FrameSinkStage(
+                        'write', lambda item: writer.write(item() if callable(item) else item), maxsize=queue_size
+                    )
+            else:
+                frame_stream = self.infer_frames(reader, batch_size=batch_size, motion_gate=motion_gate, crop=crop,
+                                                 tiler=tiler, conf=infer_conf)
+                if cache:
+                    frame_stream = cache.record(frame_stream, track_conf)
             
-            for box in results.boxes:
-                class_id = int(box.cls[0])
-                class_name = self.class_names[class_id]
-                frame_counts[class_name] += 1
-                total_counts[class_name] += 1
+            for frame_count, frame_resized, results in frame_stream:
+                processed_count += 1
                 
-                # Collect bounding boxes for tracking (only track OUT for IN/OUT counting)
-                if enable_tracking and class_name == 'OUT':
-                    bbox = box.xyxy[0].cpu().numpy()
-                    detections_for_tracking.append(bbox)
-            
-            # Update tracker and detect line crossings
-            if enable_tracking and tracker is not None:
-                objects = tracker.update(detections_for_tracking)
+                # Count detections and collect bounding boxes for tracking
+                dets = extract_detections(results)
+                track_dets = None
+                if track_conf < self.conf_threshold:
+                    # Boxes below the threshold only reach the tracker's low-confidence stage
+                    track_dets = dets.out
+                    confident = dets.conf >= self.conf_threshold
+                    dets = dets.filter(confident)
+                    results = dets if isinstance(results, Detections) else results[confident]
+                frame_counts = dets.counts(self.class_names)
+                for class_name, count in frame_counts.items():
+                    if count:
+                        total_counts[class_name] += count
                 
-                # Check line crossings for each tracked object
-                for object_id, centroid in objects.items():
-                    cx, cy = centroid
-                    
-                    # Initialize tracking data if new object
-                    if object_id not in tracker.crossed:
-                        tracker.crossed[object_id] = {'crossed': False, 'direction': None, 'start_side': None}
-                    
-                    # Determine which side of the line the object is on
-                    if is_custom_line:
-                        # For custom line, use cross product to determine side
-                        # Vector from p1 to p2
-                        v1 = (line_p2[0] - line_p1[0], line_p2[1] - line_p1[1])
-                        # Vector from p1 to centroid
-                        v2 = (cx - line_p1[0], cy - line_p1[1])
-                        # Cross product
-                        cross = v1[0] * v2[1] - v1[1] * v2[0]
-                        current_side = 'left' if cross > 0 else 'right'
-                    elif is_horizontal:
-                        current_side = 'top' if cy < line_pos else 'bottom'
+                # Update tracker and detect line crossings (only track OUT for IN/OUT counting)
+                if enable_tracking and tracker is not None:
+                    if isinstance(tracker, MotionTracker):
+                        track_dets = track_dets if track_dets is not None else dets.out
+                        objects = tracker.update(track_dets.xyxy, track_dets.conf)
                     else:
-                        current_side = 'left' if cx < line_pos else 'right'
-                    
-                    # Set initial side if not set
-                    if tracker.crossed[object_id]['start_side'] is None:
-                        tracker.crossed[object_id]['start_side'] = current_side
+                        objects = tracker.update(dets.out.xyxy)
                     
-                    # Check if crossed and hasn't been counted yet
-                    if object_id not in counted_ids:
-                        start_side = tracker.crossed[object_id]['start_side']
-                        
-                        # Detect crossing
-                        if is_custom_line or not is_horizontal:
-                            # Custom line or vertical: left to right = OUT, right to left = IN
-                            if start_side == 'left' and current_side == 'right':
-                                out_count += 1
-                                counted_ids.add(object_id)
-                                tracker.crossed[object_id]['crossed'] = True
-                                tracker.crossed[object_id]['direction'] = 'out'
-                            elif start_side == 'right' and current_side == 'left':
-                                in_count += 1
-                                counted_ids.add(object_id)
-                                tracker.crossed[object_id]['crossed'] = True
-                                tracker.crossed[object_id]['direction'] = 'in'
-                        else:
-                            # Horizontal line: top to bottom = OUT, bottom to top = IN
-                            if start_side == 'top' and current_side == 'bottom':
-                                out_count += 1
-                                counted_ids.add(object_id)
-                                tracker.crossed[object_id]['crossed'] = True
-                                tracker.crossed[object_id]['direction'] = 'out'
-                            elif start_side == 'bottom' and current_side == 'top':
-                                in_count += 1
-                                counted_ids.add(object_id)
-                                tracker.crossed[object_id]['crossed'] = True
-                                tracker.crossed[object_id]['direction'] = 'in'
-            
-            frame_results.append({
-                'frame': frame_count,
-                'counts': frame_counts.copy(),
-                'in_count': in_count,
-                'out_count': out_count
-            })
-            
-            # Annotate frame
-            annotated = results.plot()
-            
-            # Draw ROI line
-            if is_custom_line:
-                cv2.line(annotated, line_p1, line_p2, (0, 255, 255), 3)
-                # Draw arrows to show direction
-                mid_x = (line_p1[0] + line_p2[0]) // 2
-                mid_y = (line_p1[1] + line_p2[1]) // 2
-                cv2.circle(annotated, line_p1, 8, (0, 255, 0), -1)  # Start point (IN side)
-                cv2.circle(annotated, line_p2, 8, (0, 0, 255), -1)  # End point (OUT side)
-                cv2.putText(annotated, "IN", (line_p1[0] - 30, line_p1[1] - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                cv2.putText(annotated, "OUT", (line_p2[0] + 10, line_p2[1] - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-            elif is_horizontal:
-                cv2.line(annotated, (0, line_pos), (annotated.shape[1], line_pos), (0, 255, 255), 3)
-                cv2.putText(annotated, "ROI LINE", (annotated.shape[1] - 150, line_pos - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-            else:
-                cv2.line(annotated, (line_pos, 0), (line_pos, annotated.shape[0]), (0, 255, 255), 3)
-                cv2.putText(annotated, "ROI", (line_pos + 10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-            
-            # Draw tracked objects with IDs
-            if enable_tracking and tracker is not None:
-                for object_id, centroid in objects.items():
-                    cx, cy = centroid
-                    # Draw centroid
-                    cv2.circle(annotated, (cx, cy), 5, (0, 255, 0), -1)
-                    # Draw ID
-                    text_id = f"ID:{object_id}"
-                    cv2.putText(annotated, text_id, (cx - 20, cy - 10),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-            
-            # Add count text
-            if enable_tracking:
-                text = f"Frame {frame_count}/{total_frames} | IN: {in_count} | OUT: {out_count}"
-                cv2.rectangle(annotated, (10, 10), (700, 50), (0, 0, 0), -1)
-                cv2.putText(annotated, text, (20, 35),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            else:
-                text = f"Frame {frame_count}/{total_frames} | MOBILE: {frame_counts['MOBILE']} | OUT: {frame_counts['OUT']}"
-                cv2.rectangle(annotated, (10, 10), (700, 50), (0, 0, 0), -1)
-                cv2.putText(annotated, text, (20, 35),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # Write frame
-            if writer:
-                writer.write(annotated)
-            
-            # Show frame with pause/play controls
-            if show:
-                # Add pause status if paused
-                if paused:
-                    cv2.rectangle(annotated, (10, 60), (250, 90), (0, 0, 0), -1)
-                    cv2.putText(annotated, "PAUSED - Press 'P'", (20, 80),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+                    # Check line crossings for each tracked object
+                    crossings = counter.update(tracker, objects)
+                    if events:
+                        events.emit(crossings, frame_count, frame_count / fps if fps else 0.0)
+                    in_count = counter.in_count
+                    out_count = counter.out_count
                 
-                cv2.imshow('Live Detection', annotated)
+                record_frame({
+                    'frame': frame_count,
+                    'counts': frame_counts.copy(),
+                    'in_count': in_count,
+                    'out_count': out_count
+                })
                 
-                # Wait time: 1ms if not paused, indefinite if paused
-                wait_time = 0 if paused else 1
-                key = cv2.waitKey(wait_time) & 0xFF
+                # Count text for the overlay
+                if enable_tracking:
+                    text = f"Frame {frame_count}/{total_frames} | IN: {in_count} | OUT: {out_count}"
+                else:
+                    text = f"Frame {frame_count}/{total_frames} | MOBILE: {frame_counts['MOBILE']} | OUT: {frame_counts['OUT']}"
+                tracked = dict(tracker.objects) if tracker is not None and (show or writer) else None
+                overlay = counter.snapshot() if show or writer else None
                 
-                if key == ord('q') or key == ord('Q'):
-                    print("\n⏹️  Stopped by user")
-                    break
-                elif key == ord('p') or key == ord('P'):
-                    paused = not paused
-                    status = "⏸️  PAUSED" if paused else "▶️  RESUMED"
-                    print(f"\r{status}", end='', flush=True)
-            
-            # Progress update
-            if processed_count % 30 == 0:
-                progress = (frame_count / total_frames) * 100
-                elapsed = time.time() - start_time
-                fps_proc = processed_count / elapsed
-                print(f"  Progress: {progress:.1f}% | Processed {processed_count} frames | FPS: {fps_proc:.1f}")
-        
-        # Cleanup
-        cap.release()
-        if writer:
-            writer.release()
-        if show:
-            cv2.destroyAllWindows()
+                # Annotate and write frame (the write stage gets a snapshot, never the live counter)
+                annotated = None
+                if show or (writer and write_stage is None):
+                    annotated = self._annotate_frame(results, overlay, tracked, text)
+                
+                if write_stage is not None:
+                    write_stage.put(annotated if annotated is not None else
+                                    functools.partial(self._annotate_frame, results, overlay, tracked, text))
+                elif writer:
+                    writer.write(annotated)
+                
+                # Show frame with pause/play controls
+                if show:
+                    # Add pause status if paused
+                    if paused:
+                        annotated = annotated.copy()  # the writer may still hold the original
+                        cv2.rectangle(annotated, (10, 60), (250, 90), (0, 0, 0), -1)
+                        cv2.putText(annotated, "PAUSED - Press 'P'", (20, 80),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+                    
+                    cv2.imshow('Live Detection', annotated)
+                    
+                    # Wait time: 1ms if not paused, indefinite if paused
+                    wait_time = 0 if paused else 1
+                    key = cv2.waitKey(wait_time) & 0xFF
+                    
+                    if key == ord('q') or key == ord('Q'):
+                        print("\n⏹️  Stopped by user")
+                        stopped_early = True
+                        break
+                    elif key == ord('p') or key == ord('P'):
+                        paused = not paused
+                        status = "⏸️  PAUSED" if paused else "▶️  RESUMED"
+                        print(f"\r{status}", end='', flush=True)
+                
+                # Progress update
+                if processed_count % 30 == 0:
+                    progress = (frame_count / total_frames) * 100
+                    elapsed = time.time() - start_time
+                    fps_proc = processed_count / elapsed
+                    print(f"  Progress: {progress:.1f}% | Processed {processed_count} frames | FPS: {fps_proc:.1f}")
+                    if pipeline:
+                        depths = ' | '.join(
+                            f"{stage.name} {stage.stats.current_depth}/{queue_size}"
+                            for stage in list(stages.values()) + ([write_stage] if write_stage else [])
+                        )
+                        print(f"  Queue depth: {depths}")
+        finally:
+            # Stop the pipeline threads and release the video handles, also when the user
+            # quit the preview early or decoding, inference or writing failed
+            for stage in reversed(list(stages.values())):
+                stage.close()
+            try:
+                if write_stage is not None:
+                    write_stage.close()
+            finally:
+                cap.release()
+                if frame_sink:
+                    frame_sink.close()
+                if events:
+                    events.close()
+                if writer:
+                    writer.release()
+                if show:
+                    cv2.destroyAllWindows()
+        
+        if write_stage is not None:
+            stages['write'] = write_stage
+        
+        frame_count = cache.frames_read if replaying and not (show or writer) else reader.frames_read
+        
+        # Only complete runs are cached
+        if cache and not replaying and not stopped_early:
+            cache.save(reader.frames_read)
         
         elapsed_time = time.time() - start_time
         avg_fps = processed_count / elapsed_time
@@ -552,17 +3125,34 @@ class MobileOutDetector:
             'average_per_frame': {
                 'MOBILE': avg_mobile,
                 'OUT': avg_out
-            },
-            'frame_results': frame_results
+            }
         }
         
+        if frame_sink:
+            result['frame_results_path'] = str(frame_sink.path)
+        elif frame_results is not None:
+            result['frame_results'] = frame_results
+        
+        if pipeline:
+            result['pipeline'] = {name: stage.stats.as_dict() for name, stage in stages.items()}
+        
+        if motion_gate:
+            result['motion_gate'] = motion_gate.as_dict()
+        
+        if cache:
+            result['detection_cache'] = {'path': str(cache.path), 'replayed': replaying}
+        
+        if events:
+            result['crossing_events'] = events.as_dict()
+        
         # Add IN/OUT counting results if tracking was enabled
         if enable_tracking:
             result['line_crossing'] = {
                 'in_count': in_count,
                 'out_count': out_count,
                 'total_crossings': in_count + out_count,
-                'roi_line': roi_line
+                'roi_line': roi_line,
+                'zones': counter.counts()
             }
         
         print(f"\n✓ Video processing complete")
@@ -572,29 +3162,315 @@ class MobileOutDetector:
             print(f"    IN:  {in_count}")
             print(f"    OUT: {out_count}")
             print(f"    Total Crossings: {in_count + out_count}")
+            if len(counter.zones) > 1:
+                for zone in counter.counts():
+                    print(f"    {zone['name']}: IN {zone['in_count']} | OUT {zone['out_count']}")
         
         print(f"  Total detections - MOBILE: {total_counts['MOBILE']}, OUT: {total_counts['OUT']}")
         print(f"  Average per frame - MOBILE: {avg_mobile:.2f}, OUT: {avg_out:.2f}")
         print(f"  Processing FPS: {avg_fps:.2f}")
+        if motion_gate:
+            print(f"  Motion gate skipped {motion_gate.skipped}/{motion_gate.frames} frames "
+                  f"({motion_gate.as_dict()['skip_fraction'] * 100:.1f}%)")
         
         if output_path:
             print(f"  Output saved to: {output_path}")
         
         return result
     
-    def detect_batch(self, image_dir, output_dir=None):
+    def detect_video_parallel(self, video_path, workers=None, segment_frames=None, process_every_n_frames=2,
+                              resize_width=640, roi_line=None, roi_config_file=None, enable_tracking=True,
+                              batch_size=1, roi_padding=None, frame_results_path=None, tracker_assignment=None,
+                              max_match_distance=None, tracker_type='centroid', zones=None,
+                              events_dir=None, events_channel='default', keep_frame_results=False):
         """
-        Detect objects in a batch of images
+        Detect objects in a long video by splitting it into frame ranges processed in parallel
+        
+        Every worker process loads its own MobileOutDetector and runs inference on one frame
+        range at a time, returning only the per-frame class counts and OUT boxes. Tracking and
+        line-crossing counting are then replayed by a single tracker over the merged detections
+        in frame order, so track state carries over segment boundaries. No annotated video is
+        written.
+        
+        Every segment starts exactly at its first frame (see VideoFrameReader.seek), so the
+        merged counts match a sequential detect_video run with the same settings. Workers are
+        started with 'spawn', so they never inherit the parent's model or threads.
         
         Args:
-            image_dir: Directory containing images
-            output_dir: Directory to save annotated images (optional)
+            video_path: Path to input video
+            workers: Number of worker processes (default: number of CPU cores)
+            segment_frames: Frames per segment (default: split into 4 segments per worker)
+            process_every_n_frames: Process every N frames (default: 2)
+            resize_width: Resize frame width for faster processing (default: 640)
+            roi_line: ROI line coordinates, same format as detect_video
+            roi_config_file: Path to JSON file with ROI configuration (from setup_roi.py)
+            enable_tracking: Enable object tracking for IN/OUT counting (default: True)
+            batch_size: Number of frames sent to the model per call inside each worker (default: 1)
+            roi_padding: Run the model only on a band around the ROI line, same as detect_video
+            frame_results_path: Stream the per-frame results to this NDJSON file, same as detect_video
+            tracker_assignment: Tracker matching, same as detect_video
+            max_match_distance: Tracker distance gate, same as detect_video
+            tracker_type: Tracker implementation, same as detect_video
+            zones: Extra counting lines/polygons, same as detect_video
+            events_dir: Crossing event log directory, same as detect_video
+            events_channel: Channel name of the event log, same as detect_video
+            keep_frame_results: Return the per-frame results in memory, same as detect_video
             
         Returns:
-            List of detection results
+            Dictionary with detection statistics including IN/OUT counts (same layout as detect_video)
+        """
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+        
+        fps = cap.get(cv2.CAP_PROP_FPS)  # float, e.g. 29.97, for event timestamps
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        
+        # Calculate resize dimensions
+        resize_to = None
+        scale_factor = 1.0
+        if resize_width and resize_width < width:
+            resize_to = (resize_width, int(height * (resize_width / width)))
+            scale_factor = resize_width / width
+        
+        zones = self._resolve_zones(roi_line, zones, roi_config_file, scale_factor, resize_to or (width, height), width)
+        counter = ZoneCounter(zones)
+        roi_line = next((zone for zone in counter.zones if not ZoneCounter.is_area(zone)), None)
+        crop = counter.band(resize_to or (width, height), roi_padding) if roi_padding is not None else None
+        
+        # Split the video into frame ranges, the last segment reads until the real end of the
+        # file because CAP_PROP_FRAME_COUNT is only an estimate for some containers
+        workers = workers or os.cpu_count() or 1
+        if not segment_frames:
+            segment_frames = max(process_every_n_frames, -(-total_frames // (workers * 4)))
+        segments = []
+        for start in range(0, max(total_frames, 1), segment_frames):
+            segments.append([start, start + segment_frames])
+        segments[-1][1] = None
+        
+        print(f"\nProcessing video in parallel: {video_path}")
+        print(f"  Resolution: {width}x{height}")
+        print(f"  FPS: {fps:.2f}")
+        print(f"  Total frames: {total_frames}")
+        print(f"  Workers: {workers} | Segments: {len(segments)} x {segment_frames} frames")
+        if enable_tracking:
+            print(f"  Counting zones: {counter.describe()}")
+            print(f"  Tracking enabled for IN/OUT counting")
+        
+        tracker = make_tracker(tracker_type, max_disappeared=30, max_distance=max_match_distance,
+                               assignment=tracker_assignment) if enable_tracking else None
+        frame_count = 0
+        processed_count = 0
+        total_counts = defaultdict(int)
+        frame_sink = FrameResultsWriter(frame_results_path) if frame_results_path else None
+        frame_results = [] if frame_sink is None and keep_frame_results else None
+        record_frame = frame_sink.write if frame_sink else frame_results.append if frame_results is not None \
+            else (lambda record: None)
+        events = CrossingEventLog(events_dir, events_channel, counter.names) if events_dir and enable_tracking else None
+        
+        start_time = time.time()
+        
+        # Segments are merged in order as they complete, so the replay starts while
+        # later segments are still being inferred
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_segment_worker,
+                initargs=(self.model_path, self.conf_threshold, self.iou_threshold, self.backend, self.imgsz,
+                          torch_threads)
+            ) as executor:
+                jobs = [
+                    (str(video_path), start, end, process_every_n_frames, resize_to, batch_size, crop)
+                    for start, end in segments
+                ]
+                for segment_index, segment in enumerate(executor.map(_detect_segment, jobs), 1):
+                    frame_numbers, class_counts, out_boxes, box_offsets, frames_read = segment
+                    frame_count = max(frame_count, frames_read)
+                    
+                    for i, frame_number in enumerate(frame_numbers):
+                        processed_count += 1
+                        frame_counts = {
+                            name: int(class_counts[i, class_id]) for class_id, name in self.class_names.items()
+                        }
+                        for name, count in frame_counts.items():
+                            if count:
+                                total_counts[name] += count
+                        
+                        if enable_tracking:
+                            boxes = out_boxes[box_offsets[i]:box_offsets[i + 1]]
+                            objects = tracker.update(boxes)
+                            crossings = counter.update(tracker, objects)
+                            if events:
+                                events.emit(crossings, int(frame_number), frame_number / fps if fps else 0.0)
+                        
+                        record_frame({
+                            'frame': int(frame_number),
+                            'counts': frame_counts,
+                            'in_count': counter.in_count,
+                            'out_count': counter.out_count
+                        })
+                    
+                    elapsed = time.time() - start_time
+                    print(f"  Segment {segment_index}/{len(segments)} merged | "
+                          f"Processed {processed_count} frames | FPS: {processed_count / elapsed:.1f}")
+        finally:
+            if frame_sink:
+                frame_sink.close()
+            if events:
+                events.close()
+        
+        elapsed_time = time.time() - start_time
+        avg_fps = processed_count / elapsed_time if elapsed_time > 0 else 0
+        
+        # Calculate statistics
+        avg_mobile = total_counts['MOBILE'] / processed_count if processed_count > 0 else 0
+        avg_out = total_counts['OUT'] / processed_count if processed_count > 0 else 0
+        
+        result = {
+            'video': str(video_path),
+            'total_frames': frame_count,
+            'processing_time': elapsed_time,
+            'avg_fps': avg_fps,
+            'total_counts': dict(total_counts),
+            'average_per_frame': {
+                'MOBILE': avg_mobile,
+                'OUT': avg_out
+            },
+            'parallel': {
+                'workers': workers,
+                'segments': len(segments),
+                'segment_frames': segment_frames
+            }
+        }
+        
+        if frame_sink:
+            result['frame_results_path'] = str(frame_sink.path)
+        elif frame_results is not None:
+            result['frame_results'] = frame_results
+        
+        if events:
+            result['crossing_events'] = events.as_dict()
+        
+        if enable_tracking:
+            result['line_crossing'] = {
+                'in_count': counter.in_count,
+                'out_count': counter.out_count,
+                'total_crossings': counter.in_count + counter.out_count,
+                'roi_line': roi_line,
+                'zones': counter.counts()
+            }
+        
+        print(f"\n✓ Parallel video processing complete")
+        
+        if enable_tracking:
+            print(f"  LINE CROSSING COUNTS:")
+            print(f"    IN:  {counter.in_count}")
+            print(f"    OUT: {counter.out_count}")
+            print(f"    Total Crossings: {counter.in_count + counter.out_count}")
+            if len(counter.zones) > 1:
+                for zone in counter.counts():
+                    print(f"    {zone['name']}: IN {zone['in_count']} | OUT {zone['out_count']}")
+        
+        print(f"  Total detections - MOBILE: {total_counts['MOBILE']}, OUT: {total_counts['OUT']}")
+        print(f"  Average per frame - MOBILE: {avg_mobile:.2f}, OUT: {avg_out:.2f}")
+        print(f"  Processing FPS: {avg_fps:.2f}")
+        
+        return result
+    
+    def _resolve_zones(self, roi_line, zones, roi_config_file, scale_factor, frame_size, video_width=None):
+        """
+        Determine the counting zones: the ROI line plus any extra zones
+        
+        Args:
+            roi_line: ROI line dict given by the caller (or None)
+            zones: Extra zone dicts given by the caller (or None), in processed frame coordinates
+            roi_config_file: Path to JSON file with ROI configuration (setup_roi.py line and/or
+                            templates/roi_editor.html boxes), its line overrides roi_line
+            scale_factor: Factor from original video coordinates to processed frame coordinates
+            frame_size: (width, height) of the processed frames, used for the default line
+            video_width: Width of the original video, used to rescale boxes drawn on another size
+            
+        Returns:
+            List of zone dicts for ZoneCounter in processed frame coordinates
+        """
+        file_zones = []
+        if roi_config_file:
+            file_zones = load_zones(roi_config_file, scale_factor, video_width)
+            print(f"  Loaded {len(file_zones)} counting zone(s) from: {roi_config_file}")
+            if any(not ZoneCounter.is_area(zone) for zone in file_zones):
+                roi_line = None
+        
+        resolved = ([roi_line] if roi_line else []) + file_zones + list(zones or [])
+        
+        # Default: horizontal line at center
+        if not resolved:
+            resolved = [{'y': frame_size[1] // 2}]
+        
+        return resolved
+    
+    def _annotate_frame(self, results, zones, objects, text):
+        """
+        Draw detections, the counting zones, tracked objects and the count text on a frame
+        
+        Args:
+            results: Model results for the frame
+            zones: ZoneSnapshot (or ZoneCounter) whose zones and counts are drawn
+            objects: Dictionary of object_id -> centroid, or None when tracking is disabled
+            text: Status text drawn in the top-left corner
+            
+        Returns:
+            Annotated frame (new array)
+        """
+        annotated = results.plot()
+        
+        # Draw ROI lines and zones
+        zones.draw(annotated)
+        
+        # Draw tracked objects with IDs
+        if objects is not None:
+            for object_id, centroid in objects.items():
+                cx, cy = centroid
+                cv2.circle(annotated, (cx, cy), 5, (0, 255, 0), -1)
+                cv2.putText(annotated, f"ID:{object_id}", (cx - 20, cy - 10),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        
+        # Add count text
+        cv2.rectangle(annotated, (10, 10), (700, 50), (0, 0, 0), -1)
+        cv2.putText(annotated, text, (20, 35),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        
+        return annotated
+    
+    def iter_detect_batch(self, image_dir, output_dir=None, batch_size=8, loaders=None, writers=None,
+                          extensions=IMAGE_EXTENSIONS, recursive=True):
+        """
+        Detect objects in a directory of images, yielding results as they are ready
+        
+        Images are decoded by a thread pool, passed to the model in batches and the annotated
+        copies are drawn and written by a second thread pool, so decoding, inference and
+        encoding overlap. Only a bounded number of images is in flight at any time.
+        
+        Args:
+            image_dir: Directory containing images
+            output_dir: Directory to save annotated images, mirroring the input tree (optional)
+            batch_size: Images per model call (default: 8)
+            loaders: Image decoding threads (default: number of CPU cores)
+            writers: Annotation/encoding threads (default: number of CPU cores)
+            extensions: Image file extensions to include (case-insensitive)
+            recursive: Include images in subdirectories (default: True)
+            
+        Yields:
+            Detection result dictionaries (same layout as detect_image) in file order. Images
+            that cannot be decoded yield a result with zero counts and an 'error' key.
         """
         image_dir = Path(image_dir)
-        image_files = list(image_dir.glob('*.jpg')) + list(image_dir.glob('*.png'))
+        pattern = '**/*' if recursive else '*'
+        image_files = sorted(p for p in image_dir.glob(pattern) if p.suffix.lower() in extensions and p.is_file())
         
         if not image_files:
             raise ValueError(f"No images found in {image_dir}")
@@ -605,30 +3481,166 @@ class MobileOutDetector:
             output_dir = Path(output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
         
+        batch_size = max(1, int(batch_size))
+        cores = os.cpu_count() or 1
+        prefetch = batch_size * 4
+        
+        with ThreadPoolExecutor(loaders or cores, thread_name_prefix='load') as load_pool, \
+                ThreadPoolExecutor(writers or cores, thread_name_prefix='write') as write_pool:
+            files = iter(image_files)
+            loading = deque()
+            writing = deque()
+            
+            def fill():
+                for path in files:
+                    loading.append((path, load_pool.submit(cv2.imread, str(path))))
+                    if len(loading) >= prefetch:
+                        break
+            
+            fill()
+            while loading:
+                batch = []
+                while loading and len(batch) < batch_size:
+                    path, future = loading.popleft()
+                    batch.append((path, future.result()))
+                fill()
+                
+                images = [image for _, image in batch if image is not None]
+                predictions = iter(self.model(
+                    images,
+                    conf=self.conf_threshold,
+                    iou=self.iou_threshold,
+                    imgsz=self.imgsz,
+                    max_det=self.max_det,
+                    verbose=False
+                ) if images else [])
+                
+                for path, image in batch:
+                    if image is None:
+                        print(f"⚠️  Could not read image: {path}")
+                        yield {'image': str(path), 'counts': {name: 0 for name in self.class_names.values()},
+                               'total_detections': 0, 'detections': [], 'error': 'unreadable'}
+                        continue
+                    
+                    results = next(predictions)
+                    result = self._image_result(path, results)
+                    if output_dir:
+                        writing.append(write_pool.submit(
+                            self._write_annotated_image, results, result['counts'],
+                            output_dir / path.relative_to(image_dir)
+                        ))
+                    yield result
+                
+                # Keep the writer backlog bounded and surface write errors early
+                while len(writing) > prefetch or (writing and writing[0].done()):
+                    writing.popleft().result()
+            
+            for future in writing:
+                future.result()
+    
+    def detect_batch(self, image_dir, output_dir=None, batch_size=8, loaders=None, writers=None,
+                     extensions=IMAGE_EXTENSIONS, recursive=True):
+        """
+        Detect objects in a batch of images
+        
+        Args:
+            image_dir: Directory containing images
+            output_dir: Directory to save annotated images (optional)
+            batch_size, loaders, writers, extensions, recursive: See iter_detect_batch
+            
+        Returns:
+            List of detection results
+        """
         results = []
         total_counts = {'MOBILE': 0, 'OUT': 0}
+        start_time = time.time()
         
-        for i, img_path in enumerate(image_files, 1):
-            save_path = None
-            if output_dir:
-                save_path = output_dir / img_path.name
-            
-            result = self.detect_image(img_path, save_path=save_path)
+        for i, result in enumerate(self.iter_detect_batch(image_dir, output_dir, batch_size=batch_size,
+                                                          loaders=loaders, writers=writers,
+                                                          extensions=extensions, recursive=recursive), 1):
             results.append(result)
             
             total_counts['MOBILE'] += result['counts']['MOBILE']
             total_counts['OUT'] += result['counts']['OUT']
             
-            if i % 10 == 0:
-                print(f"  Processed {i}/{len(image_files)} images")
+            if i % 100 == 0:
+                print(f"  Processed {i} images | {i / (time.time() - start_time):.1f} images/s")
         
         print(f"\n✓ Batch processing complete")
         print(f"  Total detections - MOBILE: {total_counts['MOBILE']}, OUT: {total_counts['OUT']}")
-        print(f"  Average per image - MOBILE: {total_counts['MOBILE']/len(image_files):.2f}, OUT: {total_counts['OUT']/len(image_files):.2f}")
+        print(f"  Average per image - MOBILE: {total_counts['MOBILE']/len(results):.2f}, OUT: {total_counts['OUT']/len(results):.2f}")
         
         return results
 
 
+# Detector of the current segment worker process (see detect_video_parallel)
+_segment_detector = None
+
+
+def _init_segment_worker(model_path, conf_threshold, iou_threshold, backend, imgsz, torch_threads):
+    """Load the model once per worker process"""
+    global _segment_detector
+    
+    # Split the cores between workers instead of oversubscribing them
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    
+    _segment_detector = MobileOutDetector(
+        model_path, conf_threshold=conf_threshold, iou_threshold=iou_threshold, backend=backend, imgsz=imgsz
+    )
+
+
+def _detect_segment(job):
+    """
+    Run inference on one frame range of a video inside a worker process
+    
+    Returns:
+        (frame_numbers, class_counts, out_boxes, box_offsets, frames_read) where the OUT boxes
+        of the i-th processed frame are out_boxes[box_offsets[i]:box_offsets[i + 1]]
+    """
+    video_path, start_frame, end_frame, process_every_n_frames, resize_to, batch_size, crop = job
+    detector = _segment_detector
+    
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+    
+    reader = VideoFrameReader(
+        cap,
+        process_every_n_frames=process_every_n_frames,
+        resize_to=resize_to,
+        start_frame=start_frame,
+        end_frame=end_frame
+    )
+    
+    frame_numbers = []
+    class_counts = []
+    out_boxes = []
+    box_offsets = [0]
+    
+    for frame_number, _, results in detector.infer_frames(reader, batch_size=batch_size, crop=crop):
+        dets = extract_detections(results)
+        
+        frame_numbers.append(frame_number)
+        class_counts.append(np.bincount(dets.cls, minlength=len(detector.class_names)))
+        out_boxes.append(dets.out.xyxy)
+        box_offsets.append(box_offsets[-1] + len(out_boxes[-1]))
+    
+    cap.release()
+    
+    return (
+        np.asarray(frame_numbers, dtype=np.int64),
+        np.asarray(class_counts, dtype=np.int32).reshape(-1, len(detector.class_names)),
+        np.concatenate(out_boxes) if out_boxes else np.zeros((0, 4), dtype=np.float32),
+        np.asarray(box_offsets, dtype=np.int64),
+        reader.frames_read
+    )
+
+
 def main():
     """Example usage"""
     import argparse
@@ -639,6 +3651,8 @@ def main():
     parser.add_argument('--output', type=str, help='Path to save output')
     parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
     parser.add_argument('--iou', type=float, default=0.45, help='IOU threshold')
+    parser.add_argument('--backend', type=str, default='pytorch', choices=list(BACKENDS), help='Inference runtime (onnx/openvino/onnx-int8 export once and cache next to the weights)')
+    parser.add_argument('--imgsz', type=int, default=640, help='Inference image size')
     parser.add_argument('--show', action='store_true', help='Show live detection preview (real-time display)')
     parser.add_argument('--no-show', action='store_true', help='Disable live preview (process in background only)')
     parser.add_argument('--save-json', type=str, help='Save results to JSON file')
@@ -646,11 +3660,32 @@ def main():
     parser.add_argument('--roi-x', type=int, help='Vertical ROI line X position (for counting IN/OUT)')
     parser.add_argument('--roi-config', type=str, help='Path to ROI config JSON file (from setup_roi.py)')
     parser.add_argument('--no-tracking', action='store_true', help='Disable object tracking for IN/OUT counting')
+    parser.add_argument('--batch-size', type=int, help='Frames/images per model call (default: 1 for videos, 8 for image folders)')
+    parser.add_argument('--pipeline', action='store_true', help='Overlap decoding, inference and video writing on separate threads')
+    parser.add_argument('--motion-gate', action='store_true', help='Skip inference on static frames and reuse the last detections')
+    parser.add_argument('--motion-threshold', type=float, default=0.002, help='Motion gate sensitivity: fraction of changed pixels that counts as motion')
+    parser.add_argument('--roi-crop', type=int, metavar='PADDING', help='Only run detection on a band of PADDING pixels around the ROI line')
+    parser.add_argument('--tile-size', type=int, help='Detect small objects on overlapping full resolution tiles of this size')
+    parser.add_argument('--tile-overlap', type=float, default=0.2, help='Overlap between neighbouring tiles (fraction)')
+    parser.add_argument('--tile-classes', nargs='+', default=['MOBILE'], choices=['MOBILE', 'OUT'], help='Classes detected on tiles, the others use the downscaled frame')
+    parser.add_argument('--cache-dir', type=str, nargs='?', const='.detection_cache', help='Cache raw detections here and replay them on later runs (default dir: .detection_cache)')
+    parser.add_argument('--cache-conf', type=float, default=0.05, help='Confidence floor of the detection cache')
+    parser.add_argument('--frame-results', type=str, help='Stream per-frame video results to this NDJSON file (default with --save-json: <name>.frames.ndjson)')
+    parser.add_argument('--tracker', type=str, default='centroid', choices=list(TRACKERS), help='Tracker implementation: centroid (per-object dicts), array (vectorized, for crowded scenes) or motion (Kalman/IoU, for frame strides of 3-5)')
+    parser.add_argument('--tracker-assignment', type=str, choices=list(TRACKER_ASSIGNMENTS), help='Tracker matching: greedy nearest-first or optimal (Hungarian) assignment (default: greedy, optimal for --tracker motion)')
+    parser.add_argument('--track-low-conf', type=float, help='With --tracker motion, feed OUT boxes down to this confidence to the tracker (not counted)')
+    parser.add_argument('--process-every-n-frames', type=int, default=2, help='Frame stride for videos (default: 2)')
+    parser.add_argument('--max-match-distance', type=float, help='Maximum centroid distance in pixels for a tracker match (default: no gate)')
+    parser.add_argument('--long-running', action='store_true', help='24/7 mode for live streams: bounded memory, wrapping track IDs')
+    parser.add_argument('--events-dir', type=str, help='Log every IN/OUT crossing with timestamps to <dir>/<channel>/<date>.ndjson')
+    parser.add_argument('--channel', type=str, default='default', help='Channel name used for the crossing event log')
+    parser.add_argument('--workers', type=int, default=1, help='Split long videos into segments processed by N worker processes (no annotated output)')
     
     args = parser.parse_args()
     
     # Initialize detector
-    detector = MobileOutDetector(args.model, conf_threshold=args.conf, iou_threshold=args.iou)
+    detector = MobileOutDetector(args.model, conf_threshold=args.conf, iou_threshold=args.iou,
+                                 backend=args.backend, imgsz=args.imgsz)
     
     source_path = Path(args.source)
     
@@ -672,21 +3707,64 @@ def main():
     if source_path.is_file():
         # Check if video or image
         if source_path.suffix.lower() in ['.mp4', '.avi', '.mov', '.mkv']:
-            # Video - show live preview by default
-            results = detector.detect_video(
-                source_path, 
-                output_path=args.output, 
-                show=show_live,
-                roi_line=roi_line,
-                roi_config_file=args.roi_config,
-                enable_tracking=enable_tracking
-            )
+            # Per-frame results go to an NDJSON file next to the summary JSON, not into it
+            frame_results_path = args.frame_results
+            if frame_results_path is None and args.save_json:
+                frame_results_path = str(Path(args.save_json).with_suffix('.frames.ndjson'))
+            
+            if args.workers > 1:
+                if args.output:
+                    print("⚠️  --output is ignored in parallel mode (--workers > 1)")
+                results = detector.detect_video_parallel(
+                    source_path,
+                    workers=args.workers,
+                    roi_line=roi_line,
+                    roi_config_file=args.roi_config,
+                    enable_tracking=enable_tracking,
+                    batch_size=args.batch_size or 1,
+                    roi_padding=args.roi_crop,
+                    frame_results_path=frame_results_path,
+                    tracker_assignment=args.tracker_assignment,
+                    max_match_distance=args.max_match_distance,
+                    tracker_type=args.tracker,
+                    process_every_n_frames=args.process_every_n_frames,
+                    events_dir=args.events_dir,
+                    events_channel=args.channel
+                )
+            else:
+                # Video - show live preview by default
+                results = detector.detect_video(
+                    source_path, 
+                    output_path=args.output, 
+                    show=show_live,
+                    roi_line=roi_line,
+                    roi_config_file=args.roi_config,
+                    enable_tracking=enable_tracking,
+                    batch_size=args.batch_size or 1,
+                    pipeline=args.pipeline,
+                    motion_threshold=args.motion_threshold if args.motion_gate else None,
+                    roi_padding=args.roi_crop,
+                    tile_size=args.tile_size,
+                    tile_overlap=args.tile_overlap,
+                    tile_classes=[MOBILE_CLASS_ID if name == 'MOBILE' else OUT_CLASS_ID for name in args.tile_classes],
+                    cache_dir=args.cache_dir,
+                    cache_conf=args.cache_conf,
+                    frame_results_path=frame_results_path,
+                    tracker_assignment=args.tracker_assignment,
+                    max_match_distance=args.max_match_distance,
+                    tracker_type=args.tracker,
+                    track_low_conf=args.track_low_conf,
+                    process_every_n_frames=args.process_every_n_frames,
+                    events_dir=args.events_dir,
+                    events_channel=args.channel,
+                    long_running=args.long_running
+                )
         else:
             # Image
             results = detector.detect_image(source_path, save_path=args.output, show=args.show)
     elif source_path.is_dir():
         # Batch processing
-        results = detector.detect_batch(source_path, output_dir=args.output)
+        results = detector.detect_batch(source_path, output_dir=args.output, batch_size=args.batch_size or 8)
     else:
         raise ValueError(f"Invalid source: {args.source}")
     
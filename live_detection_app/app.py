@@ -8,10 +8,14 @@ from werkzeug.utils import secure_filename
 import cv2
 import os
 import json
+import sys
 import threading
 import time
 from pathlib import Path
-from inference import MobileOutDetector, CentroidTracker
+
+# The detector, trackers and counters live once in the repository root's inference.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inference import MobileOutDetector, ArrayTracker, ZoneCounter, extract_detections, load_zones
 import numpy as np
 
 app = Flask(__name__)
@@ -68,44 +72,20 @@ def process_video_live(video_path, model_path, roi_config_file=None, conf_thresh
         
         processing_stats['total_frames'] = total_frames
         
-        # Load ROI configuration
-        roi_line = None
-        is_custom_line = False
-        is_horizontal = False
-        line_pos = None
-        line_p1, line_p2 = None, None
-        
+        # Load ROI line and IN/OUT boxes
+        zones = []
         if roi_config_file and os.path.exists(roi_config_file):
-            with open(roi_config_file, 'r') as f:
-                roi_config = json.load(f)
-                config_type = roi_config.get('type', 'custom')
-                
-                if config_type == 'horizontal':
-                    roi_line = {'y': roi_config.get('y')}
-                elif config_type == 'vertical':
-                    roi_line = {'x': roi_config.get('x')}
-                elif config_type == 'custom' or 'line_points' in roi_config:
-                    line_points = roi_config.get('line_points')
-                    if line_points:
-                        roi_line = {'line_points': line_points}
+            zones = load_zones(roi_config_file, video_width=width)
         
         # Default ROI line if not configured
-        if roi_line is None:
-            roi_line = {'y': height // 2}
+        if not zones:
+            zones = [{'y': height // 2}]
         
-        # Determine line type
-        if 'line_points' in roi_line:
-            is_custom_line = True
-            line_p1, line_p2 = roi_line['line_points']
-        else:
-            is_horizontal = 'y' in roi_line
-            line_pos = roi_line.get('y') if is_horizontal else roi_line.get('x')
-        
-        # Initialize tracker
-        tracker = CentroidTracker(max_disappeared=30)
+        # Initialize tracker and zone counter
+        tracker = ArrayTracker(max_disappeared=30)
+        counter = ZoneCounter(zones)
         in_count = 0
         out_count = 0
-        counted_ids = set()
         
         # Output video writer
         output_path = os.path.join(app.config['OUTPUT_FOLDER'], 'processed_' + os.path.basename(video_path))
@@ -131,58 +111,12 @@ def process_video_live(video_path, model_path, roi_config_file=None, conf_thresh
                 verbose=False
             )[0]
             
-            # Collect detections for tracking
-            detections_for_tracking = []
-            for box in results.boxes:
-                class_id = int(box.cls[0])
-                class_name = detector.class_names[class_id]
-                
-                if class_name == 'OUT':
-                    bbox = box.xyxy[0].cpu().numpy()
-                    detections_for_tracking.append(bbox)
-            
-            # Update tracker
-            objects = tracker.update(detections_for_tracking)
-            
-            # Check line crossings
-            for object_id, centroid in objects.items():
-                cx, cy = centroid
-                
-                if object_id not in tracker.crossed:
-                    tracker.crossed[object_id] = {'crossed': False, 'direction': None, 'start_side': None}
-                
-                # Determine side
-                if is_custom_line:
-                    v1 = (line_p2[0] - line_p1[0], line_p2[1] - line_p1[1])
-                    v2 = (cx - line_p1[0], cy - line_p1[1])
-                    cross = v1[0] * v2[1] - v1[1] * v2[0]
-                    current_side = 'left' if cross > 0 else 'right'
-                elif is_horizontal:
-                    current_side = 'top' if cy < line_pos else 'bottom'
-                else:
-                    current_side = 'left' if cx < line_pos else 'right'
-                
-                if tracker.crossed[object_id]['start_side'] is None:
-                    tracker.crossed[object_id]['start_side'] = current_side
-                
-                # Detect crossing
-                if object_id not in counted_ids:
-                    start_side = tracker.crossed[object_id]['start_side']
-                    
-                    if is_custom_line or not is_horizontal:
-                        if start_side == 'left' and current_side == 'right':
-                            out_count += 1
-                            counted_ids.add(object_id)
-                        elif start_side == 'right' and current_side == 'left':
-                            in_count += 1
-                            counted_ids.add(object_id)
-                    else:
-                        if start_side == 'top' and current_side == 'bottom':
-                            out_count += 1
-                            counted_ids.add(object_id)
-                        elif start_side == 'bottom' and current_side == 'top':
-                            in_count += 1
-                            counted_ids.add(object_id)
+            # Update tracker with the OUT boxes and check crossings of every zone
+            tracker.update(extract_detections(results).out.xyxy)
+            counter.update(tracker)
+            in_count = counter.in_count
+            out_count = counter.out_count
+            objects = tracker.objects
             
             processing_stats['in_count'] = in_count
             processing_stats['out_count'] = out_count
@@ -190,15 +124,8 @@ def process_video_live(video_path, model_path, roi_config_file=None, conf_thresh
             # Annotate frame
             annotated = results.plot()
             
-            # Draw ROI line
-            if is_custom_line:
-                cv2.line(annotated, tuple(line_p1), tuple(line_p2), (0, 255, 255), 3)
-                cv2.circle(annotated, tuple(line_p1), 8, (0, 255, 0), -1)
-                cv2.circle(annotated, tuple(line_p2), 8, (0, 0, 255), -1)
-            elif is_horizontal:
-                cv2.line(annotated, (0, line_pos), (width, line_pos), (0, 255, 255), 3)
-            else:
-                cv2.line(annotated, (line_pos, 0), (line_pos, height), (0, 255, 255), 3)
+            # Draw ROI lines and boxes
+            counter.draw(annotated)
             
             # Draw tracked objects
             for object_id, centroid in objects.items():
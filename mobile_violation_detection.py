@@ -3,7 +3,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import threading
-from ultralytics import YOLO
+from inference import LatencyController, extract_detections, get_model
 import pygame
 from datetime import datetime
 
@@ -33,7 +33,7 @@ class MobileViolationDetector:
         
         # Load YOLO model (using YOLOv8)
         try:
-            self.model = YOLO('yolov8n.pt')  # nano model for speed
+            self.model = get_model('yolov8n.pt')  # nano model for speed
             print("✓ YOLO model loaded successfully")
         except Exception as e:
             print(f"Error loading YOLO model: {e}")
@@ -330,13 +330,14 @@ class MobileViolationDetector:
         
         paused = False
         frame_count = 0
-        process_every_n_frames = 2  # Process every 2nd frame for performance
+        controller = LatencyController.for_source(source_type == "webcam", name=source_name)
         
         # Classes to detect (cell phone = 67 in COCO dataset)
         cell_phone_class = 67
         
         while True:
             if not paused:
+                controller.frame_started()
                 ret, frame = video_capture.read()
                 
                 if not ret:
@@ -347,38 +348,32 @@ class MobileViolationDetector:
                 frame_count += 1
                 
                 # Process every nth frame
-                if frame_count % process_every_n_frames == 0:
+                processed = controller.should_process(frame_count)
+                if processed:
                     # Run YOLO detection
                     results = self.model(frame, conf=self.confidence_var.get(), 
-                                       verbose=False)
+                                       imgsz=controller.imgsz, verbose=False)
                     
                     violation_detected = False
                     
                     # Process detections
                     for result in results:
-                        boxes = result.boxes
-                        for box in boxes:
-                            cls = int(box.cls[0])
-                            conf = float(box.conf[0])
+                        # Check if cell phone detected
+                        phones = extract_detections(result).select(cell_phone_class)
+                        for (x1, y1, x2, y2), conf in zip(phones.xyxy.astype(int).tolist(), phones.conf.tolist()):
+                            violation_detected = True
                             
-                            # Check if cell phone detected
-                            if cls == cell_phone_class:
-                                violation_detected = True
-                                
-                                # Get box coordinates
-                                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                                
-                                # Draw red rectangle
-                                cv2.rectangle(frame, (x1, y1), (x2, y2), 
-                                            (0, 0, 255), 3)
-                                
-                                # Add label
-                                label = f"VIOLATION! {conf:.2f}"
-                                cv2.rectangle(frame, (x1, y1 - 30), (x2, y1), 
-                                            (0, 0, 255), -1)
-                                cv2.putText(frame, label, (x1 + 5, y1 - 10),
-                                          cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-                                          (255, 255, 255), 2)
+                            # Draw red rectangle
+                            cv2.rectangle(frame, (x1, y1), (x2, y2), 
+                                        (0, 0, 255), 3)
+                            
+                            # Add label
+                            label = f"VIOLATION! {conf:.2f}"
+                            cv2.rectangle(frame, (x1, y1 - 30), (x2, y1), 
+                                        (0, 0, 255), -1)
+                            cv2.putText(frame, label, (x1 + 5, y1 - 10),
+                                      cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                                      (255, 255, 255), 2)
                     
                     # Handle violation alert
                     if violation_detected:
@@ -407,6 +402,7 @@ class MobileViolationDetector:
                 
                 # Display frame
                 cv2.imshow('Mobile Violation Detection', frame)
+                controller.frame_finished(processed)
             
             # Handle keyboard input
             key = cv2.waitKey(1) & 0xFF
@@ -415,6 +411,7 @@ class MobileViolationDetector:
                 break
             elif key == ord('p'):
                 paused = not paused
+                controller.reset()
             elif key == ord('s'):
                 # Save screenshot
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -4,7 +4,8 @@ import os
 import cv2
 import face_recognition
 import numpy as np
-from ultralytics import YOLO
+from face_store import FaceGallery
+from inference import LatencyController, extract_detections, get_model
 import threading
 import pygame
 from datetime import datetime
@@ -61,8 +62,7 @@ class PremiumDashboard:
         os.makedirs(self.violations_folder, exist_ok=True)
         
         # Load data
-        self.known_face_encodings = []
-        self.known_face_names = []
+        self.known_faces = FaceGallery()
         self.load_known_faces()
         
         # YOLO model
@@ -86,37 +86,19 @@ class PremiumDashboard:
         self.create_ui()
         
     def load_known_faces(self):
-        """Load known faces"""
+        """Load known faces from the face store"""
         if not os.path.exists(self.known_faces_folder):
             return
             
-        supported_formats = ['.jpg', '.jpeg', '.png', '.bmp']
+        self.known_faces = FaceGallery.load(self.known_faces_folder)
         
-        for filename in os.listdir(self.known_faces_folder):
-            file_path = os.path.join(self.known_faces_folder, filename)
-            
-            if os.path.isfile(file_path):
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in supported_formats:
-                    try:
-                        image = face_recognition.load_image_file(file_path)
-                        encodings = face_recognition.face_encodings(image)
-                        
-                        if encodings:
-                            self.known_face_encodings.append(encodings[0])
-                            name = os.path.splitext(filename)[0].replace('_', ' ')
-                            self.known_face_names.append(name)
-                            print(f"✓ Loaded face: {name}")
-                    except Exception as e:
-                        print(f"Error loading {filename}: {str(e)}")
-        
-        if self.known_face_encodings:
-            print(f"✓ Loaded {len(self.known_face_encodings)} known faces")
+        if self.known_faces:
+            print(f"✓ Loaded {len(self.known_faces)} known faces")
     
     def load_yolo_model(self):
         """Load YOLO model"""
         try:
-            self.yolo_model = YOLO('yolov8n.pt')
+            self.yolo_model = get_model('yolov8n.pt')
             print("✓ YOLO model loaded successfully")
         except Exception as e:
             print(f"Error loading YOLO model: {e}")
@@ -576,7 +558,7 @@ class PremiumDashboard:
         info_text = (
             "✓ Place images in 'known_faces' folder for recognition\n"
             "✓ Press 'q' to quit, 'p' to pause during detection\n"
-            f"✓ Loaded {len(self.known_face_encodings)} known face(s)"
+            f"✓ Loaded {len(self.known_faces)} known face(s)"
         )
         
         tk.Label(
@@ -897,7 +879,7 @@ class PremiumDashboard:
             source = self.face_webcam_var.get()
             source_name = f"Webcam {source}"
         
-        if not self.known_face_encodings:
+        if not self.known_faces:
             messagebox.showinfo("No Known Faces", 
                               "No known faces loaded. Faces will be detected but not recognized.")
         
@@ -942,22 +924,8 @@ class PremiumDashboard:
                     face_locations = face_recognition.face_locations(rgb_small_frame)
                     face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
                     
-                    face_names = []
-                    for face_encoding in face_encodings:
-                        name = "Unknown"
-                        
-                        if self.known_face_encodings:
-                            matches = face_recognition.compare_faces(
-                                self.known_face_encodings, face_encoding, tolerance=0.6)
-                            face_distances = face_recognition.face_distance(
-                                self.known_face_encodings, face_encoding)
-                            
-                            if len(face_distances) > 0:
-                                best_match_index = np.argmin(face_distances)
-                                if matches[best_match_index]:
-                                    name = self.known_face_names[best_match_index]
-                        
-                        face_names.append(name)
+                    # Compare all faces with the known faces at once
+                    face_names, _ = self.known_faces.match(face_encodings, tolerance=0.6)
                 
                 for (top, right, bottom, left), name in zip(face_locations, face_names):
                     top *= 2
@@ -1046,11 +1014,12 @@ class PremiumDashboard:
         
         paused = False
         frame_count = 0
-        process_every_n_frames = 2
+        controller = LatencyController.for_source(source_type == "webcam", name=source_name)
         cell_phone_class = 67
         
         while self.is_detecting:
             if not paused:
+                controller.frame_started()
                 ret, frame = video_capture.read()
                 
                 if not ret:
@@ -1058,29 +1027,24 @@ class PremiumDashboard:
                 
                 frame_count += 1
                 
-                if frame_count % process_every_n_frames == 0:
+                processed = controller.should_process(frame_count)
+                if processed:
                     confidence = self.violation_confidence_var.get()
-                    results = self.yolo_model(frame, conf=confidence, verbose=False)
+                    results = self.yolo_model(frame, conf=confidence, imgsz=controller.imgsz, verbose=False)
                     
                     violation_detected = False
                     
                     for result in results:
-                        boxes = result.boxes
-                        for box in boxes:
-                            cls = int(box.cls[0])
-                            conf = float(box.conf[0])
+                        phones = extract_detections(result).select(cell_phone_class)
+                        for (x1, y1, x2, y2), conf in zip(phones.xyxy.astype(int).tolist(), phones.conf.tolist()):
+                            violation_detected = True
+                            
+                            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
                             
-                            if cls == cell_phone_class:
-                                violation_detected = True
-                                
-                                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                                
-                                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
-                                
-                                label = f"VIOLATION! {conf:.2f}"
-                                cv2.rectangle(frame, (x1, y1 - 30), (x2, y1), (0, 0, 255), -1)
-                                cv2.putText(frame, label, (x1 + 5, y1 - 10),
-                                          cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                            label = f"VIOLATION! {conf:.2f}"
+                            cv2.rectangle(frame, (x1, y1 - 30), (x2, y1), (0, 0, 255), -1)
+                            cv2.putText(frame, label, (x1 + 5, y1 - 10),
+                                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
                     
                     if violation_detected:
                         current_time = datetime.now()
@@ -1099,6 +1063,7 @@ class PremiumDashboard:
                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
                 
                 cv2.imshow('Mobile Violation Detection - Maruthi Dashboard', frame)
+                controller.frame_finished(processed)
             
             key = cv2.waitKey(1) & 0xFF
             
@@ -1106,6 +1071,7 @@ class PremiumDashboard:
                 break
             elif key == ord('p'):
                 paused = not paused
+                controller.reset()
             elif key == ord('s'):
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 screenshot_path = os.path.join(self.violations_folder, 
@@ -0,0 +1,185 @@
+"""
+INT8 Quantization Tool for the MOBILE/OUT Model
+Build the INT8 variant of the model and report how it compares to the FP32 model
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from inference import (MobileOutDetector, VIDEO_EXTENSIONS, box_iou, export_model, extract_detections, latency_stats,
+                       sample_video_frames)
+
+
+def match_detections(ref_boxes, test_boxes, iou_threshold=0.5):
+    """
+    Greedily match test boxes to reference boxes by IoU (class-agnostic)
+    
+    Returns:
+        List of (ref_index, test_index, iou) tuples
+    """
+    if len(ref_boxes) == 0 or len(test_boxes) == 0:
+        return []
+    
+    ious = box_iou(ref_boxes, test_boxes)
+    matches = []
+    while True:
+        ref_index, test_index = np.unravel_index(np.argmax(ious), ious.shape)
+        iou = ious[ref_index, test_index]
+        if iou < iou_threshold:
+            break
+        matches.append((int(ref_index), int(test_index), float(iou)))
+        ious[ref_index, :] = -1
+        ious[:, test_index] = -1
+    
+    return matches
+
+
+def compare_detections(fp32, int8, frames):
+    """
+    Run both detectors on the same frames and measure agreement and latency
+    
+    Returns:
+        Dictionary with the mAP-proxy agreement and per-frame latency of both models
+    """
+    ref_total = 0
+    test_total = 0
+    matched = 0
+    class_matches = 0
+    ious = []
+    latencies = {'fp32': [], 'int8': []}
+    
+    # Untimed warm-up so one-off initialization does not skew the latency
+    if frames:
+        for detector in (fp32, int8):
+            list(detector.infer_frames([(0, frames[0])]))
+    
+    for i, frame in enumerate(frames):
+        outputs = {}
+        for name, detector in (('fp32', fp32), ('int8', int8)):
+            start = time.perf_counter()
+            _, _, results = next(detector.infer_frames([(i, frame)]))
+            latencies[name].append(time.perf_counter() - start)
+            outputs[name] = extract_detections(results)
+        
+        ref, test = outputs['fp32'], outputs['int8']
+        ref_total += len(ref)
+        test_total += len(test)
+        
+        for ref_index, test_index, iou in match_detections(ref.xyxy, test.xyxy):
+            matched += 1
+            ious.append(iou)
+            class_matches += int(ref.cls[ref_index] == test.cls[test_index])
+    
+    recall = matched / ref_total if ref_total else 1.0
+    precision = matched / test_total if test_total else 1.0
+    
+    return {
+        'frames': len(frames),
+        'fp32_boxes': ref_total,
+        'int8_boxes': test_total,
+        'matched_boxes': matched,
+        'recall_vs_fp32': recall,
+        'precision_vs_fp32': precision,
+        'f1_vs_fp32': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        'mean_matched_iou': float(np.mean(ious)) if ious else 0.0,
+        'class_agreement': class_matches / matched if matched else 1.0,
+        'latency': {name: latency_stats(values) for name, values in latencies.items() if values}
+    }
+
+
+def compare_counts(fp32, int8, videos, roi_config_file=None):
+    """Run IN/OUT counting with both detectors on reference videos"""
+    rows = []
+    for video in videos:
+        counts = {}
+        for name, detector in (('fp32', fp32), ('int8', int8)):
+            result = detector.detect_video(video, show=False, roi_config_file=roi_config_file)
+            counts[name] = {
+                'in': result['line_crossing']['in_count'],
+                'out': result['line_crossing']['out_count'],
+                'fps': result['avg_fps']
+            }
+        counts['video'] = str(video)
+        counts['match'] = (counts['fp32']['in'], counts['fp32']['out']) == (counts['int8']['in'], counts['int8']['out'])
+        rows.append(counts)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and evaluate the INT8 MOBILE/OUT model')
+    parser.add_argument('--model', type=str, required=True, help='Path to model weights (.pt)')
+    parser.add_argument('--calibration', type=str, default='videos', help='Video or folder of videos to calibrate and evaluate on')
+    parser.add_argument('--calib-frames', type=int, default=32, help='Calibration frames sampled per video')
+    parser.add_argument('--eval-frames', type=int, default=16, help='Evaluation frames sampled per video (disjoint from calibration)')
+    parser.add_argument('--reference-videos', nargs='*', help='Videos for IN/OUT count agreement (default: calibration videos)')
+    parser.add_argument('--roi-config', type=str, help='Path to ROI config JSON file (from setup_roi.py)')
+    parser.add_argument('--no-counts', action='store_true', help='Skip the IN/OUT count comparison')
+    parser.add_argument('--baseline', type=str, default='pytorch', choices=['pytorch', 'onnx'], help='FP32 model to compare against')
+    parser.add_argument('--imgsz', type=int, default=640, help='Inference image size')
+    parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
+    parser.add_argument('--iou', type=float, default=0.45, help='IOU threshold')
+    parser.add_argument('--report', type=str, help='Save the report to a JSON file')
+    
+    args = parser.parse_args()
+    
+    # Build (or reuse) the INT8 model calibrated on the requested videos
+    export_model(args.model, 'onnx-int8', imgsz=args.imgsz,
+                 calibration_source=args.calibration, calibration_frames=args.calib_frames)
+    
+    fp32 = MobileOutDetector(args.model, conf_threshold=args.conf, iou_threshold=args.iou,
+                             backend=args.baseline, imgsz=args.imgsz)
+    int8 = MobileOutDetector(args.model, conf_threshold=args.conf, iou_threshold=args.iou,
+                             backend='onnx-int8', imgsz=args.imgsz)
+    
+    # Evaluate on frames halfway between the calibration samples
+    frames = sample_video_frames(args.calibration, frames_per_video=args.eval_frames, offset=0.5)
+    report = {
+        'model': args.model,
+        'baseline': args.baseline,
+        'int8_model': int8.runtime_path,
+        'detections': compare_detections(fp32, int8, frames)
+    }
+    
+    if not args.no_counts:
+        videos = args.reference_videos
+        if videos is None:
+            calibration = Path(args.calibration)
+            videos = sorted(str(p) for p in calibration.iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS) \
+                if calibration.is_dir() else [str(calibration)]
+        report['counts'] = compare_counts(fp32, int8, videos, roi_config_file=args.roi_config)
+    
+    detections = report['detections']
+    print("\n" + "=" * 70)
+    print(f"INT8 vs FP32 ({args.baseline}) REPORT")
+    print("=" * 70)
+    print(f"Evaluation frames: {detections['frames']}")
+    print(f"Boxes FP32/INT8:   {detections['fp32_boxes']} / {detections['int8_boxes']} "
+          f"({detections['matched_boxes']} matched at IoU >= 0.5)")
+    print(f"Recall vs FP32:    {detections['recall_vs_fp32']:.3f}")
+    print(f"Precision vs FP32: {detections['precision_vs_fp32']:.3f}")
+    print(f"Mean matched IoU:  {detections['mean_matched_iou']:.3f}")
+    print(f"Class agreement:   {detections['class_agreement']:.3f}")
+    for name, stats in detections['latency'].items():
+        print(f"Latency {name:<5}      mean {stats['mean_ms']:.1f} ms | p95 {stats['p95_ms']:.1f} ms | {stats['fps']:.1f} FPS")
+    if detections['latency']:
+        speedup = detections['latency']['fp32']['mean_ms'] / detections['latency']['int8']['mean_ms']
+        print(f"Speedup:           {speedup:.2f}x")
+    
+    for row in report.get('counts', []):
+        status = "✓" if row['match'] else "✗"
+        print(f"{status} {Path(row['video']).name}: FP32 IN {row['fp32']['in']} / OUT {row['fp32']['out']} | "
+              f"INT8 IN {row['int8']['in']} / OUT {row['int8']['out']}")
+    print("=" * 70)
+    
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
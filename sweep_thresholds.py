@@ -0,0 +1,217 @@
+"""
+Confidence/IoU Threshold Sweep for the MOBILE/OUT Model
+Run the model once on a video and report IN/OUT counts and MOBILE alerts for a grid of thresholds
+"""
+
+import argparse
+import csv
+import json
+import time
+
+import cv2
+import numpy as np
+
+from inference import (ArrayTracker, DetectionCache, MobileOutDetector, VideoFrameReader, ZoneCounter,
+                       MOBILE_CLASS_ID, OUT_CLASS_ID, BACKENDS, nms)
+
+
+def collect_candidates(detector, video_path, frame_size, process_every_n_frames=2, batch_size=1, cache_dir=None):
+    """
+    Run the model once and keep every candidate box above the detector's confidence threshold
+
+    The detector should run with iou_threshold=1.0 so its NMS keeps every candidate and
+    any IoU threshold can be applied afterwards.
+
+    Args:
+        detector: MobileOutDetector (conf_threshold = confidence floor, iou_threshold = 1.0)
+        video_path: Path to the video
+        frame_size: (width, height) frames are resized to
+        process_every_n_frames: Frame stride (default: 2, like detect_video)
+        batch_size: Frames per model call
+        cache_dir: Optional detection cache directory, a second sweep of the same video skips inference
+
+    Returns:
+        (frame_numbers, candidates) where candidates[i] is an (N, 6) array of
+        x1, y1, x2, y2, conf, cls for frame_numbers[i]
+    """
+    # Only a cache run hashes the video and the weights for the cache key
+    cache = None
+    if cache_dir:
+        cache = DetectionCache(cache_dir, video_path, detector, frame_size, process_every_n_frames,
+                               conf_floor=detector.conf_threshold)
+        if cache.load():
+            print(f"  Replaying candidates from: {cache.path}")
+            return cache.frame_numbers, cache.boxes
+
+    cap = cv2.VideoCapture(str(video_path))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    reader = VideoFrameReader(cap, process_every_n_frames=process_every_n_frames,
+                              resize_to=frame_size if frame_size[0] != width else None)
+    stream = detector.infer_frames(reader, batch_size=batch_size)
+
+    if cache:
+        for _ in cache.record(stream, detector.conf_threshold):
+            pass
+        cap.release()
+        cache.save(reader.frames_read)
+        return cache.frame_numbers, cache.boxes
+
+    frame_numbers = []
+    candidates = []
+    for frame_number, _, results in stream:
+        data = results.boxes.data
+        data = data.cpu().numpy() if hasattr(data, 'cpu') else np.asarray(data)
+        frame_numbers.append(frame_number)
+        candidates.append(np.asarray(data[:, [0, 1, 2, 3, -2, -1]], dtype=np.float32))
+    cap.release()
+
+    return frame_numbers, candidates
+
+
+def sweep(frame_numbers, candidates, conf_grid, iou_grid, zones, fps, alert_frames=2, alert_cooldown=5.0,
+          max_disappeared=30):
+    """
+    Re-apply NMS and confidence thresholds and replay tracking/alerts for every setting
+
+    NMS runs once per IoU value; confidence filtering after NMS gives the same boxes as
+    filtering before it, so every confidence value reuses that result.
+
+    Args:
+        frame_numbers: Frame number of every processed frame
+        candidates: Candidate boxes per processed frame (see collect_candidates)
+        conf_grid: Confidence thresholds to evaluate
+        iou_grid: IoU thresholds to evaluate
+        zones: Counting zones (lines, polygons, in/out boxes, see ZoneCounter) in processed frame coordinates
+        fps: Video frame rate, used for the alert cooldown
+        alert_frames: Consecutive processed frames with a MOBILE needed for an alert (like app.py)
+        alert_cooldown: Seconds between two alerts (like app.py)
+        max_disappeared: Tracker setting
+
+    Returns:
+        List of result dictionaries, one per (conf, iou) setting
+    """
+    timestamps = np.asarray(frame_numbers, dtype=np.float64) / (fps or 30)
+    rows = []
+
+    for iou in iou_grid:
+        kept = [boxes[nms(boxes[:, :4], boxes[:, 4], boxes[:, 5], iou)] for boxes in candidates]
+
+        for conf in conf_grid:
+            tracker = ArrayTracker(max_disappeared=max_disappeared)
+            counter = ZoneCounter(zones)
+            box_counts = np.zeros(2, dtype=np.int64)
+            consecutive = 0
+            last_alert = None
+            alerts = 0
+
+            for timestamp, boxes in zip(timestamps, kept):
+                boxes = boxes[boxes[:, 4] >= conf]
+                cls = boxes[:, 5].astype(np.int64)
+                box_counts += np.bincount(cls, minlength=2)[:2]
+
+                consecutive = consecutive + 1 if np.any(cls == MOBILE_CLASS_ID) else 0
+                if consecutive >= alert_frames and (last_alert is None or timestamp - last_alert >= alert_cooldown):
+                    alerts += 1
+                    last_alert = timestamp
+
+                tracker.update(np.ascontiguousarray(boxes[cls == OUT_CLASS_ID, :4]))
+                counter.update(tracker)
+
+            rows.append({
+                'conf': conf,
+                'iou': iou,
+                'in_count': counter.in_count,
+                'out_count': counter.out_count,
+                'mobile_alerts': alerts,
+                'mobile_boxes': int(box_counts[MOBILE_CLASS_ID]),
+                'out_boxes': int(box_counts[OUT_CLASS_ID])
+            })
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep confidence/IoU thresholds from a single inference pass')
+    parser.add_argument('--model', type=str, required=True, help='Path to model weights (best.pt)')
+    parser.add_argument('--source', type=str, required=True, help='Path to the video')
+    parser.add_argument('--conf', type=float, nargs='+', default=[0.15, 0.2, 0.25, 0.3, 0.4, 0.5], help='Confidence thresholds')
+    parser.add_argument('--iou', type=float, nargs='+', default=[0.3, 0.45, 0.6, 0.7], help='IoU thresholds')
+    parser.add_argument('--conf-floor', type=float, default=0.05, help='Confidence the candidates are collected at')
+    parser.add_argument('--max-det', type=int, default=3000, help='Maximum candidates per frame')
+    parser.add_argument('--roi-y', type=int, help='Horizontal ROI line Y position (processed frame coordinates)')
+    parser.add_argument('--roi-x', type=int, help='Vertical ROI line X position (processed frame coordinates)')
+    parser.add_argument('--roi-config', type=str, help='Path to ROI config JSON file (setup_roi.py line, ROI editor boxes or zones)')
+    parser.add_argument('--process-every-n-frames', type=int, default=2, help='Frame stride, like detect_video')
+    parser.add_argument('--resize-width', type=int, default=640, help='Resize frame width, like detect_video')
+    parser.add_argument('--batch-size', type=int, default=1, help='Frames per model call')
+    parser.add_argument('--backend', type=str, default='pytorch', choices=list(BACKENDS), help='Inference runtime')
+    parser.add_argument('--imgsz', type=int, default=640, help='Inference image size')
+    parser.add_argument('--alert-frames', type=int, default=2, help='Consecutive MOBILE frames for an alert')
+    parser.add_argument('--alert-cooldown', type=float, default=5.0, help='Seconds between MOBILE alerts')
+    parser.add_argument('--cache-dir', type=str, help='Cache the candidates so later sweeps skip inference')
+    parser.add_argument('--report', type=str, help='Save the table to a .json or .csv file')
+
+    args = parser.parse_args()
+
+    conf_floor = min([args.conf_floor] + args.conf)
+    detector = MobileOutDetector(args.model, conf_threshold=conf_floor, iou_threshold=1.0,
+                                 backend=args.backend, imgsz=args.imgsz, max_det=args.max_det)
+
+    cap = cv2.VideoCapture(args.source)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {args.source}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+
+    scale_factor = 1.0
+    frame_size = (width, height)
+    if args.resize_width and args.resize_width < width:
+        scale_factor = args.resize_width / width
+        frame_size = (args.resize_width, int(height * scale_factor))
+
+    # Same zones as detect_video: the ROI line and/or the zones of the ROI config file
+    roi_line = {'y': args.roi_y} if args.roi_y is not None else {'x': args.roi_x} if args.roi_x is not None else None
+    zones = detector._resolve_zones(roi_line, None, args.roi_config, scale_factor, frame_size, width)
+
+    start = time.time()
+    frame_numbers, candidates = collect_candidates(
+        detector, args.source, frame_size, process_every_n_frames=args.process_every_n_frames,
+        batch_size=args.batch_size, cache_dir=args.cache_dir
+    )
+    inference_time = time.time() - start
+
+    start = time.time()
+    rows = sweep(frame_numbers, candidates, args.conf, args.iou, zones, fps,
+                 alert_frames=args.alert_frames, alert_cooldown=args.alert_cooldown)
+    sweep_time = time.time() - start
+
+    print("\n" + "=" * 70)
+    print(f"THRESHOLD SWEEP: {args.source}")
+    print(f"{len(frame_numbers)} frames | Counting zones: {ZoneCounter(zones).describe()}")
+    print(f"Inference {inference_time:.1f}s (once) | {len(rows)} settings replayed in {sweep_time:.1f}s")
+    print("=" * 70)
+    print(f"{'Conf':>6} {'IoU':>6} {'IN':>6} {'OUT':>6} {'Alerts':>7} {'MOBILE boxes':>13} {'OUT boxes':>10}")
+    for row in rows:
+        marker = " *" if (row['conf'], row['iou']) == (0.25, 0.45) else ""
+        print(f"{row['conf']:>6.2f} {row['iou']:>6.2f} {row['in_count']:>6} {row['out_count']:>6} "
+              f"{row['mobile_alerts']:>7} {row['mobile_boxes']:>13} {row['out_boxes']:>10}{marker}")
+    print("=" * 70)
+    print("* inference.py defaults (--conf 0.25 --iou 0.45)")
+
+    if args.report:
+        if args.report.endswith('.csv'):
+            with open(args.report, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(args.report, 'w') as f:
+                json.dump({'video': args.source, 'zones': zones, 'frames': len(frame_numbers), 'settings': rows},
+                          f, indent=2)
+        print(f"\n✓ Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
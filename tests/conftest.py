@@ -0,0 +1,37 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# The modules live at the repository root, next to the scripts that import them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inference  # noqa: E402
+
+
+class StubModel:
+    """Stand-in for the shared YOLO model, returns one result per input frame, tagged with the frame's fill value"""
+
+    runtime_path = 'stub.pt'
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, frames, **kwargs):
+        self.calls.append(len(frames))
+        return [SimpleNamespace(value=int(frame[0, 0, 0]), orig_img=frame) for frame in frames]
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    """MobileOutDetector running on a StubModel (detector.model)"""
+    model = StubModel()
+    monkeypatch.setattr(inference, 'get_model', lambda *args, **kwargs: model)
+    return inference.MobileOutDetector('stub.pt')
+
+
+def solid_frame(value, size=(48, 64)):
+    """BGR frame filled with one gray value"""
+    return np.full(size + (3,), value, dtype=np.uint8)
@@ -0,0 +1,123 @@
+"""IN/OUT counting of ZoneCounter and LineCrossingCounter against the original per-object loop"""
+
+import numpy as np
+import pytest
+
+from inference import ArrayTracker, CentroidTracker, LineCrossingCounter, ZoneCounter
+
+
+def walkers(seed=0, count=12, frames=40, height=480, size=(40, 80)):
+    """
+    Boxes per frame of people walking up or down through a 640 x `height` frame
+
+    Walkers keep 50 px apart horizontally and are all in view from the first frame, so
+    every tracker follows them without ID swaps.
+    Returns the per-frame boxes and the true (in, out) crossings of the line y = height / 2.
+    """
+    rng = np.random.default_rng(seed)
+    tracks = []
+    for i in range(count):
+        down = bool(rng.integers(2))
+        speed = int(rng.integers(4, 9))
+        y0 = int(rng.integers(20, height // 2 - 40)) if down else int(rng.integers(height // 2 + 40, height - 20))
+        tracks.append((30 + 50 * i, y0, speed if down else -speed))
+
+    boxes = []
+    for frame in range(frames):
+        frame_boxes = []
+        for cx, y0, velocity in tracks:
+            cy = y0 + velocity * frame
+            if 0 <= cy < height:
+                frame_boxes.append((cx - size[0] // 2, cy - size[1] // 2, cx + size[0] // 2, cy + size[1] // 2))
+        boxes.append(np.array(frame_boxes, dtype=np.float32).reshape(-1, 4))
+
+    def crosses(y0, velocity):
+        last = min(max(y0 + velocity * (frames - 1), 0), height - 1)
+        return (y0 < height // 2) != (last < height // 2)
+
+    outs = sum(1 for _, y0, velocity in tracks if velocity > 0 and crosses(y0, velocity))
+    ins = sum(1 for _, y0, velocity in tracks if velocity < 0 and crosses(y0, velocity))
+    return boxes, (ins, outs)
+
+
+def baseline_counts(boxes, roi_line):
+    """Counts of the per-object side checks detect_video ran before ZoneCounter"""
+    tracker = CentroidTracker(max_disappeared=30)
+    counter = LineCrossingCounter(roi_line)
+    start_sides, counted = {}, set()
+    in_count = out_count = 0
+    for frame_boxes in boxes:
+        for object_id, (cx, cy) in tracker.update(frame_boxes).items():
+            side = counter.side(cx, cy)
+            start = start_sides.setdefault(object_id, side)
+            if object_id in counted or start == side:
+                continue
+            counted.add(object_id)
+            if (start, side) in (('top', 'bottom'), ('left', 'right')):
+                out_count += 1
+            else:
+                in_count += 1
+    return in_count, out_count
+
+
+def run(tracker, counter, boxes):
+    for frame_boxes in boxes:
+        tracker.update(frame_boxes)
+        counter.update(tracker)
+    return counter.in_count, counter.out_count
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_baseline_counts(seed):
+    boxes, expected = walkers(seed)
+    roi_line = {'y': 240}
+
+    assert baseline_counts(boxes, roi_line) == expected
+    assert run(CentroidTracker(max_disappeared=30), ZoneCounter([roi_line]), boxes) == expected
+    assert run(ArrayTracker(max_disappeared=30), ZoneCounter([roi_line]), boxes) == expected
+    assert run(ArrayTracker(max_disappeared=30), LineCrossingCounter(roi_line), boxes) == expected
+
+
+def test_custom_line_matches_baseline():
+    boxes, _ = walkers(3)
+    roi_line = {'line_points': [(0, 200), (640, 280)]}
+
+    assert run(ArrayTracker(max_disappeared=30), ZoneCounter([roi_line]), boxes) == baseline_counts(boxes, roi_line)
+
+
+def test_each_track_counted_once_per_zone():
+    counter = ZoneCounter([{'y': 100}, {'polygon': [(0, 150), (200, 150), (200, 250), (0, 250)]}])
+    tracker = ArrayTracker()
+
+    # Down through the line and into the polygon, back up, then down again
+    for cy in (50, 120, 200, 120, 50, 120, 200):
+        tracker.update(np.array([[90, cy - 10, 110, cy + 10]], dtype=np.float32))
+        counter.update(tracker)
+
+    assert [(zone['in_count'], zone['out_count']) for zone in counter.counts()] == [(0, 1), (1, 0)]
+
+
+def test_box_pair_direction():
+    counter = ZoneCounter([{'in_box': [(0, 0), (100, 0), (100, 100), (0, 100)],
+                            'out_box': [(0, 200), (100, 200), (100, 300), (0, 300)]}])
+    tracker = CentroidTracker()
+
+    # Between the boxes nothing is decided yet, in_box then out_box is OUT
+    for cy in (150, 50, 150, 250):
+        tracker.update([(40, cy - 10, 60, cy + 10)])
+        counter.update(tracker)
+
+    assert (counter.in_count, counter.out_count) == (0, 1)
+
+
+def test_state_dropped_with_tracks():
+    counter = ZoneCounter({'y': 100})
+    tracker = ArrayTracker(max_disappeared=0)
+    tracker.update([(0, 40, 20, 60)])
+    counter.update(tracker)
+    assert counter.tracked == 1
+
+    tracker.update([])
+    tracker.update([])
+    counter.update(tracker)
+    assert counter.tracked == 0
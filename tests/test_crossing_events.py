@@ -0,0 +1,76 @@
+"""Crossing event ring, log files and the hourly/daily rollups"""
+
+from datetime import date, datetime
+
+import numpy as np
+
+from inference import CrossingEventLog, CrossingEventRing, daily_crossings, hourly_crossings, read_crossing_events
+
+
+def crossings(track_ids, zone=0, direction=1):
+    track_ids = np.asarray(track_ids, dtype=np.int64)
+    return track_ids, np.full(len(track_ids), zone, dtype=np.int64), np.full(len(track_ids), direction, dtype=np.int8)
+
+
+def test_ring_drops_events_when_full():
+    ring = CrossingEventRing(capacity=4)
+    assert ring.push(*crossings([1, 2, 3]), frame=10, wall_time=0.0, media_time=0.4) == 3
+    assert ring.push(*crossings([4, 5, 6]), frame=11, wall_time=0.0, media_time=0.44) == 1
+    assert ring.dropped == 2
+    assert len(ring) == 4
+
+    events = ring.pop()
+    assert events['track_id'].tolist() == [1, 2, 3, 4]
+    assert events['frame'].tolist() == [10, 10, 10, 11]
+    assert len(ring) == 0
+
+
+def test_ring_wraps_around():
+    ring = CrossingEventRing(capacity=4)
+    ring.push(*crossings([1, 2, 3]), frame=1, wall_time=0.0, media_time=0.0)
+    ring.pop()
+    ring.push(*crossings([4, 5, 6], direction=-1), frame=2, wall_time=0.0, media_time=0.0)
+
+    events = ring.pop()
+    assert events['track_id'].tolist() == [4, 5, 6]
+    assert events['direction'].tolist() == [-1, -1, -1]
+    assert ring.dropped == 0
+    assert len(ring.pop()) == 0
+
+
+def at(day, hour, minute=0):
+    return datetime(day.year, day.month, day.day, hour, minute).timestamp()
+
+
+def test_log_rollups(tmp_path):
+    day = date(2026, 3, 14)
+    previous = date(2026, 3, 13)
+    with CrossingEventLog(tmp_path, 'gate', zone_names=['door'], flush_interval=0.01) as log:
+        log.emit(crossings([1, 2], direction=1), frame=30, media_time=1.001, wall_time=at(day, 9, 5))
+        log.emit(crossings([3], direction=-1), frame=60, media_time=2.002, wall_time=at(day, 9, 40))
+        log.emit(crossings([4], direction=-1), frame=90, media_time=3.003, wall_time=at(day, 17))
+        log.emit(crossings([5], direction=1), frame=120, media_time=4.004, wall_time=at(previous, 23))
+        log.emit(crossings([]), frame=150, media_time=5.0)
+
+    assert log.as_dict()['events'] == 5
+
+    events = list(read_crossing_events(tmp_path, 'gate', day))
+    assert [(e['track_id'], e['direction'], e['zone']) for e in events] == [
+        (1, 'out', 'door'), (2, 'out', 'door'), (3, 'in', 'door'), (4, 'in', 'door')]
+    assert events[2]['media_time'] == 2.002
+
+    hours = hourly_crossings(tmp_path, 'gate', day)
+    assert len(hours) == 24
+    assert hours[9] == {'hour': 9, 'in': 1, 'out': 2, 'total': 3}
+    assert hours[17] == {'hour': 17, 'in': 1, 'out': 0, 'total': 1}
+    assert sum(hour['total'] for hour in hours) == 4
+
+    days = daily_crossings(tmp_path, 'gate', days=3, end=day)
+    assert [row['date'] for row in days] == ['2026-03-12', '2026-03-13', '2026-03-14']
+    assert [(row['in'], row['out']) for row in days] == [(0, 0), (0, 1), (2, 2)]
+    assert days[-1]['day'] == 'Sat'
+
+
+def test_rollups_of_missing_channel(tmp_path):
+    assert sum(hour['total'] for hour in hourly_crossings(tmp_path, 'none', '2026-03-14')) == 0
+    assert daily_crossings(tmp_path, 'none', days=1, end=date(2026, 3, 14))[0]['total'] == 0
@@ -0,0 +1,68 @@
+"""DetectionCache round trip without a model"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from inference import DetectionCache
+
+
+class FakeResults:
+    """The parts of an ultralytics Results object DetectionCache.record uses"""
+
+    def __init__(self, data):
+        self.boxes = SimpleNamespace(data=data, conf=data[:, 4])
+
+    def __getitem__(self, mask):
+        return FakeResults(self.boxes.data[mask])
+
+
+def make_detector(model_path, imgsz=640):
+    return SimpleNamespace(class_names={0: 'MOBILE', 1: 'OUT'}, model_path=str(model_path), backend='pytorch',
+                           imgsz=imgsz, iou_threshold=0.45, max_det=300)
+
+
+def make_cache(tmp_path, **detector_options):
+    video = tmp_path / 'clip.mp4'
+    if not video.exists():
+        video.write_bytes(b'not really a video' * 100)
+    return DetectionCache(tmp_path / 'cache', video, make_detector(tmp_path / 'missing.pt', **detector_options),
+                          (640, 360), process_every_n_frames=2)
+
+
+FRAMES = {
+    0: np.array([[10, 10, 50, 50, 0.9, 0], [100, 100, 150, 150, 0.1, 1]], dtype=np.float32),
+    2: np.zeros((0, 6), dtype=np.float32),
+    4: np.array([[20, 20, 60, 60, 0.3, 1]], dtype=np.float32),
+}
+
+
+def test_round_trip(tmp_path):
+    cache = make_cache(tmp_path)
+    assert not cache.load()
+
+    stream = ((frame_number, None, FakeResults(data)) for frame_number, data in FRAMES.items())
+    recorded = list(cache.record(stream, conf_threshold=0.25))
+    assert [len(results.boxes.data) for _, _, results in recorded] == [1, 0, 1]
+    cache.save(frames_read=5)
+
+    loaded = make_cache(tmp_path)
+    assert loaded.path == cache.path
+    assert loaded.load()
+    assert loaded.frames_read == 5
+    assert loaded.frame_numbers == [0, 2, 4]
+
+    # The floor keeps low-confidence boxes, any threshold above it can be replayed
+    replayed = list(loaded.replay(0.05))
+    assert [len(dets) for _, _, dets in replayed] == [2, 0, 1]
+    np.testing.assert_array_equal(replayed[0][2].xyxy, FRAMES[0][:, :4])
+    assert replayed[0][2].cls.tolist() == [0, 1]
+
+    strict = list(loaded.replay(0.5))
+    assert [frame_number for frame_number, _, _ in strict] == [0, 2, 4]
+    assert [dets.cls.tolist() for _, _, dets in strict] == [[0], [], []]
+
+
+def test_key_depends_on_inference_settings(tmp_path):
+    assert make_cache(tmp_path).path == make_cache(tmp_path).path
+    assert make_cache(tmp_path).path != make_cache(tmp_path, imgsz=320).path
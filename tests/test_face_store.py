@@ -0,0 +1,158 @@
+"""FaceEncodingStore invalidation and FaceGallery matching, with a fake encoder"""
+
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+from face_store import FaceEncodingStore, FaceGallery, face_name
+
+
+class FakeEncoder:
+    """Deterministic 128-d encoding per file content, b'noface' images have no face"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(path.name)
+        data = path.read_bytes()
+        if data == b'noface':
+            return None
+        seed = int.from_bytes(hashlib.sha256(data).digest()[:4], 'little')
+        return np.random.default_rng(seed).normal(size=128)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    for name in ('Alice_Smith.jpg', 'Bob.png', 'Carol.jpeg'):
+        (tmp_path / name).write_bytes(name.encode() * 10)
+    (tmp_path / 'notes.txt').write_bytes(b'ignored')
+    return tmp_path
+
+
+def load(folder):
+    encoder = FakeEncoder()
+    store = FaceEncodingStore(folder)
+    encodings, names = store.load(encode=encoder)
+    return store, encoder, encodings, names
+
+
+def test_first_load_encodes_every_image(folder):
+    store, encoder, encodings, names = load(folder)
+    assert sorted(encoder.calls) == ['Alice_Smith.jpg', 'Bob.png', 'Carol.jpeg']
+    assert names == ['Alice Smith', 'Bob', 'Carol']
+    assert encodings.shape == (3, 128)
+    assert store.index_path.exists() and store.encodings_path.exists()
+
+
+def test_unchanged_images_are_not_encoded_again(folder):
+    _, _, first, _ = load(folder)
+    store, encoder, encodings, names = load(folder)
+    assert encoder.calls == []
+    assert store.stats['reused'] == 3
+    np.testing.assert_array_equal(encodings, first)
+
+
+def test_changed_image_is_encoded_again(folder):
+    _, _, first, _ = load(folder)
+    (folder / 'Bob.png').write_bytes(b'a new photo of bob')
+
+    store, encoder, encodings, names = load(folder)
+    assert encoder.calls == ['Bob.png']
+    assert (store.stats['reused'], store.stats['encoded'], store.stats['removed']) == (2, 1, 0)
+    assert not np.array_equal(encodings[1], first[1])
+    np.testing.assert_array_equal(encodings[[0, 2]], first[[0, 2]])
+
+
+def test_touched_and_renamed_images_are_reused(folder):
+    _, _, first, _ = load(folder)
+    os.utime(folder / 'Carol.jpeg', ns=(0, 0))
+    os.rename(folder / 'Alice_Smith.jpg', folder / 'Zoe.jpg')
+
+    store, encoder, encodings, names = load(folder)
+    assert encoder.calls == []
+    assert names == ['Bob', 'Carol', 'Zoe']
+    np.testing.assert_array_equal(encodings[2], first[0])
+
+
+def test_removed_and_faceless_images(folder):
+    load(folder)
+    (folder / 'Carol.jpeg').unlink()
+    (folder / 'Empty.jpg').write_bytes(b'noface')
+
+    store, encoder, encodings, names = load(folder)
+    assert encoder.calls == ['Empty.jpg']
+    assert store.stats['removed'] == 1
+    assert names == ['Alice Smith', 'Bob']
+    assert len(encodings) == 2
+
+    # The faceless image is remembered too
+    _, encoder, _, _ = load(folder)
+    assert encoder.calls == []
+
+
+def test_stale_store_is_rebuilt(folder):
+    store, _, _, _ = load(folder)
+    np.save(store.encodings_path, np.zeros((1, 128)))
+
+    _, encoder, encodings, _ = load(folder)
+    assert len(encoder.calls) == 3
+    assert len(encodings) == 3
+
+
+def test_face_name():
+    assert face_name('/faces/Mary_Jane_Watson.png') == 'Mary Jane Watson'
+
+
+def brute_force_match(known, names, faces, tolerance):
+    """Per-face compare_faces/face_distance loop the gallery replaces"""
+    result = []
+    for face in faces:
+        distances = np.linalg.norm(known - face, axis=1)
+        best = int(np.argmin(distances))
+        result.append(names[best] if distances[best] <= tolerance else "Unknown")
+    return result
+
+
+def test_gallery_matches_brute_force():
+    rng = np.random.default_rng(7)
+    known = rng.normal(scale=0.1, size=(50, 128))
+    names = [f"person {i}" for i in range(50)]
+    faces = np.vstack([known[[3, 17, 42]] + rng.normal(scale=0.01, size=(3, 128)), rng.normal(scale=0.1, size=(2, 128))])
+
+    gallery = FaceGallery(known, names)
+    matched, distances = gallery.match(faces, tolerance=0.6)
+
+    assert matched[:3] == ['person 3', 'person 17', 'person 42']
+    assert matched == brute_force_match(known, names, faces, 0.6)
+    expected = np.linalg.norm(known[None, :, :] - faces[:, None, :], axis=2).min(axis=1)
+    np.testing.assert_allclose(distances, expected, atol=1e-4)
+
+
+def test_gallery_tolerance_and_unknown_name():
+    gallery = FaceGallery(np.eye(2, 128), ['a', 'b'])
+    faces = [np.eye(2, 128)[0] * 0.9, np.full(128, 0.5)]
+    assert gallery.match(faces, tolerance=0.2, unknown='?')[0] == ['a', '?']
+
+
+def test_empty_gallery_and_no_faces():
+    names, distances = FaceGallery().match([np.zeros(128)])
+    assert names == ["Unknown"]
+    assert np.isinf(distances).all()
+
+    names, distances = FaceGallery(np.zeros((1, 128)), ['a']).match([])
+    assert names == [] and len(distances) == 0
+
+
+def test_gallery_rejects_mismatched_names():
+    with pytest.raises(ValueError):
+        FaceGallery(np.zeros((2, 128)), ['only one'])
+
+
+def test_gallery_load_reads_store(folder, monkeypatch):
+    monkeypatch.setattr(FaceEncodingStore, 'encode', staticmethod(FakeEncoder()))
+    gallery = FaceGallery.load(folder)
+    assert gallery.names == ['Alice Smith', 'Bob', 'Carol']
+    assert gallery.match(FaceEncodingStore(folder).load()[0])[0] == gallery.names
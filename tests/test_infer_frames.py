@@ -0,0 +1,23 @@
+"""Batched infer_frames with a stub model (see conftest.detector)"""
+
+from conftest import solid_frame
+
+
+def moving_frames(count):
+    return [(i + 1, solid_frame(i * 10 % 250)) for i in range(count)]
+
+
+def run(detector, frames, **kwargs):
+    return [(frame_number, results.value) for frame_number, _, results in detector.infer_frames(frames, **kwargs)]
+
+
+def test_batch_sizes_give_the_same_order_and_results(detector):
+    frames = moving_frames(10)
+    single = run(detector, frames, batch_size=1)
+    assert detector.model.calls == [1] * 10
+
+    detector.model.calls.clear()
+    batched = run(detector, frames, batch_size=4)
+    assert detector.model.calls == [4, 4, 2]
+
+    assert batched == single == [(i + 1, i * 10) for i in range(10)]
@@ -0,0 +1,94 @@
+"""LatencyController step-up/step-down decisions on synthetic timings"""
+
+import time
+
+import pytest
+
+from inference import LatencyController
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, 'perf_counter', clock)
+    return clock
+
+
+def run_window(controller, clock, latency, period):
+    """One decision window of processed frames taking `latency` each, started every `period` seconds"""
+    for _ in range(controller.window):
+        controller.frame_started()
+        clock.now += latency
+        controller.frame_finished(processed=True)
+        clock.now += period - latency
+
+
+def state(controller):
+    return controller.skip, controller.imgsz
+
+
+def test_over_latency_budget_lowers_input_size(clock):
+    controller = LatencyController()
+    assert state(controller) == (2, 640)
+
+    run_window(controller, clock, latency=0.3, period=0.3)
+    assert state(controller) == (2, 512)
+    run_window(controller, clock, latency=0.3, period=0.3)
+    assert state(controller) == (2, 416)
+    assert controller.adjustments[-1]['imgsz'] == (512, 416)
+
+
+def test_low_frame_rate_raises_skip_factor_up_to_the_maximum(clock):
+    controller = LatencyController()
+    for _ in range(4):
+        run_window(controller, clock, latency=0.1, period=0.1)
+    # 10 FPS < 15: skip 2 -> 3 -> 4, then the input size has to give
+    assert state(controller) == (4, 416)
+
+
+def test_headroom_steps_back_up(clock):
+    controller = LatencyController()
+    run_window(controller, clock, latency=0.3, period=0.3)
+    assert state(controller) == (2, 512)
+
+    run_window(controller, clock, latency=0.05, period=0.03)
+    assert state(controller) == (1, 512)
+    run_window(controller, clock, latency=0.05, period=0.03)
+    assert state(controller) == (1, 640)
+    run_window(controller, clock, latency=0.05, period=0.03)
+    assert state(controller) == (1, 640)
+
+
+def test_input_size_grows_only_if_the_budget_still_fits(clock):
+    controller = LatencyController(initial_skip=1)
+    run_window(controller, clock, latency=0.3, period=0.3)
+    assert state(controller) == (1, 512)
+
+    # 110 ms is headroom, but 110 * (640 / 512)^2 = 172 ms would exceed the 150 ms budget
+    run_window(controller, clock, latency=0.11, period=0.03)
+    assert state(controller) == (1, 512)
+
+
+def test_dead_band_keeps_settings(clock):
+    controller = LatencyController()
+    run_window(controller, clock, latency=0.16, period=1 / 15)
+    assert state(controller) == (2, 640)
+    assert controller.adjustments == []
+
+
+def test_file_profile_is_fixed(clock):
+    controller = LatencyController.for_source(False, name='file')
+    run_window(controller, clock, latency=0.5, period=0.5)
+    run_window(controller, clock, latency=0.01, period=0.01)
+    assert state(controller) == (2, 640)
+
+    assert state(LatencyController.for_source(True)) == (2, 640)
+    assert LatencyController.for_source(True).imgsz_choices == [320, 416, 512, 640]
@@ -0,0 +1,66 @@
+"""Greedy vs optimal centroid assignment and the distance gate"""
+
+import numpy as np
+import pytest
+
+from inference import ArrayTracker, CentroidTracker, match_centroids
+
+
+def pairs(rows, cols):
+    return sorted(zip(rows.tolist(), cols.tolist()))
+
+
+def test_optimal_assignment_fixes_greedy_mismatch():
+    # Objects at x = 0 and x = 10 both move right, to x = 6 and x = 20
+    D = np.abs(np.array([[0.0], [10.0]]) - np.array([[6.0, 20.0]]))
+
+    # Greedy: object 1 is closest to detection 0 and takes it, object 0 is left without a match
+    assert pairs(*match_centroids(D, 'greedy')) == [(1, 0)]
+    assert pairs(*match_centroids(D, 'optimal')) == [(0, 0), (1, 1)]
+
+
+def boxes_at(xs, y=100):
+    return np.array([(x - 2, y - 2, x + 2, y + 2) for x in xs], dtype=np.float32)
+
+
+@pytest.mark.parametrize('tracker_class', [CentroidTracker, ArrayTracker])
+def test_optimal_tracker_keeps_both_ids(tracker_class):
+    greedy = tracker_class(assignment='greedy', max_disappeared=5)
+    optimal = tracker_class(assignment='optimal', max_disappeared=5)
+    for tracker in (greedy, optimal):
+        tracker.update(boxes_at([0, 10]))
+        tracker.update(boxes_at([6, 20]))
+
+    # Greedy registers the second detection as a new object, object 0 is left behind
+    assert sorted(greedy.objects) == [0, 1, 2]
+    assert {object_id: centroid[0] for object_id, centroid in optimal.objects.items()} == {0: 6, 1: 20}
+
+
+def test_gate_drops_distant_pairs():
+    D = np.array([[40.0, 500.0], [60.0, 400.0]])
+    assert pairs(*match_centroids(D, 'optimal', max_distance=50)) == [(0, 0)]
+    assert pairs(*match_centroids(D, 'greedy', max_distance=50)) == [(0, 0)]
+
+
+def test_gate_prefers_more_allowed_matches():
+    # The cheapest total (1 + 25) uses a pair beyond the gate and would leave one match,
+    # within the gate both objects can be matched (18 + 18)
+    D = np.array([[1.0, 18.0], [18.0, 25.0]])
+    assert pairs(*match_centroids(D, 'optimal')) == [(0, 0), (1, 1)]
+    assert pairs(*match_centroids(D, 'optimal', max_distance=20)) == [(0, 1), (1, 0)]
+
+
+@pytest.mark.parametrize('tracker_class', [CentroidTracker, ArrayTracker])
+@pytest.mark.parametrize('assignment', ['greedy', 'optimal'])
+def test_detection_beyond_gate_registers_new_id(tracker_class, assignment):
+    tracker = tracker_class(assignment=assignment, max_distance=50, max_disappeared=5)
+    tracker.update(boxes_at([0]))
+    tracker.update(boxes_at([200]))
+
+    assert {object_id: centroid[0] for object_id, centroid in tracker.objects.items()} == {0: 0, 1: 200}
+
+    # Without the gate the old ID takes the distant detection
+    ungated = tracker_class(assignment=assignment, max_disappeared=5)
+    ungated.update(boxes_at([0]))
+    ungated.update(boxes_at([200]))
+    assert {object_id: centroid[0] for object_id, centroid in ungated.objects.items()} == {0: 200}
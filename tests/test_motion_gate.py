@@ -0,0 +1,36 @@
+"""MotionGate skipping and its use in infer_frames"""
+
+import pytest
+
+from conftest import solid_frame
+from inference import MotionGate
+
+
+def test_motion_gate_skips_static_frames():
+    gate = MotionGate()
+    assert gate.update(solid_frame(100))
+    assert not any(gate.update(solid_frame(100)) for _ in range(9))
+    assert gate.update(solid_frame(200))
+    assert gate.as_dict()['skipped'] == 9
+    assert gate.as_dict()['frames'] == 11
+
+
+def test_motion_gate_ignores_small_changes():
+    gate = MotionGate(threshold=0.01)
+    gate.update(solid_frame(100))
+    nudged = solid_frame(100)
+    nudged[:2, :2] = 255
+    assert not gate.update(nudged)
+
+
+@pytest.mark.parametrize('batch_size', [1, 4])
+def test_static_frames_skip_inference(detector, batch_size):
+    frames = [(i + 1, solid_frame(100 if i < 6 else 200)) for i in range(10)]
+    output = list(detector.infer_frames(frames, batch_size=batch_size, motion_gate=MotionGate()))
+
+    # Only the first frame and the first changed frame go through the model
+    assert sum(detector.model.calls) == 2
+    assert [results.value for _, _, results in output] == [100] * 6 + [200] * 4
+
+    # Reused results are drawn on the current frame
+    assert all(results.orig_img is image for _, image, results in output)
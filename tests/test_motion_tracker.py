@@ -0,0 +1,93 @@
+"""MotionTracker: prediction across frame-stride gaps, low-confidence association, coasting crossings"""
+
+import numpy as np
+
+from inference import ArrayTracker, CentroidTracker, MotionTracker, ZoneCounter
+
+
+def box(cx, cy, w=30, h=60):
+    return (cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2)
+
+
+def ids_by_position(tracker, objects=None):
+    """Object ID of the leftmost and the rightmost object"""
+    objects = tracker.objects if objects is None else objects
+    ordered = sorted(objects.items(), key=lambda item: item[1][0])
+    return [object_id for object_id, _ in ordered]
+
+
+def test_passing_objects_keep_ids_where_centroid_tracker_swaps():
+    # A walks right and B walks left, 40 px per processed frame, passing each other between two updates
+    frames = [np.array([box(40 * t, 100), box(420 - 40 * t, 100)]) for t in range(10)]
+
+    centroid = CentroidTracker(max_distance=100)
+    motion = MotionTracker(max_distance=100)
+    for t, boxes in enumerate(frames):
+        centroid.update(boxes)
+        motion.update(boxes)
+        if t == 0:
+            a_centroid, _ = ids_by_position(centroid)
+            a_motion, _ = ids_by_position(motion)
+
+    # After passing, A is the rightmost object
+    assert ids_by_position(centroid)[1] != a_centroid
+    assert ids_by_position(motion)[1] == a_motion
+    assert len(motion) == 2
+
+
+def test_object_keeps_id_across_missed_updates():
+    centroid = CentroidTracker(max_disappeared=5, max_distance=60)
+    motion = MotionTracker(max_distance=60)
+    positions = [40 * t for t in range(6)] + [None, None] + [40 * t for t in range(8, 12)]
+
+    for x in positions:
+        boxes = [box(x, 100)] if x is not None else []
+        centroid.update(boxes)
+        motion.update(boxes)
+
+    # The centroid tracker lost the object (120 px jump over the gate) and registered a new one
+    assert sorted(centroid.objects) == [1]
+    assert motion.objects.keys() == {0}
+    assert abs(motion.objects[0][0] - 440) < 10
+
+
+def test_low_confidence_detection_extends_existing_object():
+    tracker = MotionTracker(high_conf=0.5)
+    for y in (100, 104, 108):
+        tracker.update([box(100, y)], scores=[0.9])
+
+    # Occluded: the detection drops below high_conf but still extends the track
+    tracker.update([box(100, 112), box(400, 100)], scores=[0.3, 0.2])
+    assert tracker.objects.keys() == {0}
+    assert tracker.missed[:tracker.size].tolist() == [0]
+
+    # A low-confidence box that overlaps no object is neither matched nor registered
+    tracker.update([box(100, 116), box(400, 100)], scores=[0.9, 0.3])
+    assert tracker.objects.keys() == {0}
+
+
+def test_confident_detection_matched_first():
+    tracker = MotionTracker(high_conf=0.5)
+    tracker.update([box(100, 100)], scores=[0.9])
+
+    # The confident box takes the object, the overlapping low-confidence duplicate is dropped
+    tracker.update([box(102, 100), box(100, 100)], scores=[0.8, 0.4])
+    assert tracker.objects.keys() == {0}
+    assert tracker.objects[0][0] > 100
+
+
+def test_crossing_counted_on_predicted_positions():
+    line = {'y': 200}
+    motion, plain = MotionTracker(max_coast=5), ArrayTracker()
+    motion_counter, plain_counter = ZoneCounter(line), ZoneCounter(line)
+
+    # Walks down 20 px per update and is last detected at y = 180, just above the line
+    for y in list(range(40, 181, 20)) + [None] * 3:
+        boxes = [box(100, y)] if y is not None else []
+        motion.update(boxes)
+        plain.update(boxes)
+        motion_counter.update(motion)
+        plain_counter.update(plain)
+
+    assert (plain_counter.in_count, plain_counter.out_count) == (0, 0)
+    assert (motion_counter.in_count, motion_counter.out_count) == (0, 1)
@@ -0,0 +1,92 @@
+"""Pipeline stages: ordering, shutdown and error propagation"""
+
+import threading
+import time
+
+import pytest
+
+from inference import FrameSinkStage, PipelineStage
+
+
+def stage_threads():
+    return [thread for thread in threading.enumerate() if thread.name.endswith('-stage')]
+
+
+def test_stage_keeps_order_and_finishes():
+    stage = PipelineStage('decode', range(100), maxsize=4)
+    assert list(stage) == list(range(100))
+    stage.close()
+    assert stage.stats.as_dict()['max_depth'] <= 4
+    assert not stage_threads()
+
+
+def test_chained_stages_keep_order():
+    decode = PipelineStage('decode', ((i, i * i) for i in range(50)), maxsize=2)
+    infer = PipelineStage('infer', ((i, value + 1) for i, value in decode), maxsize=2)
+    assert list(infer) == [(i, i * i + 1) for i in range(50)]
+    infer.close()
+    decode.close()
+    assert not stage_threads()
+
+
+def failing_source(fail_at):
+    for i in range(fail_at):
+        yield i
+    raise RuntimeError(f"decode failed at {fail_at}")
+
+
+def test_source_error_reaches_consumer():
+    decode = PipelineStage('decode', failing_source(5))
+    infer = PipelineStage('infer', (i * 2 for i in decode))
+
+    seen = []
+    with pytest.raises(RuntimeError, match="decode failed at 5"):
+        for item in infer:
+            seen.append(item)
+    assert seen == [0, 2, 4, 6, 8]
+
+    infer.close()
+    decode.close()
+    assert not stage_threads()
+
+
+def test_close_stops_blocked_producer():
+    def endless():
+        i = 0
+        while True:
+            yield i
+            i += 1
+
+    stage = PipelineStage('decode', endless(), maxsize=2)
+    first = next(iter(stage))
+    start = time.perf_counter()
+    stage.close()
+
+    assert first == 0
+    assert time.perf_counter() - start < 2
+    assert not stage_threads()
+
+
+def test_sink_handles_items_in_order():
+    written = []
+    sink = FrameSinkStage('write', written.append, maxsize=2)
+    for i in range(20):
+        sink.put(i)
+    sink.close()
+    assert written == list(range(20))
+    assert not stage_threads()
+
+
+def test_sink_error_reaches_caller():
+    def handler(item):
+        if item == 3:
+            raise OSError("disk full")
+
+    sink = FrameSinkStage('write', handler, maxsize=1)
+    with pytest.raises(OSError, match="disk full"):
+        for i in range(100):
+            sink.put(i)
+            time.sleep(0.001)
+    with pytest.raises(OSError, match="disk full"):
+        sink.close()
+    assert not stage_threads()
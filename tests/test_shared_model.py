@@ -0,0 +1,39 @@
+"""SharedModel attribute forwarding without loading a model"""
+
+import copy
+
+import pytest
+
+from inference import SharedModel
+
+
+def test_uninitialized_instance_does_not_recurse():
+    handle = SharedModel.__new__(SharedModel)
+    with pytest.raises(AttributeError):
+        handle.lock
+    with pytest.raises(AttributeError):
+        handle.__setstate__
+
+
+def test_private_probe_does_not_load(monkeypatch):
+    handle = SharedModel('missing.pt')
+    monkeypatch.setattr(SharedModel, 'load', lambda self, warmup=True: pytest.fail("model loaded"))
+
+    assert not hasattr(handle, '_private')
+    assert handle.model is None
+
+
+def test_copy_does_not_load():
+    handle = SharedModel('missing.pt', backend='onnx', imgsz=320)
+    duplicate = copy.copy(handle)
+    assert (duplicate.model_path, duplicate.backend, duplicate.imgsz) == ('missing.pt', 'onnx', 320)
+    assert duplicate.model is None
+
+
+def test_public_names_forwarded_to_loaded_model():
+    class Model:
+        names = {0: 'MOBILE'}
+
+    handle = SharedModel('missing.pt')
+    handle.model = Model()
+    assert handle.names == {0: 'MOBILE'}
@@ -0,0 +1,47 @@
+"""Tile windows and the cross-tile NMS that merges their boxes"""
+
+import numpy as np
+import pytest
+
+from inference import FrameTiler, nms
+
+
+def test_windows_cover_frame_with_overlap():
+    tiler = FrameTiler(tile_size=640, overlap=0.2)
+    windows = tiler.windows((1920, 1080))
+
+    xs = sorted({x1 for x1, _, _, _ in windows})
+    ys = sorted({y1 for _, y1, _, _ in windows})
+    assert xs == [0, 512, 1024, 1280]
+    assert ys == [0, 440]
+    assert all(x2 - x1 == 640 and y2 - y1 == 640 for x1, y1, x2, y2 in windows)
+    assert max(x2 for _, _, x2, _ in windows) == 1920
+    assert max(y2 for _, _, _, y2 in windows) == 1080
+
+
+def test_small_frame_is_one_tile():
+    assert FrameTiler(tile_size=640).windows((320, 240)) == [(0, 0, 320, 240)]
+
+
+def test_invalid_overlap():
+    with pytest.raises(ValueError):
+        FrameTiler(overlap=1.0)
+
+
+def test_cross_tile_nms_merges_duplicates():
+    # The same phone seen by two overlapping tiles (offset 512), mapped back to frame coordinates
+    tile_a = np.array([[590, 300, 630, 380]], dtype=np.float32)
+    tile_b = np.array([[79, 302, 118, 381]], dtype=np.float32) + [512, 0, 512, 0]
+    other_phone = np.array([[900, 300, 940, 380]], dtype=np.float32)
+    person = np.array([[585, 290, 640, 390]], dtype=np.float32)
+
+    boxes = np.concatenate([tile_a, tile_b, other_phone, person])
+    scores = np.array([0.6, 0.8, 0.7, 0.9], dtype=np.float32)
+    classes = np.array([0, 0, 0, 1])
+
+    keep = nms(boxes, scores, classes, iou_threshold=0.45)
+    assert keep.tolist() == [3, 1, 2]
+
+
+def test_nms_empty():
+    assert len(nms(np.zeros((0, 4)), np.zeros(0), np.zeros(0), 0.45)) == 0
@@ -0,0 +1,63 @@
+"""Track ID allocation and wrapping for long-running streams"""
+
+import numpy as np
+import pytest
+
+from inference import ArrayTracker, CentroidTracker, ZoneCounter, allocate_ids
+
+
+def test_allocate_without_limit():
+    ids, next_id = allocate_ids(5, 3)
+    assert ids.tolist() == [5, 6, 7]
+    assert next_id == 8
+
+
+def test_allocate_wraps_and_skips_live_ids():
+    ids, next_id = allocate_ids(6, 4, id_limit=8, live=[7, 0])
+    assert ids.tolist() == [6, 1, 2, 3]
+    assert next_id == 4
+
+
+def test_allocate_rejects_more_objects_than_ids():
+    with pytest.raises(ValueError):
+        allocate_ids(0, 3, id_limit=4, live=[0, 1])
+
+
+def boxes_at(xs):
+    return np.array([(x - 5, 95, x + 5, 105) for x in xs], dtype=np.float32).reshape(-1, 4)
+
+
+@pytest.mark.parametrize('tracker_class', [CentroidTracker, ArrayTracker])
+def test_live_ids_unique_across_wrap(tracker_class):
+    tracker = tracker_class(max_disappeared=0, max_distance=20, id_limit=4)
+
+    # Two long-lived objects plus a new short-lived one every frame force many wraps
+    for frame in range(50):
+        tracker.update(boxes_at([100, 300, 500 + 40 * (frame % 2)]))
+        ids = list(tracker.objects)
+        assert len(ids) == len(set(ids))
+        assert all(0 <= object_id < 4 for object_id in ids)
+
+    assert tracker.next_object_id < 4
+
+
+def test_wrapped_id_does_not_inherit_counted_state():
+    counter = ZoneCounter({'y': 100})
+    tracker = ArrayTracker(max_disappeared=0, id_limit=2)
+
+    # Object 0 crosses down and leaves
+    for cy in (50, 150):
+        tracker.update([(0, cy - 5, 10, cy + 5)])
+        counter.update(tracker)
+    tracker.update([])
+    counter.update(tracker)
+
+    # Later objects reuse IDs 1 and 0, each crossing is counted again
+    for _ in range(2):
+        for cy in (50, 150):
+            tracker.update([(0, cy - 5, 10, cy + 5)])
+            counter.update(tracker)
+        tracker.update([])
+        counter.update(tracker)
+
+    assert counter.out_count == 3
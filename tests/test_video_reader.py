@@ -0,0 +1,82 @@
+"""VideoFrameReader positioning at segment starts"""
+
+import cv2
+import numpy as np
+import pytest
+
+from inference import VideoFrameReader
+
+
+class KeyframeCapture:
+    """
+    Capture of `frames` frames whose seeks land on the keyframe at or before the target
+
+    Frame i (0-based) is filled with the value i, like a decoder that can only start at a keyframe.
+    """
+
+    def __init__(self, frames=100, keyframe_interval=12, report_position=True):
+        self.frames = frames
+        self.keyframe_interval = keyframe_interval
+        self.report_position = report_position
+        self.position = 0
+        self.grabs = 0
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        assert prop == cv2.CAP_PROP_POS_FRAMES
+        self.position = int(value) // self.keyframe_interval * self.keyframe_interval
+        return True
+
+    def get(self, prop):
+        assert prop == cv2.CAP_PROP_POS_FRAMES
+        return float(self.position) if self.report_position else 0.0
+
+    def grab(self):
+        if self.position >= self.frames:
+            return False
+        self.position += 1
+        self.grabs += 1
+        return True
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return True, np.full((2, 2, 3), self.position - 1, dtype=np.uint8)
+
+
+def frames_of(reader):
+    return [(frame_number, int(frame[0, 0, 0])) for frame_number, frame in reader]
+
+
+@pytest.mark.parametrize('start_frame', [0, 1, 11, 12, 13, 50, 99])
+def test_segment_starts_exactly_after_keyframe_seek(start_frame):
+    cap = KeyframeCapture()
+    frames = frames_of(VideoFrameReader(cap, start_frame=start_frame, end_frame=start_frame + 5, seek_margin=3))
+    assert frames == [(n, n - 1) for n in range(start_frame + 1, min(start_frame + 5, 100) + 1)]
+
+
+def test_segments_match_sequential_read():
+    sequential = frames_of(VideoFrameReader(KeyframeCapture(), process_every_n_frames=2))
+
+    segmented = []
+    for start in range(0, 100, 30):
+        end = start + 30 if start + 30 < 100 else None
+        segmented += frames_of(VideoFrameReader(KeyframeCapture(), process_every_n_frames=2,
+                                                start_frame=start, end_frame=end, seek_margin=5))
+    assert segmented == sequential
+
+
+def test_seek_decodes_a_bounded_number_of_frames():
+    cap = KeyframeCapture(frames=10000, keyframe_interval=50)
+    reader = VideoFrameReader(cap, start_frame=9000, seek_margin=250)
+    assert reader.frames_read == 9000
+    assert cap.grabs <= 250 + 50
+
+
+def test_seek_without_position_reports_counts_grabs():
+    cap = KeyframeCapture(keyframe_interval=1, report_position=False)
+    reader = VideoFrameReader(cap, start_frame=40, seek_margin=10)
+    assert reader.frames_read == 40
+    assert frames_of(reader)[0] == (41, 40)